@@ -0,0 +1,105 @@
+"""Memory-per-book and parse rate of Book vs the old dict-backed dataclass.
+
+Run from the repo root:  python -m benchmarks.bench_book [count]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.domain.book import Book
+
+
+@dataclass
+class DictBackedBook:
+    # the pre-slots Book layout, kept here only for comparison
+    title: str
+    author: str
+    genre: Optional[str] = None
+    publication_year: Optional[int] = None
+    page_count: Optional[int] = None
+    average_rating: Optional[float] = None
+    ratings_count: Optional[int] = None
+    price_usd: Optional[float] = None
+    publisher: Optional[str] = None
+    language: Optional[str] = None
+    format: Optional[str] = None
+    in_print: Optional[bool] = None
+    sales_millions: Optional[float] = None
+    last_checkout: Optional[str] = None
+    available: bool = True
+    book_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DictBackedBook":
+        return cls(**data)
+
+
+def make_records(count: int) -> list[dict]:
+    # round-trip through json so the keys are fresh strings like in a real load
+    # (interned keys make cls(**data) look much faster than it is in practice)
+    books = [
+        Book(
+            title=f"Book Title {i}",
+            author=f"Author {i % 80}",
+            genre="Fantasy",
+            publication_year=1990 + i % 30,
+            page_count=300,
+            average_rating=3.5,
+            ratings_count=i,
+            price_usd=9.99,
+            publisher="North Star Press",
+            language="English",
+            format="Paperback",
+            in_print=True,
+            sales_millions=1.5,
+            last_checkout="2026-01-01T00:00:00",
+        ).to_dict()
+        for i in range(count)
+    ]
+    return json.loads(json.dumps(books))
+
+
+def measure(cls, records: list[dict]) -> tuple[float, float]:
+    elapsed = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        books = [cls.from_dict(r) for r in records]
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del books
+
+    # timed separately, tracemalloc slows allocation down a lot
+    tracemalloc.start()
+    books = [cls.from_dict(r) for r in records]
+    # records share their values with the books, so this is the object overhead only
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del books
+    return current / len(records), len(records) / elapsed
+
+
+def main(count: int = 200_000) -> None:
+    records = make_records(count)
+    for name, cls in [("dict-backed", DictBackedBook), ("slotted", Book)]:
+        per_book, rate = measure(cls, records)
+        print(f"{name:>12}: {per_book:7.1f} bytes/book  {rate:12,.0f} books/s")
+
+    start = time.perf_counter()
+    books = [Book.from_dict(r) for r in records]
+    for b in books:
+        b.to_dict()
+    to_dict = time.perf_counter() - start
+    start = time.perf_counter()
+    for b in books:
+        b.to_row()
+    to_row = time.perf_counter() - start
+    print(f"     to_dict: {count / to_dict:12,.0f} books/s (incl. parse)")
+    print(f"      to_row: {count / to_row:12,.0f} books/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
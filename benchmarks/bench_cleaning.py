@@ -0,0 +1,40 @@
+"""Serial vs process-pool BookCleaningService on a scaled-up books_dirty.json.
+
+Run from the repo root:  python -m benchmarks.bench_cleaning [rows]
+"""
+
+import json
+import os
+import sys
+import time
+
+from pandas.testing import assert_frame_equal
+
+from src.services.book_cleaning_service import BookCleaningService
+
+
+def main(rows: int = 1_000_000) -> None:
+    with open("books_dirty.json", "r", encoding="utf-8") as f:
+        sample = json.load(f)
+    books = (sample * (rows // len(sample) + 1))[:rows]
+    svc = BookCleaningService()
+
+    start = time.perf_counter()
+    expected = svc.clean(books)
+    serial = time.perf_counter() - start
+    print(f"serial      : {serial:6.2f}s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        result = svc.clean_parallel(
+            books, workers=workers, chunk_size=max(rows // (workers * 4), 1)
+        )
+        elapsed = time.perf_counter() - start
+        assert_frame_equal(expected, result)
+        print(f"{workers:2d} workers  : {elapsed:6.2f}s  ({serial / elapsed:4.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
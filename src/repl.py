@@ -3,11 +3,21 @@ from src.services import generate_books, generate_bad_books
 from src.domain.book import Book
 from src.services.book_service import BookService
 from src.services.book_circulation_service import BookCirculationService
-from src.repositories.book_repository import BookRepository
-from src.repositories.circulation_repository import CirculationRepository
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.repositories.indexed_circulation_repository import (
+    IndexedCirculationRepository,
+)
+from src.repositories.locked_book_repository import LockedBookRepository
+from src.repositories.locked_circulation_repository import (
+    LockedCirculationRepository,
+)
 from src.services.book_analytics_service import BookAnalyticsService
 from src.services.book_cleaning_service import BookCleaningService
 from src.services.book_visualization_service import BookVisualization
+from src.services.cached_book_analytics_service import CachedBookAnalyticsService
+from datetime import datetime
+import argparse
+import os
 import requests
 
 
@@ -44,9 +54,13 @@ class BookManagementREPL:
             self.checkin_book()
         elif cmd == "getCirculationLogs":
             self.get_circulation_logs()
+        elif cmd == "getBookHistory":
+            self.get_book_history()
+        elif cmd == "getLogsBetween":
+            self.get_logs_between()
         elif cmd == "help":
             print(
-                "Available commands: addBook, getAllRecords, findByName, editByName, deleteByName, checkoutBook, checkinBook, getCirculationLogs, help, exit"
+                "Available commands: addBook, getAllRecords, findByName, editByName, deleteByName, checkoutBook, checkinBook, getCirculationLogs, getBookHistory, getLogsBetween, help, exit"
             )
         else:
             print("Please use a valid command!")
@@ -130,17 +144,42 @@ class BookManagementREPL:
     def get_circulation_logs(self):
         try:
             logs = self.circulation_svc.get_all_circulation_logs()
-            if not logs:
-                print("No circulation logs found.")
-            else:
-                print(f"\n📋 Circulation Logs ({len(logs)} entries):")
-                for log in logs:
-                    print(
-                        f"  [{log.timestamp}] {log.action.upper()}: '{log.title}' by {log.author}"
-                    )
+            self.print_logs(logs)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    def get_book_history(self):
+        try:
+            title = input("Enter book title: ")
+            author = input("Enter book author: ")
+            book = self.book_svc.find_by_title_author(title, author)
+            if book is None:
+                print("Book not found")
+                return
+            logs = self.circulation_svc.get_circulation_logs_for_book(book.book_id)
+            self.print_logs(logs)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    def get_logs_between(self):
+        try:
+            start = datetime.fromisoformat(input("Enter start date (YYYY-MM-DD): "))
+            end = datetime.fromisoformat(input("Enter end date (YYYY-MM-DD): "))
+            logs = self.circulation_svc.get_circulation_logs_between(start, end)
+            self.print_logs(logs)
         except Exception as e:
             print(f"An error occurred: {e}")
 
+    def print_logs(self, logs):
+        if not logs:
+            print("No circulation logs found.")
+        else:
+            print(f"\n📋 Circulation Logs ({len(logs)} entries):")
+            for log in logs:
+                print(
+                    f"  [{log.timestamp}] {log.action.upper()}: '{log.title}' by {log.author}"
+                )
+
 
 class BookAnalyticsREPL:
     def __init__(
@@ -175,8 +214,12 @@ class BookAnalyticsREPL:
             self.get_price_std_dev()
         elif cmd == "getBestBookByYear":
             self.most_popular_by_year()
+        elif cmd == "getBestBooksAllYears":
+            self.best_books_all_years()
         elif cmd == "cleanBooks":
             self.clean_books()
+        elif cmd == "findNearDuplicates":
+            self.find_near_duplicates()
         elif cmd == "generateBadBooks":
             self.generate_bad_books()
         elif cmd == "plotCommonGenres":
@@ -185,71 +228,108 @@ class BookAnalyticsREPL:
             self.plot_checkin_vs_available()
         elif cmd == "help":
             print(
-                "Available commands: getAveragePrice, getTopBooks, getValueScores, getMedianByGenre, getPriceStdDev, getBestBookByYear, cleanBooks, generateBadBooks, plotCommonGenres, plotCheckinVsAvailable, help, exit"
+                "Available commands: getAveragePrice, getTopBooks, getValueScores, getMedianByGenre, getPriceStdDev, getBestBookByYear, getBestBooksAllYears, cleanBooks, findNearDuplicates, generateBadBooks, plotCommonGenres, plotCheckinVsAvailable, help, exit"
             )
         else:
             print("Please use a valid command!")
 
     def get_average_price(self):
-        books = self.book_svc.get_all_books()
-        avg_price = self.book_analytics_svc.average_price(books)
+        aggregates = self.book_svc.get_aggregates()
+        if aggregates is not None:
+            avg_price = aggregates.average_price()
+        else:
+            frame = self.book_svc.get_book_frame()
+            avg_price = self.book_analytics_svc.average_price(frame)
         print(avg_price)
 
     def get_top_books(self):
-        books = self.book_svc.get_all_books()
-        top_rated_books = self.book_analytics_svc.top_rated(books)
+        frame = self.book_svc.get_book_frame()
+        top_rated_books = self.book_analytics_svc.top_rated(frame)
         print(top_rated_books)
 
     def get_value_scores(self):
-        books = self.book_svc.get_all_books()
-        value_scores = self.book_analytics_svc.value_scores(books)
+        frame = self.book_svc.get_book_frame()
+        value_scores = self.book_analytics_svc.value_scores(frame, limit=10)
         print(value_scores)
 
     def get_median_price_by_genre(self):
-        books = self.book_svc.get_all_books()
-        median_by_genre = self.book_analytics_svc.median_price_by_genre(books)
+        genre_medians = self.book_svc.get_genre_medians()
+        if genre_medians is not None:
+            median_by_genre = genre_medians.median_price_by_genre()
+        else:
+            frame = self.book_svc.get_book_frame()
+            median_by_genre = self.book_analytics_svc.median_price_by_genre(frame)
         print(median_by_genre)
 
     def get_price_std_dev(self):
-        books = self.book_svc.get_all_books()
-        std_dev = self.book_analytics_svc.price_std_dev(books)
+        aggregates = self.book_svc.get_aggregates()
+        if aggregates is not None:
+            std_dev = aggregates.price_std_dev()
+        else:
+            frame = self.book_svc.get_book_frame()
+            std_dev = self.book_analytics_svc.price_std_dev(frame)
         print(f"Price Standard Deviation: ${std_dev:.2f}")
 
     def most_popular_by_year(self):
         year = input("Please enter a year:")
         books = self.book_analytics_svc.most_popular_by_year(
-            self.book_svc.get_all_books(), year
+            self.book_svc.get_book_frame(), year
+        )
+        print(books)
+
+    def best_books_all_years(self):
+        books = self.book_analytics_svc.best_books_all_years(
+            self.book_svc.get_book_frame()
         )
         print(books)
 
     def clean_books(self):
-        import json
-
-        # Load raw data from dirty file
-        with open("books_dirty.json", "r", encoding="utf-8") as f:
-            raw_books = json.load(f)
-        # Clean
-        cleaned_df = self.book_cleaning_svc.clean(raw_books)
-        # Convert back to list of dicts
-        cleaned_books = cleaned_df.to_dict("records")
-        # Convert Timestamps to strings for JSON serialization
-        for book in cleaned_books:
-            if "last_checkout" in book:
-                book["last_checkout"] = book["last_checkout"].isoformat()
-        # Save back to clean file
-        with open("books.json", "w", encoding="utf-8") as f:
-            json.dump(cleaned_books, f, indent=2)
-        print("Books cleaned and saved to books.json.")
+        # streams books_dirty.json through the cleaner into the catalog file,
+        # only records that changed since the last run are cleaned again
+        # (through the book service, so shared storage locks and versions it).
+        # Near duplicates are left in, findNearDuplicates lists them.
+        report = self.book_svc.replace_catalog(
+            lambda path: self.book_cleaning_svc.clean_file_incremental(
+                "books_dirty.json", path
+            )
+        )
+        print(
+            f"{report['written']} books cleaned and saved to books.json "
+            f"({report['recomputed']} recomputed, {report['reused']} reused)."
+        )
+
+    def find_near_duplicates(self):
+        # report only, the catalog itself is left alone
+        books = self.book_svc.get_all_books()
+        if not books:
+            print("No books in the catalog.")
+            return
+        clusters = self.book_cleaning_svc.report_near_duplicates(books)
+        for cluster in clusters:
+            merged = ", ".join(
+                f"{b['title']!r} by {b['author']}" for b in cluster["merged"]
+            )
+            print(
+                f"{cluster['kept']['title']!r} by {cluster['kept']['author']} <- {merged}"
+            )
+        print(f"{len(clusters)} near-duplicate clusters found.")
 
     def generate_bad_books(self):
         generate_bad_books()
         print("Bad books generated to books_dirty.json.")
 
     def plot_common_genres(self):
-        books = self.book_svc.get_all_books()
-        self.book_visual_svc.plot_genre_counts(books)
+        frame = self.book_svc.get_book_frame()
+        self.book_visual_svc.plot_genre_counts(frame)
 
     def plot_checkin_vs_available(self):
+        aggregates = self.book_svc.get_aggregates()
+        if aggregates is not None:
+            counts = aggregates.availability()
+            self.book_visual_svc.checkin_vs_available_counts(
+                counts["available"], counts["checked_out"]
+            )
+            return
         books = self.book_svc.get_all_books()
         self.book_visual_svc.checkin_vs_available(books)
 
@@ -307,13 +387,30 @@ class BookREPL:
 
 
 if __name__ == "__main__":
-    generate_books()
-    repo = BookRepository("books.json")
-    circ_repo = CirculationRepository("circulation_logs.json")
+    parser = argparse.ArgumentParser()
+    # "shared": several REPLs may run on the same files at once (file locks,
+    # versioned catalog); "cached": one REPL, faster reads and an indexed log
+    parser.add_argument("--storage", choices=["cached", "shared"], default="cached")
+    args = parser.parse_args()
+
+    if args.storage == "shared":
+        if not os.path.exists("books.json"):  # other REPLs may be using it
+            generate_books()
+        repo = LockedBookRepository("books.json")
+        # every event is written under the log lock straight away, so the other
+        # REPLs see it; the index sidecar assumes a single writer, so no index
+        circ_repo = LockedCirculationRepository("circulation_logs.json")
+    else:
+        generate_books()
+        repo = CachedBookRepository("books.json")
+        # events are written in batches of up to 64, at most a second after they happen
+        circ_repo = IndexedCirculationRepository(
+            "circulation_logs.json", buffer_size=64, flush_interval=1.0
+        )
 
     book_service = BookService(repo)
     circulation_service = BookCirculationService(repo, circ_repo)
-    book_analytics_service = BookAnalyticsService()
+    book_analytics_service = CachedBookAnalyticsService(BookAnalyticsService())
     book_cleaning_service = BookCleaningService()
     book_visual_service = BookVisualization()
 
@@ -324,4 +421,7 @@ if __name__ == "__main__":
         book_visual_service,
         circulation_service,
     )
-    repl.start()
+    try:
+        repl.start()
+    finally:
+        circ_repo.close()  # writes out buffered events and the log index
@@ -1,2 +1,6 @@
 from .book_repository import BookRepository  # noqa: F401
 from .book_repository_protocol import BookRepositoryProtocol  # noqa: F401
+from .cached_book_repository import CachedBookRepository  # noqa: F401
+from .journaled_book_repository import JournaledBookRepository  # noqa: F401
+from .locked_book_repository import LockedBookRepository  # noqa: F401
+from .sqlite_book_repository import SqliteBookRepository  # noqa: F401
@@ -0,0 +1,69 @@
+from typing import Iterable
+from src.domain.book import Book
+
+
+class BookIndex:
+    # Hash indexes over the resident catalog:
+    # - by_id: book_id -> Book (dicts keep insertion order, so this is also the catalog order)
+    # - by_title: title -> books with that exact title
+    # - by_title_author: (title, author) -> books with that pair
+    # book_id is treated as the primary key, a later book with the same id replaces the earlier one
+    def __init__(self, books: Iterable[Book] = ()):
+        self.by_id: dict[str, Book] = {}
+        self.by_title: dict[str, list[Book]] = {}
+        self.by_title_author: dict[tuple[str, str], list[Book]] = {}
+        # the keys each book was indexed under, so books that were mutated in
+        # place can still be found in their old buckets
+        self._keys: dict[str, tuple[str, str]] = {}
+        for book in books:
+            self.put(book)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def books(self) -> list[Book]:
+        return list(self.by_id.values())
+
+    def get(self, book_id: str) -> Book | None:
+        return self.by_id.get(book_id)
+
+    def find_by_title(self, title: str) -> list[Book]:
+        return list(self.by_title.get(title, ()))
+
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        bucket = self.by_title_author.get((title, author))
+        return bucket[0] if bucket else None
+
+    def put(self, book: Book) -> None:
+        # insert, or replace the book with the same id while keeping its catalog position
+        if book.book_id in self.by_id:
+            self._unbucket(book.book_id)
+        self.by_id[book.book_id] = book
+        self._bucket(book)
+
+    def discard(self, book_id: str) -> Book | None:
+        if book_id not in self.by_id:
+            return None
+        self._unbucket(book_id)
+        return self.by_id.pop(book_id)
+
+    def _bucket(self, book: Book) -> None:
+        keys = (book.title, book.author)
+        self._keys[book.book_id] = keys
+        self.by_title.setdefault(book.title, []).append(book)
+        self.by_title_author.setdefault(keys, []).append(book)
+
+    def _unbucket(self, book_id: str) -> None:
+        title, author = self._keys.pop(book_id)
+        _remove_by_id(self.by_title, title, book_id)
+        _remove_by_id(self.by_title_author, (title, author), book_id)
+
+
+def _remove_by_id(buckets: dict, key, book_id: str) -> None:
+    bucket = buckets[key]
+    for i, book in enumerate(bucket):
+        if book.book_id == book_id:
+            del bucket[i]
+            break
+    if not bucket:
+        del buckets[key]
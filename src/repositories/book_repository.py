@@ -1,27 +1,74 @@
 import json
+import os
+from typing import Callable, Hashable, Iterator
 from src.domain.book import Book
-from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.book_repository_protocol import BookLookup, BookRepositoryProtocol
+from src.repositories.json_stream import iter_json_records
 
 
 class BookRepository(BookRepositoryProtocol):
     def __init__(self, filepath: str = "books.json"):
         self.filepath = filepath
+        self.writes = 0
 
-    def get_all_books(self) -> list[Book]:
+    @property
+    def version(self) -> Hashable:
+        # changes whenever books.json may have changed, by us or by someone else
+        return (self.writes, self._stat_fingerprint())
+
+    def _stat_fingerprint(self) -> tuple[int, ...]:
+        st = os.stat(self.filepath)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load_books(self) -> list[Book]:
         with open(self.filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
             return [Book.from_dict(item) for item in data]
 
+    def _write_books(self, books: list[Book]) -> None:
+        self.writes += 1
+        with open(self.filepath, "w", encoding="utf-8") as f:
+            json.dump([b.to_dict() for b in books], f, indent=2)
+
+    def get_all_books(self) -> list[Book]:
+        return self._load_books()
+
+    def iter_books(self, raw: bool = False) -> Iterator[Book] | Iterator[dict]:
+        # streams books.json one record at a time instead of building the whole list
+        # raw=True yields the dicts as stored, skipping Book construction
+        records = iter_json_records(self.filepath)
+        if raw:
+            return records
+        return (Book.from_dict(item) for item in records)
+
     def add_book(self, book: Book) -> str:
         books = self.get_all_books()
         books.append(book)
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([b.to_dict() for b in books], f, indent=2)
+        self._write_books(books)
         return book.book_id
 
+    def get_by_id(self, book_id: str) -> Book | None:
+        for book in self.get_all_books():
+            if book.book_id == book_id:
+                return book
+        return None
+
+    def add_books(self, books: list[Book]) -> list[str]:
+        # one load and one write for the whole batch
+        catalog = self.get_all_books()
+        catalog.extend(books)
+        self._write_books(catalog)
+        return [b.book_id for b in books]
+
     def find_book_by_name(self, query: str) -> list[Book]:
         return [b for b in self.get_all_books() if b.title == query]
 
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        for book in self.get_all_books():
+            if book.title == title and book.author == author:
+                return book
+        return None
+
     def edit_book_by_name(
         self,
         title: str,
@@ -39,10 +86,7 @@ class BookRepository(BookRepositoryProtocol):
                 if new_author is not None:  # if the user input a new author
                     book.author = new_author
 
-                with open(
-                    self.filepath, "w", encoding="utf-8"
-                ) as f:  # update books.json
-                    json.dump([b.to_dict() for b in books], f, indent=2)
+                self._write_books(books)  # update books.json
                 return True
         return False
 
@@ -57,11 +101,24 @@ class BookRepository(BookRepositoryProtocol):
                 break
 
         if updated:
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                json.dump([b.to_dict() for b in books], f, indent=2)
+            self._write_books(books)
 
         return updated
 
+    def update_books(self, books: list[Book]) -> list[bool]:
+        catalog = self.get_all_books()
+        positions = {b.book_id: i for i, b in enumerate(catalog)}
+        results = []
+        for book in books:
+            i = positions.get(book.book_id)
+            if i is not None:
+                catalog[i] = book
+            results.append(i is not None)
+
+        if any(results):
+            self._write_books(catalog)
+        return results
+
     def delete_book_by_name(self, title: str, author: str) -> bool:
         books = self.get_all_books()
         updated_books = []
@@ -76,7 +133,42 @@ class BookRepository(BookRepositoryProtocol):
         if not deleted:
             return False
 
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([b.to_dict() for b in updated_books], f, indent=2)
+        self._write_books(updated_books)
 
         return True
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        catalog = self.get_all_books()
+        remaining = {b.book_id for b in catalog}
+        results = []
+        for book_id in book_ids:
+            results.append(book_id in remaining)
+            remaining.discard(book_id)  # asking twice for the same id only deletes once
+
+        if any(results):
+            deleted = set(book_ids)
+            self._write_books([b for b in catalog if b.book_id not in deleted])
+        return results
+
+    def modify_books(
+        self, lookups: list[BookLookup], mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        # one load, one pass to build the lookups, one write
+        books = self.get_all_books()
+        by_id: dict[str, Book] = {}
+        by_title_author: dict[tuple[str, str], Book] = {}
+        for book in books:
+            by_id.setdefault(book.book_id, book)
+            by_title_author.setdefault((book.title, book.author), book)
+
+        results = []
+        for key in lookups:
+            if isinstance(key, str):
+                book = by_id.get(key)
+            else:
+                book = by_title_author.get(tuple(key))
+            results.append(None if book is None else bool(mutate(book)))
+
+        if any(results):
+            self._write_books(books)
+        return results
@@ -1,17 +1,41 @@
-from typing import Protocol
+from typing import Callable, Hashable, Iterator, Protocol
 from src.domain.book import Book
 
+# a book_id, or a (title, author) pair
+BookLookup = str | tuple[str, str]
+
 
 class BookRepositoryProtocol(Protocol):
+    # version changes whenever the catalog may have changed, None means "unknown"
+    # (callers caching anything derived from the catalog must not cache then)
+    @property
+    def version(self) -> Hashable:
+        ...
+
     def get_all_books(self) -> list[Book]:
         ...
 
+    def iter_books(self, raw: bool = False) -> Iterator[Book] | Iterator[dict]:
+        ...
+
     def add_book(self, book: Book) -> str: 
         ...
 
+    def add_books(self, books: list[Book]) -> list[str]:
+        ...
+
+    def update_books(self, books: list[Book]) -> list[bool]:
+        ...
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        ...
+
     def find_book_by_name(self, query: str) -> list[Book]: 
         ...
 
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        ...
+
     def edit_book_by_name(
         self,
         title: str,
@@ -23,3 +47,14 @@ class BookRepositoryProtocol(Protocol):
 
     def delete_book_by_name(self, title: str, author: str) -> bool: 
         ...
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        ...
+
+    # finds each book, calls mutate(book) on it and saves every book mutate returned
+    # True for, all in one write. Per lookup: None if not found, else mutate's answer.
+    # mutate must not change title or author (use edit_book_by_name for that).
+    def modify_books(
+        self, lookups: list[BookLookup], mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        ...
@@ -0,0 +1,207 @@
+from typing import Callable, Hashable, Iterator
+from src.domain.book import Book
+from src.repositories.book_index import BookIndex
+from src.repositories.book_repository_protocol import BookLookup
+from src.repositories.book_repository import BookRepository
+from src.repositories.catalog_listener import CatalogListener
+
+
+class CachedBookRepository(BookRepository):
+    # Keeps the parsed catalog resident in memory and only re-parses books.json
+    # when the file on disk changes (mtime, size or inode differ from what we loaded).
+    # Lookups go through hash indexes on book_id, title and (title, author),
+    # so finds don't scan the catalog.
+    # NOTE: the returned Book objects are shared with the cache, so mutate them
+    # only when you are about to save them back through the repository.
+    def __init__(self, filepath: str = "books.json"):
+        super().__init__(filepath)
+        self._index: BookIndex | None = None
+        self._fingerprint: tuple[int, ...] | None = None
+        self.cache_hits = 0
+        self.reloads = 0
+        self.mutations = 0
+        self._listeners: list[CatalogListener] = []
+
+    @property
+    def version(self) -> Hashable:
+        # bumps on every reload and every mutation made through this repository
+        # (checking it reloads a changed file, but isn't counted as a cache hit)
+        self._reload_if_changed()
+        return (self.reloads, self.mutations)
+
+    def _catalog(self) -> BookIndex:
+        if not self._reload_if_changed():
+            self.cache_hits += 1
+        return self._index
+
+    def _reload_if_changed(self) -> bool:
+        # True if the catalog had to be (re)loaded
+        fingerprint = self._stat_fingerprint()
+        if self._index is not None and fingerprint == self._fingerprint:
+            return False
+
+        # stat before parsing: if the file changes while we read it, the old
+        # fingerprint no longer matches and the next call reloads again
+        self._index = BookIndex(self._load_books())
+        self._fingerprint = fingerprint
+        self.reloads += 1
+        for listener in self._listeners:
+            listener.on_reset(self._index.books())
+        return True
+
+    def subscribe(self, listener: CatalogListener) -> None:
+        # listener gets the current catalog now and every change from here on
+        self._listeners.append(listener)
+        listener.on_reset(self._catalog().books())
+
+    def _apply(self, changes: list[tuple[str, Book]]) -> None:
+        # changes are ("put", book) / ("delete", book) pairs already applied to
+        # the index: persist them, then tell the listeners
+        self.mutations += 1
+        self._commit(changes)
+        for listener in self._listeners:
+            for op, book in changes:
+                if op == "delete":
+                    listener.on_remove(book)
+                else:
+                    listener.on_put(book)
+
+    def _commit(self, changes: list[tuple[str, Book]]) -> None:
+        # the default storage just rewrites the whole snapshot
+        try:
+            self._write_books(self._index.books())
+        except Exception:
+            self.invalidate()  # disk state is unknown, reparse on next read
+            raise
+        self._fingerprint = self._stat_fingerprint()
+
+    def invalidate(self) -> None:
+        self._index = None
+        self._fingerprint = None
+
+    def cache_stats(self) -> dict[str, int]:
+        return {"hits": self.cache_hits, "reloads": self.reloads}
+
+    def get_all_books(self) -> list[Book]:
+        return self._catalog().books()
+
+    def iter_books(self, raw: bool = False) -> Iterator[Book] | Iterator[dict]:
+        books = self._catalog().books()  # already resident, nothing to stream
+        if raw:
+            return (b.to_dict() for b in books)
+        return iter(books)
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        return self._catalog().get(book_id)
+
+    def find_book_by_name(self, query: str) -> list[Book]:
+        return self._catalog().find_by_title(query)
+
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        return self._catalog().find_by_title_author(title, author)
+
+    def add_book(self, book: Book) -> str:
+        self._catalog().put(book)
+        self._apply([("put", book)])
+        return book.book_id
+
+    def add_books(self, books: list[Book]) -> list[str]:
+        index = self._catalog()
+        for book in books:
+            index.put(book)
+        self._apply([("put", book) for book in books])
+        return [b.book_id for b in books]
+
+    def edit_book_by_name(
+        self,
+        title: str,
+        author: str,
+        new_title: str | None = None,
+        new_author: str | None = None,
+    ) -> bool:
+        index = self._catalog()
+        book = index.find_by_title_author(title, author)
+        if book is None:
+            return False
+        if new_title is not None:
+            book.title = new_title
+        if new_author is not None:
+            book.author = new_author
+        index.put(book)  # re-bucket under the new title/author
+        self._apply([("put", book)])
+        return True
+
+    def update_book(self, book: Book) -> bool:
+        index = self._catalog()
+        if index.get(book.book_id) is None:
+            return False
+        index.put(book)
+        self._apply([("put", book)])
+        return True
+
+    def update_books(self, books: list[Book]) -> list[bool]:
+        index = self._catalog()
+        results = []
+        changes = []
+        for book in books:
+            found = index.get(book.book_id) is not None
+            if found:
+                index.put(book)
+                changes.append(("put", book))
+            results.append(found)
+
+        if changes:
+            self._apply(changes)
+        return results
+
+    def delete_book_by_name(self, title: str, author: str) -> bool:
+        index = self._catalog()
+        book = index.find_by_title_author(title, author)
+        if book is None:
+            return False
+        index.discard(book.book_id)
+        self._apply([("delete", book)])
+        return True
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        index = self._catalog()
+        results = []
+        changes = []
+        for book_id in book_ids:
+            book = index.discard(book_id)
+            if book is not None:
+                changes.append(("delete", book))
+            results.append(book is not None)
+
+        if changes:
+            self._apply(changes)
+        return results
+
+    def modify_books(
+        self, lookups: list[BookLookup], mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        index = self._catalog()
+        results = []
+        changed: dict[str, Book] = {}  # a book modified twice is saved once
+        try:
+            for key in lookups:
+                if isinstance(key, str):
+                    book = index.get(key)
+                else:
+                    book = index.find_by_title_author(*key)
+                if book is None:
+                    results.append(None)
+                    continue
+                ok = bool(mutate(book))
+                if ok:
+                    index.put(book)
+                    changed[book.book_id] = book
+                results.append(ok)
+        except Exception:
+            # mutate already changed cached books that will never be saved
+            self.invalidate()
+            raise
+
+        if changed:
+            self._apply([("put", book) for book in changed.values()])
+        return results
@@ -0,0 +1,14 @@
+from typing import Protocol
+from src.domain.book import Book
+
+
+class CatalogListener(Protocol):
+    # Receives every change a repository makes to its catalog, see CachedBookRepository.subscribe.
+    # on_put covers add / edit / update; the book may be the same object that was
+    # already indexed (mutated in place), so listeners must keep their own copy of
+    # whatever they derived from the old values.
+    def on_reset(self, books: list[Book]) -> None: ...
+
+    def on_put(self, book: Book) -> None: ...
+
+    def on_remove(self, book: Book) -> None: ...
@@ -1,29 +1,188 @@
+import atexit
 import json
+import os
+import sys
+import threading
+import weakref
 from datetime import datetime
+from typing import BinaryIO, Iterator
 from src.domain.circulation import Circulation
 
+DURABILITY_LEVELS = ("none", "flush", "fsync")
+
+# repositories still open, closed at exit so nothing buffered is lost (a WeakSet,
+# so it doesn't keep every repository and its file handle alive until then)
+_open_repositories: "weakref.WeakSet[CirculationRepository]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_repositories() -> None:
+    for repo in list(_open_repositories):
+        try:
+            repo.close()
+        except Exception as e:
+            print(f"Could not write {repo.filepath}: {e}", file=sys.stderr)
+
 
 class CirculationRepository:
-    def __init__(self, filepath: str = "checkout_logs.json"):
+    # Events are written through one append handle kept open between writes.
+    # They are buffered in memory and written as one batch once buffer_size events
+    # are waiting, flush_interval seconds after the first one was buffered, or on
+    # flush()/close(). durability picks what a batch write guarantees:
+    #   "none":  left to Python/OS buffering (fastest, lost on a crash)
+    #   "flush": handed to the OS (survives the process dying)
+    #   "fsync": on disk (survives the machine dying)
+    # Reads flush first, so they always see every logged event. The defaults
+    # (buffer_size=1, "flush") write each event straight away, like before.
+    # close() (also run at exit) raises if buffered events could not be written.
+    def __init__(
+        self,
+        filepath: str = "checkout_logs.json",
+        buffer_size: int = 1,
+        flush_interval: float | None = None,
+        durability: str = "flush",
+    ):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {DURABILITY_LEVELS}")
         self.filepath = filepath
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.batches = 0
+        self._buffer: list[tuple[Circulation, bytes]] = []
+        self._file: BinaryIO | None = None
+        self._timer: threading.Timer | None = None
+        self._lock = threading.RLock()  # the flush timer runs on its own thread
+        self.last_error: Exception | None = None
+        _open_repositories.add(self)
 
-    def log_circulation(self, circulation: Circulation) -> bool:
+    def __del__(self):
+        # dropped without close(): still write out what is buffered
         try:
-            with open(self.filepath, "a", encoding="utf-8") as f:
-                f.write(json.dumps(circulation.to_dict()) + "\n")
-            return True
+            self.close()
         except Exception:
-            return False
+            pass
+
+    def log_circulation(self, circulation: Circulation) -> bool:
+        return self.log_circulations([circulation])
+
+    # buffers all the events together, so a full buffer means one batch write
+    def log_circulations(self, circulations: list[Circulation]) -> bool:
+        lines = [
+            (c, (json.dumps(c.to_dict()) + "\n").encode("utf-8")) for c in circulations
+        ]
+        with self._lock:
+            self._buffer.extend(lines)
+            if len(self._buffer) >= self.buffer_size:
+                return self.flush()
+            if self.flush_interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return True
+
+    def flush(self) -> bool:
+        # write out everything buffered; on failure the events stay buffered
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            try:
+                if self._buffer:
+                    self._write_batch(self._buffer)
+                    batch, self._buffer = self._buffer, []
+                    self.batches += 1
+                    self._after_batch(batch)
+                if self._file is not None and self.durability != "none":
+                    self._file.flush()
+                self.last_error = None
+                return True
+            except Exception as e:
+                self.last_error = e
+                return False
+
+    def close(self) -> None:
+        with self._lock:
+            ok = self.flush()
+            self._close_file()
+            if not ok:
+                raise OSError(
+                    f"{len(self._buffer)} circulation events could not be written "
+                    f"to {self.filepath}"
+                ) from self.last_error
 
     def get_all_logs(self) -> list[Circulation]:
+        return list(self.iter_logs())
+
+    # streams the log one line at a time instead of building the whole list
+    def iter_logs(self) -> Iterator[Circulation]:
+        self._flush_for_read()
         try:
-            logs = []
-            with open(self.filepath, "r", encoding="utf-8") as f:
+            with open(self.filepath, "rb") as f:
                 for line in f:
-                    data = json.loads(line)
-                    timestamp = datetime.fromisoformat(data["timestamp"])
-                    data = {k: v for k, v in data.items() if k != "timestamp"}
-                    logs.append(Circulation(**data, timestamp=timestamp))
-            return logs
+                    if line.strip():
+                        yield _from_line(line)
         except FileNotFoundError:
-            return []
+            return
+
+    # full scans here; IndexedCirculationRepository answers these from an index
+    def get_logs_for_book(self, book_id: str) -> list[Circulation]:
+        return [log for log in self.iter_logs() if log.book_id == book_id]
+
+    # events with start <= timestamp < end
+    def get_logs_between(self, start: datetime, end: datetime) -> list[Circulation]:
+        return [log for log in self.iter_logs() if start <= log.timestamp < end]
+
+    def _flush_for_read(self) -> None:
+        # whatever the durability, our own events must be in the file we read
+        with self._lock:
+            self.flush()
+            if self._file is not None:
+                self._file.flush()
+
+    def _handle(self) -> BinaryIO:
+        if self._file is None:
+            self._file = open(self.filepath, "ab")
+        return self._file
+
+    def _write_batch(self, batch: list[tuple[Circulation, bytes]]) -> None:
+        f = self._handle()
+        start = f.seek(0, os.SEEK_END)
+        try:
+            f.write(b"".join(line for _, line in batch))
+            if self.durability != "none":
+                f.flush()
+                if self.durability == "fsync":
+                    os.fsync(f.fileno())
+        except Exception:
+            self._roll_back(start)
+            raise
+
+    def _after_batch(self, batch: list[tuple[Circulation, bytes]]) -> None:
+        # hook for work after a batch is safely in the log; failing here doesn't
+        # make the batch count as unwritten
+        pass
+
+    def _roll_back(self, size: int) -> None:
+        # the batch stays buffered for the next flush, so any part of it that
+        # already reached the file is cut off again instead of written twice
+        self._close_file()
+        try:
+            os.truncate(self.filepath, size)
+        except OSError:
+            pass
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+
+def _from_line(line: bytes | str) -> Circulation:
+    data = json.loads(line)
+    timestamp = datetime.fromisoformat(data["timestamp"])
+    data = {k: v for k, v in data.items() if k != "timestamp"}
+    return Circulation(**data, timestamp=timestamp)
@@ -0,0 +1,18 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def file_lock(path: str, exclusive: bool = True) -> Iterator[None]:
+    # advisory fcntl lock on a separate lock file, so the data file itself can be
+    # swapped out with os.replace while the lock is held
+    # (only protects against processes that take the same lock)
+    import fcntl  # POSIX only, imported here so the package still imports elsewhere
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the lock
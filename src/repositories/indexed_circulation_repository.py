@@ -0,0 +1,202 @@
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime
+from src.domain.circulation import Circulation
+from src.repositories.circulation_repository import CirculationRepository, _from_line
+
+# bytes from the start of the log kept in the index, to notice a replaced log
+HEAD_BYTES = 256
+
+
+class IndexedCirculationRepository(CirculationRepository):
+    # The log itself stays plain NDJSON. Next to it, <log>.idx keeps:
+    #   size:    how many bytes of the log are indexed
+    #   books:   book_id -> byte offsets of that book's lines
+    #   sparse:  [timestamp, offset] of every sparse_every-th line, for bisect seeks
+    #   ordered: False once a timestamp went backwards (range queries then scan)
+    # Lines appended by anyone else are picked up by indexing only the new tail,
+    # so a missing or stale index is never wrong, just slower to catch up.
+    # Only one process should write through it though: an append landing between
+    # our offset lookup and our write would get our lines indexed at wrong offsets
+    # (LockedCirculationRepository is the one for several writers).
+    # The index is saved by save_index() and on close() only: rewriting it every so
+    # many events would cost more and more as the log grows. After a crash the
+    # saved index is just behind, and the lines since are indexed on first use.
+    # Buffering options are the same as CirculationRepository's.
+    def __init__(
+        self,
+        filepath: str = "checkout_logs.json",
+        sparse_every: int = 256,
+        buffer_size: int = 1,
+        flush_interval: float | None = None,
+        durability: str = "flush",
+    ):
+        super().__init__(filepath, buffer_size, flush_interval, durability)
+        self.index_path = filepath + ".idx"
+        self.sparse_every = sparse_every
+        self._reset()
+        self._load_index()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                super().close()
+            finally:
+                self.save_index()
+
+    def get_logs_for_book(self, book_id: str) -> list[Circulation]:
+        # the index is only touched under the lock (the flush timer's writes update
+        # it too), the file is read outside it from a copy of the offsets
+        with self._lock:
+            self._flush_for_read()
+            self._refresh()
+            offsets = list(self._books.get(book_id, ()))
+        if not offsets:
+            return []
+        logs = []
+        with open(self.filepath, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                logs.append(_from_line(f.readline()))
+        return logs
+
+    # events with start <= timestamp < end
+    def get_logs_between(self, start: datetime, end: datetime) -> list[Circulation]:
+        with self._lock:
+            self._flush_for_read()
+            self._refresh()
+            ordered, size = self._ordered, self._size
+            # last checkpoint strictly before start, everything before it is too early
+            i = bisect_left(self._sparse_times, start) - 1
+            offset = self._sparse_offsets[i] if i >= 0 else 0
+        if not ordered:
+            return super().get_logs_between(start, end)
+        logs = []
+        try:
+            with open(self.filepath, "rb") as f:
+                f.seek(offset)
+                while offset < size:
+                    line = f.readline()
+                    if not line:
+                        break
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    log = _from_line(line)
+                    if log.timestamp >= end:
+                        break
+                    if log.timestamp >= start:
+                        logs.append(log)
+        except FileNotFoundError:
+            return []
+        return logs
+
+    def save_index(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            index = {
+                "size": self._size,
+                "head": self._read_head(),
+                "count": self._count,
+                "ordered": self._ordered,
+                "last": self._last.isoformat() if self._last else None,
+                "books": self._books,
+                "sparse": [
+                    [t.isoformat(), o]
+                    for t, o in zip(self._sparse_times, self._sparse_offsets)
+                ],
+            }
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def _write_batch(self, batch: list[tuple[Circulation, bytes]]) -> None:
+        self._refresh()
+        f = self._handle()
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        super()._write_batch(batch)
+        # if someone else appended in between, the next refresh indexes it all
+        if offset == self._size:
+            for circulation, line in batch:
+                self._add(offset, circulation.book_id, circulation.timestamp)
+                offset += len(line)
+            self._size = offset
+
+    def _reset(self) -> None:
+        self._size = 0
+        self._inode = None
+        self._count = 0
+        self._ordered = True
+        self._last: datetime | None = None
+        self._books: dict[str, list[int]] = {}
+        self._sparse_times: list[datetime] = []
+        self._sparse_offsets: list[int] = []
+        self._dirty = False
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return  # built from scratch on the first refresh
+        head = index.get("head", "")
+        if not head or self._read_head()[: len(head)] != head:
+            return  # the log was replaced, the offsets mean nothing now
+        self._size = index["size"]
+        self._count = index["count"]
+        self._ordered = index["ordered"]
+        self._last = datetime.fromisoformat(index["last"]) if index["last"] else None
+        self._books = index["books"]
+        self._sparse_times = [datetime.fromisoformat(t) for t, _ in index["sparse"]]
+        self._sparse_offsets = [o for _, o in index["sparse"]]
+
+    def _read_head(self) -> str:
+        try:
+            with open(self.filepath, "rb") as f:
+                return f.read(HEAD_BYTES).decode("utf-8", errors="replace")
+        except FileNotFoundError:
+            return ""
+
+    def _refresh(self) -> None:
+        # index whatever was appended since the last look
+        if self._file is not None:
+            self._file.flush()  # our own unflushed writes are already indexed
+        try:
+            st = os.stat(self.filepath)
+            size, inode = st.st_size, st.st_ino
+        except FileNotFoundError:
+            size, inode = 0, None
+        if size < self._size or (self._inode not in (None, inode) and self._size):
+            self._reset()  # truncated or replaced
+            self._dirty = True
+        self._inode = inode
+        if size <= self._size:
+            return
+        with open(self.filepath, "rb") as f:
+            f.seek(self._size)
+            offset = self._size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a line still being written, pick it up next time
+                if line.strip():
+                    data = json.loads(line)
+                    timestamp = datetime.fromisoformat(data["timestamp"])
+                    self._add(offset, data["book_id"], timestamp)
+                offset += len(line)
+            self._size = offset
+
+    def _add(self, offset: int, book_id: str, timestamp: datetime) -> None:
+        if self._last is not None and timestamp < self._last:
+            self._ordered = False
+        if self._count % self.sparse_every == 0:
+            self._sparse_times.append(timestamp)
+            self._sparse_offsets.append(offset)
+        self._books.setdefault(book_id, []).append(offset)
+        self._last = timestamp if self._last is None else max(self._last, timestamp)
+        self._count += 1
+        self._dirty = True
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from src.domain.book import Book
+from src.repositories.cached_book_repository import CachedBookRepository
+
+
+class JournaledBookRepository(CachedBookRepository):
+    # Instead of rewriting books.json on every change, each mutation is appended
+    # as one line to a sidecar journal (books.json.journal):
+    #   {"op": "put", "book": {...}}       add / edit / update
+    #   {"op": "delete", "book_id": "..."}
+    # Reads replay the journal on top of the last books.json snapshot.
+    # Once the journal passes compact_records lines or compact_bytes bytes it is
+    # folded into a fresh snapshot (in a background thread if background=True).
+    # Replaying is idempotent, so a crash halfway through a compaction is safe.
+    # Reloads and the snapshot swap share one lock, so a reload never sees the new
+    # snapshot without the journal it already contains, or the old one without it.
+    def __init__(
+        self,
+        filepath: str = "books.json",
+        compact_records: int = 1000,
+        compact_bytes: int = 4 * 1024 * 1024,
+        background: bool = False,
+    ):
+        super().__init__(filepath)
+        self.journal_path = filepath + ".journal"
+        # the journal being folded in by a running compaction
+        self.compacting_path = filepath + ".journal.compacting"
+        self.compact_records = compact_records
+        self.compact_bytes = compact_bytes
+        self.background = background
+        self.journal_records = 0
+        self.compactions = 0
+        self._lock = threading.RLock()  # compact() reloads while holding it
+        self._compaction: threading.Thread | None = None
+        self.compaction_error: Exception | None = None
+
+    def _stat_fingerprint(self) -> tuple[int, ...]:
+        fingerprint = super()._stat_fingerprint()
+        try:
+            st = os.stat(self.journal_path)
+            return fingerprint + (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            return fingerprint + (0, 0, 0)
+
+    def _load_books(self) -> list[Book]:
+        with self._lock:
+            books = {b.book_id: b for b in super()._load_books()}
+            self.journal_records = 0
+            for path in (self.compacting_path, self.journal_path):
+                self.journal_records += _replay(path, books)
+            return list(books.values())
+
+    def _commit(self, changes: list[tuple[str, Book]]) -> None:
+        lines = []
+        for op, book in changes:
+            if op == "delete":
+                lines.append(json.dumps({"op": "delete", "book_id": book.book_id}))
+            else:
+                lines.append(json.dumps({"op": "put", "book": book.to_dict()}))
+
+        with self._lock:
+            try:
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    size = f.tell()
+            except Exception:
+                self.invalidate()
+                raise
+            self.journal_records += len(lines)
+            self._fingerprint = self._stat_fingerprint()
+
+        if self.journal_records >= self.compact_records or size >= self.compact_bytes:
+            try:
+                self.compact(wait=not self.background)
+            except Exception:
+                # the change itself is in the journal; reload so listeners catch up
+                self.invalidate()
+                raise
+
+    def compact(self, wait: bool = True) -> bool:
+        # fold the journal into a new books.json snapshot
+        # returns False if a previous compaction is still running
+        # with wait=True a failed compaction raises here; a background failure is
+        # reported by the thread and raised by the next wait_for_compaction()
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return False
+            # built from the files, not the cached Books: those are shared with
+            # callers and may hold in-place changes that were never saved (or
+            # whose journal write failed), and the thread must not see later ones
+            records = [b.to_dict() for b in self._load_books()]
+            if os.path.exists(self.compacting_path):
+                # left behind by a crashed compaction; its records were replayed
+                # into the records above, so folding them into this snapshot is enough
+                os.remove(self.compacting_path)
+            if os.path.exists(self.journal_path):
+                # new mutations go to a fresh journal while we write the snapshot
+                os.replace(self.journal_path, self.compacting_path)
+            self.journal_records = 0
+            self._fingerprint = self._stat_fingerprint()
+            self._compaction = threading.Thread(
+                target=self._write_snapshot, args=(records, not wait), daemon=True
+            )
+            self._compaction.start()
+
+        if wait:
+            self.wait_for_compaction()
+        return True
+
+    def wait_for_compaction(self) -> None:
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+        error, self.compaction_error = self.compaction_error, None
+        if error is not None:
+            raise error
+
+    def _write_snapshot(self, records: list[dict], report: bool = False) -> None:
+        # on failure the .compacting journal stays, reads keep replaying it and the
+        # next compaction folds it in
+        tmp_path = self.filepath + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                os.replace(tmp_path, self.filepath)  # atomic swap of the snapshot
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+                self._fingerprint = self._stat_fingerprint()
+                self.compactions += 1
+        except Exception as e:
+            self.compaction_error = e
+            if report:
+                raise  # nobody is waiting: let threading.excepthook report it
+
+
+def _replay(path: str, books: dict[str, Book]) -> int:
+    count = 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["op"] == "delete":
+                    books.pop(record["book_id"], None)
+                else:
+                    book = Book.from_dict(record["book"])
+                    books[book.book_id] = book
+                count += 1
+    except FileNotFoundError:
+        pass
+    return count
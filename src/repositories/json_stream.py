@@ -0,0 +1,43 @@
+import json
+import re
+from typing import Iterator
+
+# whitespace and array punctuation between records
+_SEPARATORS = re.compile(r"[\s,\[\]]*")
+
+
+def iter_json_records(path: str, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    # Yields the JSON objects in a file one at a time without loading the whole file.
+    # Works for both a JSON array of objects (pretty-printed or not) and
+    # newline-delimited JSON (one object per line).
+    # Memory use is bounded by chunk_size plus the size of a single record.
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos == len(buf):
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                buf = chunk
+                pos = 0
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # record is split across chunks, read more and try again
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+
+            yield record
+            pos = end
+            if pos > chunk_size:  # drop what we've already parsed
+                buf = buf[pos:]
+                pos = 0
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterator, TypeVar
+from src.domain.book import Book
+from src.repositories.book_repository import BookRepository
+from src.repositories.book_repository_protocol import BookLookup
+from src.repositories.file_lock import file_lock
+
+T = TypeVar("T")
+
+
+class StaleCatalogError(Exception):
+    # the catalog changed between reading it and writing it back
+    pass
+
+
+class LockedBookRepository(BookRepository):
+    # books.json shared by several processes.
+    # - Every write goes to a temp file that is fsynced and renamed over books.json,
+    #   so readers never see half a file, and bumps a version number kept in
+    #   books.json.version.
+    # - Reads take a shared fcntl lock on books.json.lock, writes an exclusive one.
+    # - Add, edit by name and delete are optimistic: the catalog is read and changed
+    #   without holding the write lock, and the write only goes through if the
+    #   version is still the one that was read. Otherwise the mutation is retried
+    #   on the fresh catalog (up to max_retries times, then StaleCatalogError).
+    # - update_book(s) save Book objects the caller read earlier, so retrying would
+    #   just write the stale copies again. They raise StaleCatalogError instead if
+    #   the catalog moved past expected_version (by default the version of this
+    #   repository's last read); the caller has to re-read and redo the change.
+    # - modify_books (checkout/checkin) holds the exclusive lock for its whole
+    #   read-modify-write instead, because its mutate callback must run only once.
+    # Threads sharing one instance each take the file lock on their own.
+    # The version is (write counter, stat fingerprint of books.json), so a rewrite
+    # that bypassed the lock still shows up as a change (and as a conflict).
+    # Whole-file rewrites (like cleanBooks) go through replace_catalog().
+    def __init__(self, filepath: str = "books.json", max_retries: int = 10):
+        super().__init__(filepath)
+        self.lock_path = filepath + ".lock"
+        self.version_path = filepath + ".version"
+        self.max_retries = max_retries
+        self.conflicts = 0
+        # per thread: whether it already holds the lock (nested call) and the
+        # version of its last load; other threads take the file lock themselves
+        self._local = threading.local()
+
+    @property
+    def version(self) -> Hashable:
+        return (self._read_version(), self._stat_fingerprint())
+
+    @property
+    def _seen_version(self) -> Hashable:
+        return getattr(self._local, "seen_version", None)
+
+    @_seen_version.setter
+    def _seen_version(self, version: Hashable) -> None:
+        self._local.seen_version = version
+
+    def replace_catalog(self, write: Callable[[str], T]) -> T:
+        # write(path) replaces books.json as a whole (e.g. the cleaner's output);
+        # it runs under the exclusive lock and the version moves on afterwards
+        with self._lock(exclusive=True):
+            result = write(self.filepath)
+            self.writes += 1
+            _replace_atomically(self.version_path, str(self._read_version() + 1))
+            self._seen_version = self.version
+            return result
+
+    @contextmanager
+    def _lock(self, exclusive: bool) -> Iterator[None]:
+        if getattr(self._local, "locked", False):
+            yield
+            return
+        with file_lock(self.lock_path, exclusive):
+            self._local.locked = True
+            try:
+                yield
+            finally:
+                self._local.locked = False
+
+    def _read_version(self) -> int:
+        try:
+            with open(self.version_path, "r", encoding="utf-8") as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _load_books(self) -> list[Book]:
+        # books and version are read together, so they always match
+        with self._lock(exclusive=False):
+            self._seen_version = self.version
+            return super()._load_books()
+
+    def _write_books(self, books: list[Book]) -> None:
+        with self._lock(exclusive=True):
+            current = self.version
+            if current != self._seen_version:
+                raise StaleCatalogError(
+                    f"catalog is at version {current}, read {self._seen_version}"
+                )
+            self.writes += 1
+            _replace_atomically(
+                self.filepath, json.dumps([b.to_dict() for b in books], indent=2)
+            )
+            _replace_atomically(self.version_path, str(current[0] + 1))
+            self._seen_version = self.version
+
+    def _retrying(self, mutation: Callable, *args):
+        for _ in range(self.max_retries):
+            try:
+                return mutation(*args)
+            except StaleCatalogError:
+                self.conflicts += 1  # someone else wrote first, redo on fresh data
+        raise StaleCatalogError(f"gave up after {self.max_retries} conflicts")
+
+    def _unless_stale(self, expected_version: Hashable, mutation: Callable, *args):
+        if expected_version is None:
+            expected_version = self._seen_version
+        with self._lock(exclusive=True):
+            current = self.version
+            if expected_version is not None and current != expected_version:
+                self.conflicts += 1
+                raise StaleCatalogError(
+                    f"catalog is at version {current}, books were read at "
+                    f"{expected_version}"
+                )
+            return mutation(*args)
+
+    def add_book(self, book: Book) -> str:
+        return self._retrying(super().add_book, book)
+
+    def add_books(self, books: list[Book]) -> list[str]:
+        return self._retrying(super().add_books, books)
+
+    def edit_book_by_name(
+        self,
+        title: str,
+        author: str,
+        new_title: str | None = None,
+        new_author: str | None = None,
+    ) -> bool:
+        return self._retrying(
+            super().edit_book_by_name, title, author, new_title, new_author
+        )
+
+    def update_book(self, book: Book, expected_version: Hashable = None) -> bool:
+        return self._unless_stale(expected_version, super().update_book, book)
+
+    def update_books(
+        self, books: list[Book], expected_version: Hashable = None
+    ) -> list[bool]:
+        return self._unless_stale(expected_version, super().update_books, books)
+
+    def delete_book_by_name(self, title: str, author: str) -> bool:
+        return self._retrying(super().delete_book_by_name, title, author)
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        return self._retrying(super().delete_books_by_ids, book_ids)
+
+    def modify_books(
+        self, lookups: list[BookLookup], mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        with self._lock(exclusive=True):
+            return super().modify_books(lookups, mutate)
+
+
+def _replace_atomically(path: str, text: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,23 @@
+from src.domain.circulation import Circulation
+from src.repositories.circulation_repository import CirculationRepository
+from src.repositories.file_lock import file_lock
+
+
+class LockedCirculationRepository(CirculationRepository):
+    # circulation log shared by several processes: every batch is written and
+    # flushed while holding an exclusive fcntl lock on <log>.lock, so batches
+    # from different processes never interleave mid-line
+    def __init__(
+        self,
+        filepath: str = "checkout_logs.json",
+        buffer_size: int = 1,
+        flush_interval: float | None = None,
+        durability: str = "flush",
+    ):
+        super().__init__(filepath, buffer_size, flush_interval, durability)
+        self.lock_path = filepath + ".lock"
+
+    def _write_batch(self, batch: list[tuple[Circulation, bytes]]) -> None:
+        with file_lock(self.lock_path):
+            super()._write_batch(batch)
+            self._handle().flush()  # even with durability="none", before unlocking
@@ -0,0 +1,393 @@
+import gzip
+import heapq
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Iterator
+from src.domain.circulation import Circulation
+from src.repositories.circulation_repository import CirculationRepository, _from_line
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+# file extension -> how to open a sealed segment of that kind
+_OPENERS = {"": open, ".gz": gzip.open}
+if zstd is not None:
+    _OPENERS[".zst"] = zstd.open
+
+
+class SegmentedCirculationRepository(CirculationRepository):
+    # The log is split into numbered segments. New events go to the active file
+    # (filepath). Once it reaches max_bytes, or its first event is max_age seconds
+    # old, it is sealed as filepath.000001, .000002, ... and compressed (zstd when
+    # the interpreter has it, gzip otherwise).
+    # Reads stream every segment, decompressing on the fly, and merge them in
+    # timestamp order, so nothing is loaded into memory in full. The files are
+    # all opened under the lock, so a rotation during the read can't hide events.
+    # <log>.segments keeps each sealed segment's first and last timestamp, so
+    # get_logs_between only opens the segments that overlap the range, and
+    # whether its events were written in timestamp order. A segment that wasn't
+    # (a late event logged with an older timestamp) is read in full and sorted in
+    # memory, the ordered ones are streamed.
+    # Retention: only the newest keep_segments sealed segments (and only those
+    # younger than keep_days) stay as they are. Older ones are deleted with
+    # retention="drop", or folded into one archive segment with retention="merge":
+    # while the order holds the new segments' compressed data is appended to the
+    # archive as is (gzip members / zstd frames), otherwise it is rewritten.
+    def __init__(
+        self,
+        filepath: str = "checkout_logs.json",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: float | None = None,
+        compression: str | None = None,
+        keep_segments: int | None = None,
+        keep_days: float | None = None,
+        retention: str = "drop",
+        buffer_size: int = 1,
+        flush_interval: float | None = None,
+        durability: str = "flush",
+    ):
+        super().__init__(filepath, buffer_size, flush_interval, durability)
+        compression = compression or ("zstd" if zstd is not None else "gzip")
+        if compression not in ("gzip", "zstd") or (
+            compression == "zstd" and zstd is None
+        ):
+            raise ValueError(f"Unsupported compression: {compression}")
+        if retention not in ("drop", "merge"):
+            raise ValueError("retention must be 'drop' or 'merge'")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.extension = ".zst" if compression == "zstd" else ".gz"
+        self.keep_segments = keep_segments
+        self.keep_days = keep_days
+        self.retention = retention
+        self.rotations = 0
+        self._segment_name = re.compile(
+            re.escape(os.path.basename(filepath)) + r"\.(\d{6})(\.gz|\.zst)?$"
+        )
+        self.ranges_path = filepath + ".segments"
+        # an append to the archive in progress, see _append_to_archive
+        self.merging_path = filepath + ".merging"
+        self._ranges = self._load_ranges()
+        # first event of the active segment (for max_age), its earliest and latest
+        # event and whether they came in order, as far as this instance wrote it
+        # (an active file left from before is read as unordered, and gets its range
+        # scanned on the first query after it is sealed)
+        self._active_started = self._first_timestamp(filepath)
+        self._active_range: tuple[datetime, datetime] | None = None
+        self._active_ordered = True
+        self._range_known = self._active_started is None
+        # finish what a crash may have left behind: an append to the archive, or
+        # segments sealed but not yet compressed
+        self._finish_append()
+        for _, path in self.segments():
+            if not path.endswith((".gz", ".zst")):
+                self._compress(path)
+
+    def segments(self) -> list[tuple[int, str]]:
+        # sealed segments as (number, path), oldest first
+        directory = os.path.dirname(self.filepath) or "."
+        found = []
+        for name in os.listdir(directory):
+            match = self._segment_name.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(directory, name)))
+        return sorted(found)
+
+    def rotate(self) -> None:
+        # seal the active segment now, whatever its size
+        with self._lock:
+            self.flush()
+            self._seal()
+
+    def iter_logs(self) -> Iterator[Circulation]:
+        return self._merged(self._open_segments())
+
+    # events with start <= timestamp < end, reading stops at the first later event
+    # (every stream from _open_segments is in timestamp order)
+    def get_logs_between(self, start: datetime, end: datetime) -> list[Circulation]:
+        logs = []
+        for log in self._merged(self._open_segments(start, end)):
+            if log.timestamp >= end:
+                break
+            if log.timestamp >= start:
+                logs.append(log)
+        return logs
+
+    def _open_segments(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> list[Iterator[Circulation]]:
+        # every segment overlapping [start, end), opened while holding the lock:
+        # an open file stays readable even if it is sealed, merged or dropped next
+        with self._lock:
+            self._flush_for_read()
+            opened = []
+            for _, path in self.segments():
+                first, last, ordered = self._segment_range(path)
+                if start is not None and (last < start or first >= end):
+                    continue
+                opened.append(_in_order(_read_lines(path), ordered, start, end))
+            active_ordered = self._range_known and self._active_ordered
+            opened.append(
+                _in_order(_read_lines(self.filepath), active_ordered, start, end)
+            )
+            return opened
+
+    def _merged(self, segments: list[Iterator[Circulation]]) -> Iterator[Circulation]:
+        return heapq.merge(*segments, key=attrgetter("timestamp"))
+
+    def _after_batch(self, batch: list[tuple[Circulation, bytes]]) -> None:
+        # rotate once the batch is in: a failed seal must not get it written again
+        super()._after_batch(batch)
+        if self._active_started is None:
+            self._active_started = batch[0][0].timestamp
+        times = [c.timestamp for c, _ in batch]
+        self._active_ordered &= all(a <= b for a, b in zip(times, times[1:]))
+        if self._active_range is not None:
+            self._active_ordered &= times[0] >= self._active_range[1]
+            times += self._active_range
+        self._active_range = (min(times), max(times))
+        too_big = self._handle().tell() >= self.max_bytes
+        too_old = self.max_age is not None and (
+            datetime.now() - self._active_started >= timedelta(seconds=self.max_age)
+        )
+        if too_big or too_old:
+            self._seal()
+
+    def _seal(self) -> None:
+        self._close_file()
+        try:
+            if os.path.getsize(self.filepath) == 0:
+                return
+        except FileNotFoundError:
+            return
+        numbers = [n for n, _ in self.segments()]
+        sealed = f"{self.filepath}.{(max(numbers) if numbers else 0) + 1:06d}"
+        os.replace(self.filepath, sealed)
+        active_range = None
+        if self._range_known:
+            active_range = (*self._active_range, self._active_ordered)
+        self._active_started = None
+        self._active_range = None
+        self._active_ordered = True
+        self._range_known = True
+        self.rotations += 1
+        compressed = self._compress(sealed)
+        if active_range is not None:
+            self._set_range(compressed, active_range)
+        self._apply_retention()
+        self._save_ranges()
+
+    def _compress(self, path: str) -> str:
+        target = path + self.extension
+        tmp_path = target + ".tmp"
+        with open(path, "rb") as src, _OPENERS[self.extension](tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, target)
+        os.remove(path)
+        return target
+
+    def _apply_retention(self) -> None:
+        sealed = self.segments()
+        old = []
+        if self.keep_segments is not None:
+            old = sealed[: max(len(sealed) - self.keep_segments, 0)]
+        if self.keep_days is not None:
+            cutoff = time.time() - self.keep_days * 86400
+            old += [s for s in sealed if os.path.getmtime(s[1]) < cutoff]
+        if not old:
+            return
+        # everything up to the newest old segment counts as old (incl. the archive)
+        last_old = max(n for n, _ in old)
+        old = [s for s in sealed if s[0] <= last_old]
+        if self.retention == "drop":
+            for _, path in old:
+                os.remove(path)
+        elif len(old) > 1:
+            self._merge(old)
+
+    def _merge(self, old: list[tuple[int, str]]) -> None:
+        # fold old segments into one archive that keeps the oldest number
+        (number, first_path), rest = old[0], old[1:]
+        ranges = [self._segment_range(path) for _, path in old]
+        merged_range = (
+            min(r[0] for r in ranges),
+            max(r[1] for r in ranges),
+            True,
+        )
+        in_order = all(r[2] for r in ranges) and all(
+            a[1] <= b[0] for a, b in zip(ranges, ranges[1:])
+        )
+        if in_order and all(_extension(p) == self.extension for _, p in old):
+            # only the newly old segments are copied, the archive isn't read
+            self._append_to_archive(first_path, [path for _, path in rest])
+            self._set_range(first_path, merged_range)
+            return
+
+        target = f"{self.filepath}.{number:06d}{self.extension}"
+        tmp_path = target + ".tmp"
+        merged = heapq.merge(
+            *(
+                _lines_in_order(_read_lines(path), r[2])
+                for (_, path), r in zip(old, ranges)
+            ),
+            key=_line_timestamp,
+        )
+        with _OPENERS[self.extension](tmp_path, "wb") as dst:
+            for line in merged:
+                dst.write(line)
+        os.replace(tmp_path, target)
+        for _, path in old:
+            if path != target:
+                os.remove(path)
+        self._set_range(target, merged_range)
+
+    def _append_to_archive(self, archive: str, paths: list[str]) -> None:
+        # the marker records the archive's size first: after a crash,
+        # _finish_append cuts a half-done append off again
+        marker = {
+            "archive": os.path.basename(archive),
+            "size": os.path.getsize(archive),
+            "sources": [os.path.basename(path) for path in paths],
+        }
+        _write_json(self.merging_path, marker)
+        with open(archive, "ab") as dst:
+            for path in paths:
+                with open(path, "rb") as src:
+                    shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        for path in paths:
+            os.remove(path)
+        os.remove(self.merging_path)
+
+    def _finish_append(self) -> None:
+        try:
+            with open(self.merging_path, "r", encoding="utf-8") as f:
+                marker = json.load(f)
+        except FileNotFoundError:
+            return
+        directory = os.path.dirname(self.filepath) or "."
+        sources = [os.path.join(directory, name) for name in marker["sources"]]
+        if all(os.path.exists(path) for path in sources):
+            # the sources are all still there: drop whatever got appended
+            os.truncate(os.path.join(directory, marker["archive"]), marker["size"])
+        else:
+            # the append was complete, only removing the sources was cut short
+            for path in sources:
+                if os.path.exists(path):
+                    os.remove(path)
+        os.remove(self.merging_path)
+
+    def _load_ranges(self) -> dict[str, list]:
+        try:
+            with open(self.ranges_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_ranges(self) -> None:
+        names = {os.path.basename(path) for _, path in self.segments()}
+        self._ranges = {k: v for k, v in self._ranges.items() if k in names}
+        _write_json(self.ranges_path, self._ranges)
+
+    def _set_range(
+        self, path: str, time_range: tuple[datetime, datetime, bool]
+    ) -> None:
+        # the size tells a stale entry (say, for a reused segment number) apart
+        first, last, ordered = time_range
+        self._ranges[os.path.basename(path)] = [
+            first.isoformat(),
+            last.isoformat(),
+            os.path.getsize(path),
+            ordered,
+        ]
+
+    def _segment_range(self, path: str) -> tuple[datetime, datetime, bool]:
+        # (first, last, written in timestamp order)
+        entry = self._ranges.get(os.path.basename(path))
+        # (entries without the order flag are from an older version: rescanned)
+        if entry and len(entry) == 4 and entry[2] == os.path.getsize(path):
+            first, last, _, ordered = entry
+            return datetime.fromisoformat(first), datetime.fromisoformat(last), ordered
+        # not recorded (older log, or a crash before saving): scan it once
+        time_range = _time_range(path) or (datetime.max, datetime.min, True)
+        self._set_range(path, time_range)
+        self._save_ranges()
+        return time_range
+
+    def _first_timestamp(self, path: str) -> datetime | None:
+        for log in _read_segment(path):
+            return log.timestamp
+        return None
+
+
+def _extension(path: str) -> str:
+    return os.path.splitext(path)[1] if path.endswith((".gz", ".zst")) else ""
+
+
+def _read_lines(path: str) -> Iterator[bytes]:
+    # opens the file right away, lines are read lazily
+    try:
+        f = _OPENERS[_extension(path)](path, "rb")
+    except FileNotFoundError:
+        return iter(())
+    return _lines(f)
+
+
+def _lines(f) -> Iterator[bytes]:
+    with f:
+        for line in f:
+            if line.strip():
+                yield line if line.endswith(b"\n") else line + b"\n"
+
+
+def _read_segment(path: str) -> Iterator[Circulation]:
+    return (_from_line(line) for line in _read_lines(path))
+
+
+def _in_order(
+    lines: Iterator[bytes],
+    ordered: bool,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Iterator[Circulation]:
+    # a segment's events in timestamp order; one written out of order is read to
+    # the end (no stopping early), filtered to [start, end) and sorted
+    logs = (_from_line(line) for line in lines)
+    if not ordered:
+        if start is not None:
+            logs = (log for log in logs if start <= log.timestamp < end)
+        logs = sorted(logs, key=attrgetter("timestamp"))
+    yield from logs
+
+
+def _lines_in_order(lines: Iterator[bytes], ordered: bool) -> Iterator[bytes]:
+    yield from lines if ordered else sorted(lines, key=_line_timestamp)
+
+
+def _line_timestamp(line: bytes) -> datetime:
+    return _from_line(line).timestamp
+
+
+def _time_range(path: str) -> tuple[datetime, datetime, bool] | None:
+    # earliest and latest timestamp in a segment and whether they're in order,
+    # None if it is empty
+    times = [log.timestamp for log in _read_segment(path)]
+    if not times:
+        return None
+    ordered = all(a <= b for a, b in zip(times, times[1:]))
+    return min(times), max(times), ordered
+
+
+def _write_json(path: str, data) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
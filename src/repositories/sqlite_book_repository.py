@@ -0,0 +1,226 @@
+import json
+import sqlite3
+from typing import Callable, Hashable, Iterator
+from src.domain.book import Book
+from src.repositories.book_repository_protocol import BookLookup, BookRepositoryProtocol
+
+# column order matches Book.to_dict()
+_COLUMNS = [
+    "book_id",
+    "title",
+    "author",
+    "genre",
+    "publication_year",
+    "page_count",
+    "average_rating",
+    "ratings_count",
+    "price_usd",
+    "publisher",
+    "language",
+    "format",
+    "in_print",
+    "sales_millions",
+    "last_checkout",
+    "available",
+]
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM books"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- keeps insertion (catalog) order
+    book_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    genre TEXT,
+    publication_year INTEGER,
+    page_count INTEGER,
+    average_rating REAL,
+    ratings_count INTEGER,
+    price_usd REAL,
+    publisher TEXT,
+    language TEXT,
+    format TEXT,
+    in_print INTEGER,
+    sales_millions REAL,
+    last_checkout TEXT,
+    available INTEGER DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_books_title_author ON books (title, author);
+CREATE INDEX IF NOT EXISTS idx_books_author ON books (author);
+CREATE INDEX IF NOT EXISTS idx_books_genre ON books (genre);
+CREATE INDEX IF NOT EXISTS idx_books_publication_year ON books (publication_year);
+"""
+
+
+class SqliteBookRepository(BookRepositoryProtocol):
+    # Stores each Book as a row, so a write touches one row instead of the whole catalog.
+    # book_id is UNIQUE (indexed), title lookups use the (title, author) index.
+    def __init__(self, filepath: str = "books.db"):
+        self.filepath = filepath
+        self._conn = sqlite3.connect(filepath)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL
+        self._conn.executescript(_SCHEMA)
+
+    @property
+    def version(self) -> Hashable:
+        # data_version moves when another connection commits, total_changes when we do
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, self._conn.total_changes)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def migrate_from_json(self, json_path: str = "books.json") -> int:
+        # one-shot import of books.json, skipped if the table already has data
+        if self._conn.execute("SELECT 1 FROM books LIMIT 1").fetchone():
+            return 0
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = [Book.from_dict(item).to_row() for item in data]
+        with self._conn:  # one transaction for the whole import
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def get_all_books(self) -> list[Book]:
+        rows = self._conn.execute(f"{_SELECT} ORDER BY seq")
+        return [_from_row(row) for row in rows]
+
+    def iter_books(self, raw: bool = False) -> Iterator[Book] | Iterator[dict]:
+        # sqlite cursors fetch rows lazily, so this streams without a full list
+        cursor = self._conn.execute(f"{_SELECT} ORDER BY seq")
+        books = (_from_row(row) for row in cursor)
+        if raw:
+            return (b.to_dict() for b in books)
+        return books
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        row = self._conn.execute(f"{_SELECT} WHERE book_id = ?", (book_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    def add_book(self, book: Book) -> str:
+        with self._conn:
+            self._conn.execute(_INSERT, book.to_row())
+        return book.book_id
+
+    def add_books(self, books: list[Book]) -> list[str]:
+        with self._conn:  # one transaction for the batch
+            self._conn.executemany(_INSERT, [b.to_row() for b in books])
+        return [b.book_id for b in books]
+
+    def find_book_by_name(self, query: str) -> list[Book]:
+        rows = self._conn.execute(f"{_SELECT} WHERE title = ? ORDER BY seq", (query,))
+        return [_from_row(row) for row in rows]
+
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        row = self._conn.execute(
+            f"{_SELECT} WHERE title = ? AND author = ? ORDER BY seq LIMIT 1",
+            (title, author),
+        ).fetchone()
+        return _from_row(row) if row else None
+
+    def edit_book_by_name(
+        self,
+        title: str,
+        author: str,
+        new_title: str | None = None,
+        new_author: str | None = None,
+    ) -> bool:
+        with self._conn:
+            cursor = self._conn.execute(
+                """
+                UPDATE books
+                SET title = COALESCE(?, title), author = COALESCE(?, author)
+                WHERE seq = (
+                    SELECT seq FROM books WHERE title = ? AND author = ?
+                    ORDER BY seq LIMIT 1
+                )
+                """,
+                (new_title, new_author, title, author),
+            )
+        return cursor.rowcount > 0
+
+    def update_book(self, book: Book) -> bool:
+        row = book.to_row()
+        with self._conn:
+            cursor = self._conn.execute(_UPDATE, row[1:] + (book.book_id,))
+        return cursor.rowcount > 0
+
+    def update_books(self, books: list[Book]) -> list[bool]:
+        results = []
+        with self._conn:
+            for book in books:
+                row = book.to_row()
+                cursor = self._conn.execute(_UPDATE, row[1:] + (book.book_id,))
+                results.append(cursor.rowcount > 0)
+        return results
+
+    def modify_books(
+        self, lookups: list[BookLookup], mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        results = []
+        with self._conn:
+            # take the write lock up front so nobody changes the rows between
+            # our reads and our updates
+            self._conn.execute("BEGIN IMMEDIATE")
+            changed: dict[str, Book] = {}
+            for key in lookups:
+                if isinstance(key, str):
+                    book = changed.get(key) or self.get_by_id(key)
+                else:
+                    book = self.find_by_title_author(*key)
+                    book = changed.get(book.book_id, book) if book else None
+                if book is None:
+                    results.append(None)
+                    continue
+                ok = bool(mutate(book))
+                if ok:
+                    changed[book.book_id] = book
+                results.append(ok)
+            self._conn.executemany(
+                _UPDATE,
+                [b.to_row()[1:] + (b.book_id,) for b in changed.values()],
+            )
+        return results
+
+    def delete_book_by_name(self, title: str, author: str) -> bool:
+        with self._conn:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM books WHERE seq = (
+                    SELECT seq FROM books WHERE title = ? AND author = ?
+                    ORDER BY seq LIMIT 1
+                )
+                """,
+                (title, author),
+            )
+        return cursor.rowcount > 0
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        results = []
+        with self._conn:
+            for book_id in book_ids:
+                cursor = self._conn.execute(
+                    "DELETE FROM books WHERE book_id = ?", (book_id,)
+                )
+                results.append(cursor.rowcount > 0)
+        return results
+
+
+_INSERT = (
+    f"INSERT INTO books ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+_UPDATE = (
+    f"UPDATE books SET {', '.join(f'{c} = ?' for c in _COLUMNS[1:])} "
+    "WHERE book_id = ?"
+)
+
+
+def _from_row(row: tuple) -> Book:
+    data = dict(zip(_COLUMNS, row))
+    # sqlite has no bool type, they come back as 0/1
+    for column in ("in_print", "available"):
+        if data[column] is not None:
+            data[column] = bool(data[column])
+    return Book.from_dict(data)
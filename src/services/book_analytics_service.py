@@ -1,90 +1,140 @@
+import heapq
+import math
+from typing import Iterable
 import numpy as np
 import pandas as pd
 from src.domain.book import Book
+from src.services.book_frame import BookFrame
 
 # Ground rules for numpy:
 # 1. keep numpy in the service layer ONLY
 #   -if you see numpy imports anywhere else, this is a design smell!
 # 2. notice how methods take in books, and return normal datatypes NOT ndarrays
 # 3. This service and numpy are isolated, this will keep out functions pure and tests clean
+# 4. every method also accepts a BookFrame (columnar snapshot) instead of a list of books,
+#   pass the same frame to several reports and nobody walks the Book objects again
 
 
 class BookAnalyticsService:
 
-    def average_price(self, books: list[Book]) -> float:
-        prices = np.array(
-            [b.price_usd for b in books], dtype=float
-        )  # dtype specifies datatype (numpy)
+    def average_price(self, books: Iterable[Book] | BookFrame) -> float:
+        prices = _prices(books)
         return float(prices.mean())
 
-    def top_rated(self, books: list[Book], min_ratings: int = 1000, limit: int = 10):
-        ratings = np.array(
-            [b.average_rating for b in books]
-        )  # array for all avg ratings for all books
-        counts = np.array([b.ratings_count for b in books])
+    def top_rated(
+        self, books: list[Book] | BookFrame, min_ratings: int = 1000, limit: int = 10
+    ):
+        frame = _as_frame(books)
+        ratings = frame.rating  # array for all avg ratings for all books
+        counts = frame.ratings_count
 
         # what we have now:
-        # books -> book objects
+        # frame.books -> book objects
         # ratings -> numbers for All books
         # counts -> numbers for ALL books
 
-        # filtered books contain all books that have at least 1000 ratings
-        mask = counts >= min_ratings
-        filteredBooks = np.array(books)[mask]
+        # positions of all books that have at least 1000 ratings
+        filtered_idx = np.flatnonzero(counts >= min_ratings)
         # now scores is only the ratings for the filtered books. i.e. over 1000 ratings
-        scores = ratings[mask]  # ratings for filtered books
-        sorted_idx = np.argsort(-scores)  # sort descending (highest rating first)
-        return filteredBooks[sorted_idx].tolist()[:limit]  # top rated books
+        scores = ratings[filtered_idx]  # ratings for filtered books
+        # highest rating first, only the top `limit` get sorted (ties keep catalog order)
+        top_idx = filtered_idx[_top_k_indices(scores, limit)]
+        return [frame.books[i] for i in top_idx]  # top rated books
+
+    def top_rated_stream(
+        self, books: Iterable[Book], min_ratings: int = 1000, limit: int = 10
+    ) -> list[Book]:
+        # same result as top_rated, but for any iterator (e.g. iter_books()):
+        # keeps a heap of `limit` books instead of building arrays
+        # (a missing rating counts as NaN and ranks last, like in the frame)
+        return _top_k_stream(
+            (
+                (math.nan if b.average_rating is None else b.average_rating, b)
+                for b in books
+                if b.ratings_count is not None and b.ratings_count >= min_ratings
+            ),
+            limit,
+        )
 
     # value score = rating * log(ratings_count) / price
-    def value_scores(self, books: list[Book]) -> dict[str, float]:
-        ratings = np.array(
-            [b.average_rating for b in books]
-        )  # array for all avg ratings for all books
-        counts = np.array([b.ratings_count for b in books])
-        prices = np.array([b.price_usd for b in books])  # array for price of each book
-
-        scores = (ratings * np.log1p(counts)) / prices
-
-        return {  # dictionary comprehension cause list wasn't enough to learn T-T
-            book.book_id: float(score)  # output
-            for book, score in zip(books, scores)
-            # zip() iterates through both lists in parallel
-            # paring each book with its corresponding score
-            # zip() will stop automatically if one list is shorter
-            # - if the same key appears mroe than once, later entries overwrites earlier ones
+    def value_scores(
+        self,
+        books: list[Book] | BookFrame,
+        limit: int | None = None,
+        ranked: bool = False,
+    ) -> dict[str, float]:
+        # default: every book in catalog order
+        # ranked=True: every book, best score first
+        # limit=n: only the n best scores, best first
+        frame = _as_frame(books)
+        scores = (frame.rating * np.log1p(frame.ratings_count)) / frame.price
+
+        if limit is None and not ranked:
+            return dict(
+                zip(frame.book_ids, scores.tolist())
+                # zip() iterates through both lists in parallel
+                # paring each book with its corresponding score
+                # zip() will stop automatically if one list is shorter
+                # - if the same key appears mroe than once, later entries overwrites earlier ones
+            )
+
+        top_idx = _top_k_indices(scores, len(scores) if limit is None else limit)
+        return {frame.book_ids[i]: float(scores[i]) for i in top_idx}
+
+    def value_scores_stream(
+        self, books: Iterable[Book], limit: int = 10
+    ) -> dict[str, float]:
+        # value_scores(limit=...) for any iterator of books, bounded heap instead of arrays
+        # (books missing a rating, count or price score NaN and rank last)
+        def scored():
+            for b in books:
+                if None in (b.average_rating, b.ratings_count, b.price_usd):
+                    yield math.nan, b
+                    continue
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    score = float(
+                        np.float64(b.average_rating * math.log1p(b.ratings_count))
+                        / b.price_usd
+                    )
+                yield score, b
+
+        return {
+            b.book_id: score
+            for score, b in _top_k_stream(scored(), limit, with_keys=True)
         }
 
-    def median_price_by_genre(self, books: list[Book]) -> dict[str, float]:
-        # Create a dictionary to store books grouped by genre
-        genre_books = {}
+    def median_price_by_genre(self, books: list[Book] | BookFrame) -> dict[str, float]:
+        # books are already encoded as genre codes in the frame
+        frame = _as_frame(books)
 
-        for book in books:
-            if book.genre not in genre_books:
-                genre_books[book.genre] = []
-            genre_books[book.genre].append(book)
+        # skip missing prices
+        has_price = ~np.isnan(frame.price)
+        codes = frame.genre_codes[has_price]
+        prices = frame.price[has_price]
 
-        # Compute median price for each genre
-        result = {}
+        # one sort puts every genre in a contiguous run, with prices ascending inside it
+        order = np.lexsort((prices, codes))  # last key (codes) is the primary key
+        codes = codes[order]
+        prices = prices[order]
 
-        for genre, books_in_genre in genre_books.items():
-            # Extract prices for this genre into a numpy array, skipping missing values
-            prices = np.array(
-                [b.price_usd for b in books_in_genre if b.price_usd is not None],
-                dtype=float,
-            )
-            if prices.size == 0:
-                continue
-            median_price = float(np.median(prices))
-            result[genre] = median_price
-            # np.median() handles all edge cases:
-            # - Single element: returns that element
-            # - Even number of elements: returns average of two middle values
-            # - Odd number of elements: returns middle value
-        return result
-
-    def price_std_dev(self, books: list[Book]) -> float:
-        prices = np.array([b.price_usd for b in books], dtype=float)
+        # where each genre's run starts and how long it is
+        genre_codes, starts, counts = np.unique(
+            codes, return_index=True, return_counts=True
+        )
+        # same as np.median() per run:
+        # - Odd number of elements: lo == hi, the middle value
+        # - Even number of elements: average of the two middle values
+        lo = starts + (counts - 1) // 2
+        hi = starts + counts // 2
+        medians = (prices[lo] + prices[hi]) / 2
+
+        return {
+            frame.genres[code]: median
+            for code, median in zip(genre_codes.tolist(), medians.tolist())
+        }
+
+    def price_std_dev(self, books: Iterable[Book] | BookFrame) -> float:
+        prices = _prices(books)
         return float(np.std(prices))
         # np.std() computes standard deviation
         # ddof=0 = population std dev
@@ -92,30 +142,26 @@ class BookAnalyticsService:
         # (ddof=0) on default
 
     def top_rated_with_pandas(
-        self, books: list, min_ratings: int = 1000, limit: int = 10
+        self, books: list | BookFrame, min_ratings: int = 1000, limit: int = 10
     ) -> list:
-        df = pd.DataFrame(
-            [
-                {"book": b, "avg": b.average_rating, "count": b.ratings_count}
-                for b in books
-            ]
+        frame = _as_frame(books)
+        df = pd.DataFrame({"avg": frame.rating, "count": frame.ratings_count})
+        filtered = df[df["count"] >= min_ratings].sort_values(
+            "avg", ascending=False, kind="stable"
         )
-        filtered = df[df["count"] >= min_ratings].sort_values("avg", ascending=False)
-        return filtered["book"].tolist()[:limit]
+        return [frame.books[i] for i in filtered.index[:limit]]
 
     def value_scores_with_pandas(
-        self, books: list, limit: int = 10
+        self, books: list | BookFrame, limit: int = 10
     ) -> dict[str, float]:
+        frame = _as_frame(books)
         df = pd.DataFrame(
-            [
-                {
-                    "book_id": b.book_id,
-                    "avg": b.average_rating,
-                    "count": b.ratings_count,
-                    "price": b.price_usd,
-                }
-                for b in books
-            ]
+            {
+                "book_id": frame.book_ids,
+                "avg": frame.rating,
+                "count": frame.ratings_count,
+                "price": frame.price,
+            }
         )
         df["score"] = df["avg"] * np.log1p(df["count"]) / df["price"]
         # set_index() sets book_id as the index
@@ -124,40 +170,96 @@ class BookAnalyticsService:
         # sometimes numpy works with float64, but we need to return float,
         # hence the defensive use of .astype()
         return (
-            df.sort_values("score", ascending=False)
+            df.sort_values("score", ascending=False, kind="stable")
             .head(limit)
             .set_index("book_id")["score"]
             .astype(float)
             .to_dict()
         )
 
-    def most_popular_by_year(self, books: list[Book], year) -> dict[int, Book]:
-        df = pd.DataFrame(
-            [
-                {  # creating a dataframe populated with a books genre and last_checkout
-                    "book": b,
-                    "genre": b.genre,
-                    "last_checkout": b.last_checkout,
-                    "ratings_count": b.ratings_count,
-                }
-                for b in books  # for each book
-            ]
-        )
-        df["last_checkout"] = pd.to_datetime(
-            df["last_checkout"]
-        )  # normalizing the date format for pandas (access to .dt.year, .dt.month, etc)
-
-        df_year = df[
-            df["last_checkout"].dt.year == int(year)
-        ]  # pandas version of "if book.last_checkout.year == year:"
+    def most_popular_by_year(
+        self, books: list[Book] | BookFrame, year
+    ) -> dict[int, Book]:
+        # the frame parses every last_checkout once and keeps the best book per
+        # checkout year (highest ratings_count), so this is a dict lookup
+        frame = _as_frame(books)
+        row = frame.best_by_checkout_year().get(int(year))
 
-        if df_year.empty:  # if there are no books checked out that year
+        if row is None:  # if there are no books checked out that year
             return None  # return None allowed with Optional
 
-        # Find the book with the highest ratings_count among those checked out in the year
-        most_popular_book = df_year.sort_values("ratings_count", ascending=False).iloc[
-            0
-        ]["book"]
+        return {int(year): frame.books[row]}
+
+    def best_books_all_years(self, books: list[Book] | BookFrame) -> dict[int, Book]:
+        # most_popular_by_year for every year at once, oldest year first
+        frame = _as_frame(books)
+        return {
+            year: frame.books[row]
+            for year, row in sorted(frame.best_by_checkout_year().items())
+        }
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    # Positions of the k highest scores, highest first; equal scores keep their
+    # original order and NaN sorts last, i.e. the same as
+    # np.argsort(-scores, kind="stable")[:k] but without sorting everything:
+    # np.partition finds the k-th best value in O(n), only the winners get sorted.
+    n = scores.size
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    keys = np.where(np.isnan(scores), -np.inf, scores)
+    if k == n:
+        candidates = np.arange(n)
+    else:
+        kth = np.partition(keys, n - k)[n - k]  # k-th largest value
+        above = np.flatnonzero(keys > kth)
+        # argpartition would pick among books tied at the cut-off arbitrarily,
+        # take the earliest ones so results are stable (NaN is keyed as -inf,
+        # so a real -inf still goes before it)
+        ties = np.flatnonzero(keys == kth)
+        ties = ties[np.argsort(np.isnan(scores[ties]), kind="stable")]
+        ties = ties[: k - above.size]
+        candidates = np.concatenate([above, ties])
+    nan_last = np.isnan(scores[candidates])
+    order = np.lexsort((candidates, -keys[candidates], nan_last))
+    return candidates[order]
+
+
+def _top_k_stream(scored: Iterable[tuple[float, Book]], k: int, with_keys=False):
+    # Same order as _top_k_indices: highest score first, ties and NaN scores in
+    # their original order, NaN after everything else.
+    # Bounded min-heap of (rank, -position, score, book), rank being (0, 0) for
+    # NaN and (1, score) otherwise: the root is the current worst entry, so it is
+    # the one replaced.
+    if k <= 0:
+        return []
+    heap: list = []
+    for position, (score, book) in enumerate(scored):
+        rank = (0, 0.0) if math.isnan(score) else (1, score)
+        entry = (rank, -position, score, book)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    heap.sort(key=lambda e: e[:2], reverse=True)
+    if with_keys:
+        return [(score, book) for _, _, score, book in heap]
+    return [book for _, _, _, book in heap]
+
+
+def _as_frame(books: list[Book] | BookFrame) -> BookFrame:
+    if isinstance(books, BookFrame):
+        return books
+    return BookFrame.from_books(books)
 
-        return {int(year): most_popular_book}
 
+def _prices(books: Iterable[Book] | BookFrame) -> np.ndarray:
+    if isinstance(books, BookFrame):
+        return books.price
+    # np.fromiter pulls one book at a time, so a generator from iter_books()
+    # never has to be materialized as a list of Book objects
+    # (missing prices become NaN, same as np.array(..., dtype=float))
+    return np.fromiter(
+        (np.nan if b.price_usd is None else b.price_usd for b in books), dtype=float
+    )
@@ -0,0 +1,52 @@
+# Canonical spellings for the free-text category columns.
+# Keys are normalized with category_key(): lowercase, no spaces/hyphens/underscores/dots,
+# so "Audio Book", "audio-book" and "AudioBook" all look up "audiobook".
+# Values not listed here fall back to the old cleaning rule (strip + capitalize).
+CANONICAL_VALUES: dict[str, dict[str, str]] = {
+    "language": {
+        "english": "English",
+        "eng": "English",
+        "en": "English",
+        "french": "French",
+        "fre": "French",
+        "fr": "French",
+        "spanish": "Spanish",
+        "spa": "Spanish",
+        "es": "Spanish",
+        "german": "German",
+        "ger": "German",
+        "de": "German",
+    },
+    "format": {
+        "paperback": "Paperback",
+        "softcover": "Paperback",
+        "hardcover": "Hardcover",
+        "hardback": "Hardcover",
+        "audiobook": "Audiobook",
+        "ebook": "Ebook",
+    },
+    "genre": {},
+    "publisher": {},
+}
+
+CATEGORY_COLUMNS = list(CANONICAL_VALUES)
+
+_SEPARATORS = str.maketrans("", "", " -_.")
+
+
+def category_key(value: str) -> str:
+    return value.strip().lower().translate(_SEPARATORS)
+
+
+def known_value(column: str, value):
+    # canonical spelling if the mapping table knows this value, otherwise None
+    if not isinstance(value, str):
+        return None
+    return CANONICAL_VALUES[column].get(category_key(value))
+
+
+def canonicalize(column: str, value):
+    # cleaning rule for category columns: mapped spelling, else strip + capitalize
+    if not isinstance(value, str):
+        return None  # same as the old .str accessor: non-strings become missing
+    return known_value(column, value) or value.strip().capitalize()
@@ -2,6 +2,13 @@ import json
 from datetime import datetime
 from src.domain.circulation import Circulation
 from src.domain.book import Book
+from src.repositories.book_repository_protocol import BookLookup
+
+# per-request outcomes of checkout_books / checkin_books
+OK = "ok"
+NOT_FOUND = "not_found"
+ALREADY_CHECKED_OUT = "already_checked_out"
+ALREADY_CHECKED_IN = "already_checked_in"
 
 
 class BookCirculationService:
@@ -21,53 +28,72 @@ class BookCirculationService:
         self.filepath = filepath
 
     def checkout_book(self, title: str, author: str) -> bool:
-        books = self.book_repository.get_all_books()
-        for book in books:
-            if book.title == title and book.author == author:
-                if not book.available:
-                    return False
-                book.available = False
-                book.last_checkout = datetime.now().isoformat()
-                self.book_repository.update_book(book)
-
-                # log the checkout
-                circulation = Circulation(
-                    book_id=book.book_id,
-                    title=book.title,
-                    author=book.author,
-                    action="checkout",
-                    timestamp=datetime.now(),
-                )
-                self.circulation_repository.log_circulation(circulation)
-                return True
-        return False  # book not found
+        return self.checkout_books([(title, author)])[0] == OK
 
     def checkin_book(self, title: str, author: str) -> bool:
-        books = self.book_repository.get_all_books()  # load all books
-
-        # find the book we're checking in
-        for book in books:
-            if book.title == title and book.author == author:
-                if book.available is True:  # already checked in
-                    return False
-                book.available = True
-                book.last_checkout = None
-
-                # save updated books using repository
-                self.book_repository.update_book(book)
-
-                # log the checkin
-                circulation = Circulation(
-                    book_id=book.book_id,
-                    title=book.title,
-                    author=book.author,
-                    action="checkin",
-                    timestamp=datetime.now(),
-                )
-                self.circulation_repository.log_circulation(circulation)
-
-                return True
-        return False  # book not found
+        return self.checkin_books([(title, author)])[0] == OK
+
+    # Each request is a book_id or a (title, author) pair. All of them are applied
+    # with one repository write and logged as one batch.
+    # Returns one outcome per request: OK, NOT_FOUND or ALREADY_CHECKED_OUT.
+    def checkout_books(self, requests: list[BookLookup]) -> list[str]:
+        now = datetime.now()  # one timestamp for the book and its log entry
+
+        def checkout(book: Book) -> bool:
+            if not book.available:
+                return False
+            book.available = False
+            book.last_checkout = now.isoformat()
+            return True
+
+        return self._circulate(requests, checkout, "checkout", ALREADY_CHECKED_OUT, now)
+
+    # Same as checkout_books(); outcomes are OK, NOT_FOUND or ALREADY_CHECKED_IN.
+    def checkin_books(self, requests: list[BookLookup]) -> list[str]:
+        now = datetime.now()
+
+        def checkin(book: Book) -> bool:
+            if book.available is True:  # already checked in
+                return False
+            book.available = True
+            book.last_checkout = None
+            return True
+
+        return self._circulate(requests, checkin, "checkin", ALREADY_CHECKED_IN, now)
+
+    def _circulate(self, requests, mutate, action, refused, now) -> list[str]:
+        changed: list[Book] = []
+
+        def apply(book: Book) -> bool:
+            ok = mutate(book)
+            if ok:
+                changed.append(book)
+            return ok
+
+        results = self.book_repository.modify_books(requests, apply)
+        if changed:
+            self.circulation_repository.log_circulations(
+                [
+                    Circulation(
+                        book_id=book.book_id,
+                        title=book.title,
+                        author=book.author,
+                        action=action,
+                        timestamp=now,
+                    )
+                    for book in changed
+                ]
+            )
+        return [NOT_FOUND if r is None else OK if r else refused for r in results]
 
     def get_all_circulation_logs(self) -> list[Circulation]:
         return self.circulation_repository.get_all_logs()
+
+    def get_circulation_logs_for_book(self, book_id: str) -> list[Circulation]:
+        return self.circulation_repository.get_logs_for_book(book_id)
+
+    # events with start <= timestamp < end
+    def get_circulation_logs_between(
+        self, start: datetime, end: datetime
+    ) -> list[Circulation]:
+        return self.circulation_repository.get_logs_between(start, end)
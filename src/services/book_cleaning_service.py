@@ -1,7 +1,23 @@
 """Service for cleaning book data."""
 
+import hashlib
+import json
+import math
+import os
+import secrets
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
 import pandas as pd
 import numpy as np
+from src.domain.book import Book
+from src.repositories.json_stream import iter_json_records
+from src.services.book_categories import CATEGORY_COLUMNS, canonicalize
+from src.services.near_duplicates import find_near_duplicates
+
+# bump whenever the cleaning rules change, so old manifests aren't reused
+CLEANING_RULES_VERSION = 3
 
 
 class BookCleaningService:
@@ -12,12 +28,202 @@ class BookCleaningService:
     # Normalize dates in 'last_checkout'
     # Ensure genres, languages, formats, and publishers have proper capitalization
     # Find and remove duplicate books with the same title/author
+    # (and, unless near_duplicates=False, the ones that only differ by a typo,
+    # case, punctuation or accents, see merge_near_duplicates; the file paths
+    # only do this with near_duplicates=True)
 
     # Drop rows with empty fields
-    def clean(self, books: list[dict]) -> pd.DataFrame:
+    def clean(self, books: list[dict], near_duplicates: bool = True) -> pd.DataFrame:
         # Step 0: create the DataFrame
         df = pd.DataFrame(books)
+        return self._finalize(self._clean_rows(df), near_duplicates)
+
+    # Same output as clean(), but the per-row steps (1-5) run on chunks of rows in
+    # a process pool; the global steps (6-7) then run once on the merged result.
+    # Inputs that fit in one chunk are just cleaned serially.
+    def clean_parallel(
+        self,
+        books: list[dict],
+        workers: int | None = None,
+        chunk_size: int = 50_000,
+        near_duplicates: bool = True,
+    ) -> pd.DataFrame:
+        if len(books) <= chunk_size:
+            return self.clean(books, near_duplicates)
+
+        # build the frame once so every chunk starts from the same column dtypes
+        df = pd.DataFrame(books)
+        chunks = [df.iloc[i : i + chunk_size] for i in range(0, len(df), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            cleaned = list(pool.map(self._clean_rows, chunks))
+
+        # chunks keep their original row labels, so the merge lines up with clean()
+        return self._finalize(pd.concat(cleaned), near_duplicates)
+
+    # The near-duplicate stage of the pipeline (step 7b), also usable on its own:
+    # rows whose title and author only differ in case, punctuation, accents or a
+    # small typo are merged into the first one (the same keep-first rule as
+    # drop_duplicates). Thresholds are difflib similarity ratios.
+    # Returns the remaining rows and one report entry per merged cluster.
+    def merge_near_duplicates(
+        self,
+        df: pd.DataFrame,
+        title_threshold: float = 0.95,
+        author_threshold: float = 0.85,
+        window: int = 20,
+    ) -> tuple[pd.DataFrame, list[dict]]:
+        clusters = find_near_duplicates(
+            list(zip(df["title"], df["author"])),
+            title_threshold=title_threshold,
+            author_threshold=author_threshold,
+            window=window,
+        )
+        keep = np.ones(len(df), dtype=bool)
+        report = []
+        for kept, *merged in clusters:
+            keep[merged] = False
+            report.append(
+                {
+                    "kept": _row_ref(df, kept),
+                    "merged": [_row_ref(df, i) for i in merged],
+                }
+            )
+        return df[keep], report
+
+    # merge_near_duplicates' report for books already in the catalog, which are
+    # left alone
+    def report_near_duplicates(self, books: list[Book], **thresholds) -> list[dict]:
+        clusters = find_near_duplicates(
+            [(b.title, b.author) for b in books], **thresholds
+        )
+        return [
+            {
+                "kept": _book_ref(books[kept]),
+                "merged": [_book_ref(books[i]) for i in merged],
+            }
+            for kept, *merged in clusters
+        ]
+
+    # Constant-memory version of clean() for inputs too big to load:
+    # records are cleaned batch_size at a time with the same per-row rules (steps 1-5),
+    # then duplicates and rows without title/author are dropped on the fly (steps 6-7).
+    # Only the (title, author) keys seen so far are kept in memory.
+    # Yields plain dicts ready for json (NaN/NaT -> None, dates -> isoformat strings).
+    def clean_stream(
+        self, records: Iterable[dict], batch_size: int = 10_000
+    ) -> Iterator[dict]:
+        return self._drop_duplicates_stream(
+            self._clean_rows_stream(records, batch_size)
+        )
+
+    # Streams src_path (JSON array or NDJSON) through clean_stream() into dst_path,
+    # as a JSON array by default or NDJSON with ndjson=True. With
+    # near_duplicates=True it then merges near duplicates too (see _write_cleaned),
+    # which keeps every (title, author) key in memory, so it's opt-in here.
+    # Returns the rows written.
+    def clean_file(
+        self,
+        src_path: str = "books_dirty.json",
+        dst_path: str = "books.json",
+        ndjson: bool = False,
+        batch_size: int = 10_000,
+        near_duplicates: bool = False,
+    ) -> int:
+        cleaned = self.clean_stream(iter_json_records(src_path), batch_size)
+        written, _ = _write_cleaned(cleaned, dst_path, ndjson, near_duplicates)
+        return written
+
+    # Like clean_file(), but remembers the cleaned row for every input record, keyed
+    # by a hash of the record's content. On the next run only new or changed records
+    # go through the cleaning rules; the rest are reused, then everything is
+    # de-duplicated and written out again in input order.
+    # Memory stays bounded like clean_file(): the cleaned rows live in an NDJSON
+    # file next to the manifest, and the manifest only maps hash -> offset in it.
+    # Returns how many records were reused / recomputed, how many rows were written
+    # and how many of them near_duplicates=True merged away.
+    def clean_file_incremental(
+        self,
+        src_path: str = "books_dirty.json",
+        dst_path: str = "books.json",
+        manifest_path: str | None = None,
+        ndjson: bool = False,
+        batch_size: int = 10_000,
+        near_duplicates: bool = False,
+    ) -> dict[str, int]:
+        manifest_path = manifest_path or dst_path + ".manifest.json"
+        previous_rows, previous = _load_manifest(manifest_path)
+        # a new rows file per run, the manifest only switches to it once complete
+        rows_path = f"{manifest_path}.{secrets.token_hex(8)}.rows"
+        current: dict[str, int] = {}  # only what this input still contains
+        report = {"reused": 0, "recomputed": 0, "written": 0, "merged": 0}
+
+        def cleaned_rows(old_rows, new_rows) -> Iterator[dict]:
+            records = iter_json_records(src_path)
+            while batch := list(islice(records, batch_size)):
+                hashes = [_content_hash(record) for record in batch]
+                misses = {}  # digest -> record, each new record cleaned once
+                for record, digest in zip(batch, hashes):
+                    if digest not in previous and digest not in current:
+                        misses.setdefault(digest, record)
+                fresh = self._clean_rows_stream(list(misses.values()), batch_size)
+                fresh = dict(zip(misses, fresh))
+                for digest in hashes:
+                    if digest in fresh:
+                        row = fresh.pop(digest)
+                        report["recomputed"] += 1
+                    elif digest in current:  # seen earlier in this run
+                        new_rows.flush()
+                        row = _read_row(rows_path, current[digest])
+                        report["reused"] += 1
+                    else:  # from the last run
+                        row = _read_row(old_rows, previous[digest])
+                        report["reused"] += 1
+                    if digest not in current:
+                        current[digest] = new_rows.tell()
+                        new_rows.write(json.dumps(row).encode("utf-8") + b"\n")
+                    yield row
 
+        try:
+            with (
+                open(previous_rows, "rb") if previous else nullcontext() as old_rows,
+                open(rows_path, "wb") as new_rows,
+            ):
+                report["written"], report["merged"] = _write_cleaned(
+                    self._drop_duplicates_stream(cleaned_rows(old_rows, new_rows)),
+                    dst_path,
+                    ndjson,
+                    near_duplicates,
+                )
+        except BaseException:
+            _remove_quietly(rows_path)  # the manifest still points at the old one
+            raise
+        _save_manifest(manifest_path, rows_path, current)
+        if previous_rows is not None and previous_rows != rows_path:
+            _remove_quietly(previous_rows)
+        return report
+
+    def _clean_rows_stream(
+        self, records: Iterable[dict], batch_size: int
+    ) -> Iterator[dict]:
+        records = iter(records)
+        while batch := list(islice(records, batch_size)):
+            df = self._clean_rows(pd.DataFrame(batch))
+            for row in df.to_dict("records"):
+                yield {k: _to_json_value(v) for k, v in row.items()}
+
+    def _drop_duplicates_stream(self, rows: Iterable[dict]) -> Iterator[dict]:
+        # same result as drop_duplicates(subset=["title", "author"]) then dropna():
+        # a row missing its title or author is dropped either way
+        seen = set()
+        for row in rows:
+            key = (row.get("title"), row.get("author"))
+            if key[0] is None or key[1] is None or key in seen:
+                continue
+            seen.add(key)
+            yield row
+
+    # Steps 1-5 only look at one row at a time, so they can run on any slice of rows
+    def _clean_rows(self, df: pd.DataFrame) -> pd.DataFrame:
         # Step 1: normalize missing values
         df = df.replace(
             ["", "N/A", "Unknown"], np.nan
@@ -50,23 +256,33 @@ class BookCleaningService:
         )  # clamping pub year
         df["sales_millions"] = df["sales_millions"].clip(lower=0)  # cant have neg sales
 
+        # counts and years are whole numbers: pinned to nullable Int64, otherwise
+        # they'd be int64 or float64 depending on whether the batch has a NaN, and
+        # the same record would come out as 1999 in one batch and 1999.0 in another
+        for col in ["publication_year", "page_count", "ratings_count"]:
+            df[col] = df[col].round().astype("Int64")
+
         # Step 4: Normalize dates in 'last_checkout'
+        # format="ISO8601" parses each value on its own instead of guessing a format
+        # from the first row, and the fixed unit keeps a chunk with no valid dates
+        # at all from ending up with a different dtype
         df["last_checkout"] = pd.to_datetime(
-            df["last_checkout"], errors="coerce"
-        )  # converting to datetime, errors='coerce' turns invalids into NaT
-
-        # Step 5: capitalize categories
-        capital = [
-            "genre",
-            "language",
-            "format",
-            "publisher",
-        ]  # adding to list again to do it all in one go
-        for col in capital:
-            df[col] = (
-                df[col].str.strip().str.capitalize()
-            )  # remove whitespace and capitalize (online says capitalize() not title())
+            df["last_checkout"], errors="coerce", format="ISO8601"
+        ).dt.as_unit("us")
+        # converting to datetime, errors='coerce' turns invalids into NaT
+
+        # Step 5: canonical categories
+        # e.g. "english"/"Eng" -> "English", "Audio Book" -> "Audiobook",
+        # anything not in the mapping table is stripped and capitalized as before
+        for col in CATEGORY_COLUMNS:
+            # only the distinct values go through python, then one vectorized map
+            mapping = {v: canonicalize(col, v) for v in df[col].dropna().unique()}
+            df[col] = df[col].map(mapping)
 
+        return df
+
+    # Steps 6-8 need to see every row
+    def _finalize(self, df: pd.DataFrame, near_duplicates: bool = True) -> pd.DataFrame:
         # Step 6: remove duplicates
         df = df.drop_duplicates(
             subset=["title", "author"]
@@ -78,4 +294,134 @@ class BookCleaningService:
             subset=critical_columns
         )  # subset specifies which columns to check for NaN. dropna() drops those rows
 
+        # Step 7b: merge near duplicates (typos, case, punctuation, accents)
+        if near_duplicates:
+            df, _ = self.merge_near_duplicates(df)
+
+        # Step 8: store categories as pandas Categorical (small integer codes + one
+        # copy of each string), done here so every row's values are known
+        for col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+
         return df
+
+
+def _row_ref(df: pd.DataFrame, i: int) -> dict:
+    row = df.iloc[i]
+    return {
+        "book_id": row.get("book_id"),
+        "title": row["title"],
+        "author": row["author"],
+    }
+
+
+def _book_ref(book: Book) -> dict:
+    return {"book_id": book.book_id, "title": book.title, "author": book.author}
+
+
+def _to_json_value(value):
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def _write_cleaned(
+    rows: Iterable[dict], dst_path: str, ndjson: bool, near_duplicates: bool
+) -> tuple[int, int]:
+    # Writes rows next to dst_path and swaps the file in, so readers never see half
+    # a file. With near_duplicates the (title, author) keys are collected on the
+    # way (the rows themselves are not kept), and if some of them turn out to be
+    # near duplicates the written file is streamed once more without those rows.
+    # Returns (rows written, rows merged away).
+    tmp_path = dst_path + ".tmp"
+    keys = []
+
+    def keyed(rows):
+        for row in rows:
+            keys.append((row["title"], row["author"]))
+            yield row
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        count = _write_records(f, keyed(rows) if near_duplicates else rows, ndjson)
+
+    merged = {i for _, *rest in find_near_duplicates(keys) for i in rest}
+    if merged:
+        filtered_path = dst_path + ".merged.tmp"
+        records = iter_json_records(tmp_path)
+        with open(filtered_path, "w", encoding="utf-8") as f:
+            count = _write_records(
+                f, (r for i, r in enumerate(records) if i not in merged), ndjson
+            )
+        os.replace(filtered_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+    return count, len(merged)
+
+
+def _write_records(f, records: Iterable[dict], ndjson: bool) -> int:
+    # one record per line either way, so the array form is still easy to stream back
+    count = 0
+    if ndjson:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+        return count
+
+    f.write("[")
+    for record in records:
+        f.write(",\n" if count else "\n")
+        f.write(json.dumps(record))
+        count += 1
+    f.write("\n]\n")
+    return count
+
+
+def _content_hash(record: dict) -> str:
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _load_manifest(path: str) -> tuple[str | None, dict[str, int]]:
+    # (rows file, content hash -> offset of the cleaned row in it)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None, {}
+    if manifest.get("rules_version") != CLEANING_RULES_VERSION:
+        return None, {}  # cleaned with different rules, recompute everything
+    rows_path = os.path.join(os.path.dirname(path), manifest.get("rows_file", ""))
+    if "offsets" not in manifest or not os.path.isfile(rows_path):
+        return None, {}  # an older manifest format, or the rows file is gone
+    return rows_path, manifest["offsets"]
+
+
+def _save_manifest(path: str, rows_path: str, offsets: dict[str, int]) -> None:
+    manifest = {
+        "rules_version": CLEANING_RULES_VERSION,
+        "rows_file": os.path.basename(rows_path),
+        "offsets": offsets,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _read_row(f, offset: int) -> dict:
+    # one cleaned row from a rows file (an open binary file, or a path)
+    if isinstance(f, str):
+        with open(f, "rb") as opened:
+            return _read_row(opened, offset)
+    f.seek(offset)
+    return json.loads(f.readline())
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
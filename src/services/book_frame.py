@@ -0,0 +1,116 @@
+from operator import attrgetter
+from typing import Hashable, Iterable
+import numpy as np
+import pandas as pd
+from src.domain.book import Book
+from src.services.book_categories import known_value
+
+# checkout_epochs value for books that were never checked out (or have a bad date)
+NO_CHECKOUT = np.iinfo(np.int64).min
+
+
+class BookFrame:
+    # Columnar snapshot of the catalog for the analytics service.
+    # Every numeric column is a typed float64 array, with NaN for missing values.
+    # Genres are stored as integer codes into self.genres, and languages, formats
+    # and publishers the same way, so reports never walk Book attributes again.
+    # Build it once per dataset version (see BookService.get_book_frame).
+    def __init__(self, books: list[Book], version: Hashable = None):
+        self.books = books  # row i of every column is books[i]
+        self.version = version
+        self.book_ids = [b.book_id for b in books]
+        self.price = _float_column(books, "price_usd")
+        self.rating = _float_column(books, "average_rating")
+        self.ratings_count = _float_column(books, "ratings_count")
+        self.year = _float_column(books, "publication_year")
+        # same rule as the checkin_vs_available chart: None counts as checked out
+        self.available = np.fromiter(
+            (b.available is True for b in books), dtype=bool, count=len(books)
+        )
+        self.last_checkout = [b.last_checkout for b in books]
+        self.genre_codes, self.genres = _encode(b.genre for b in books)
+        # spelling variants ("eng", "english") share one code via the mapping table
+        self.language_codes, self.languages = _encode_canonical(
+            "language", (b.language for b in books)
+        )
+        self.format_codes, self.formats = _encode_canonical(
+            "format", (b.format for b in books)
+        )
+        self.publisher_codes, self.publishers = _encode_canonical(
+            "publisher", (b.publisher for b in books)
+        )
+        # derived lazily, but at most once per frame (= once per dataset version)
+        self._checkout_epochs: np.ndarray | None = None
+        self._best_by_year: dict[int, int] | None = None
+
+    @classmethod
+    def from_books(cls, books: Iterable[Book], version: Hashable = None) -> "BookFrame":
+        return cls(list(books), version)
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def checkout_epochs(self) -> np.ndarray:
+        # last_checkout parsed once into int64 seconds since the epoch
+        if self._checkout_epochs is None:
+            parsed = pd.to_datetime(
+                pd.Series(self.last_checkout, dtype=object),
+                errors="coerce",
+                format="ISO8601",
+            )
+            self._checkout_epochs = parsed.to_numpy("datetime64[s]").astype(np.int64)
+        return self._checkout_epochs
+
+    def best_by_checkout_year(self) -> dict[int, int]:
+        # checkout year -> row of the book with the highest ratings_count
+        # (ties go to the earlier book, books without a count rank last)
+        if self._best_by_year is None:
+            epochs = self.checkout_epochs()
+            rows = np.flatnonzero(epochs != NO_CHECKOUT)
+            years = (
+                epochs[rows].astype("datetime64[s]").astype("datetime64[Y]").astype(int)
+                + 1970
+            )
+            counts = self.ratings_count[rows]
+            counts = np.where(np.isnan(counts), -np.inf, counts)
+            # one sort: by year, then most ratings first, then catalog order
+            order = np.lexsort((rows, -counts, years))
+            unique_years, first = np.unique(years[order], return_index=True)
+            self._best_by_year = dict(
+                zip(unique_years.tolist(), rows[order][first].tolist())
+            )
+        return self._best_by_year
+
+
+def _float_column(books: list[Book], name: str) -> np.ndarray:
+    get = attrgetter(name)
+    return np.fromiter(
+        (np.nan if (v := get(b)) is None else v for b in books),
+        dtype=float,
+        count=len(books),
+    )
+
+
+def _encode(values: Iterable) -> tuple[np.ndarray, list]:
+    # dictionary encoding: codes in order of first appearance
+    categories: dict = {}
+    codes = np.fromiter(
+        (categories.setdefault(v, len(categories)) for v in values), dtype=np.int32
+    )
+    return codes, list(categories)
+
+
+def _encode_canonical(column: str, values: Iterable) -> tuple[np.ndarray, list]:
+    # encode the raw strings first, then fold the (few) distinct values onto their
+    # canonical spelling and remap the codes with one array lookup
+    codes, raw = _encode(values)
+    categories: dict = {}
+    remap = np.fromiter(
+        (
+            categories.setdefault(known_value(column, v) or v, len(categories))
+            for v in raw
+        ),
+        dtype=np.int32,
+        count=len(raw),
+    )
+    return remap[codes], list(categories)
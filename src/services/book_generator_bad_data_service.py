@@ -1,8 +1,14 @@
-import json
-import random
-import uuid
-import re
-from datetime import datetime, timedelta
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+import numpy as np
+import pandas as pd
+from src.services.book_generator_service import uuid4_strings
+
+# books are generated this many at a time; every chunk has its own random stream
+# spawned from the seed, so the output only depends on the seed (not on workers)
+CHUNK_SIZE = 50_000
 
 genres = ["History", "Science Fiction", "Fantasy", "Technology", "Biography", "Mystery", "Romance"]
 languages = ["English", "english", "Eng", "French", "Spanish", "German"]
@@ -12,95 +18,200 @@ publishers = ["North Star Press", "Galactic Books", "Old Tree Publishing", "Suns
 tlds = ["com", "net", "org", "io", "edu", "co.uk", "info", "biz", "us", "ca", "de", "fr", "tech"]
 subdomains = ["www", "mail", "mx", "kr", "eu", "support", "shop", "news"]
 random_words = ["alpha", "omega", "prime", "core", "node", "sky", "terra", "lumen", "byte", "paper"]
+fallback_domains = ["northstar", "galacticbooks", "oldtree", "sunshine", "blueoak", "redrock"]
+inboxes = ["info", "contact", "support", "sales", "hello", "team"]
+first_names = ["john", "jane", "alex", "sam", "kr", "lee", "pat", "chris"]
+last_names = ["doe", "smith", "lee", "wright", "nguyen", "garcia", "khan"]
+local_prefixes = ["kr", "mx", "eu", "jp", "us"]
 
+# field -> the bad values it can be corrupted into
+CORRUPT_VALUES = {
+    "publication_year": ["Unknown", None],
+    "page_count": [-5, "N/A", None],
+    "average_rating": ["N/A", None],
+    "ratings_count": ["Unknown", None],
+    "price_usd": ["N/A", None],
+    "in_print": ["true", "false", None],
+    "sales_millions": ["Unknown", None],
+    "last_checkout": ["", "N/A", None],
+    "available": ["true", "false", None],
+}
+# chance that a field is corrupted (same rates as the old random.choice lists)
+DEFAULT_CORRUPTION = {
+    "publication_year": 2 / 3,
+    "page_count": 3 / 4,
+    "average_rating": 2 / 3,
+    "ratings_count": 2 / 3,
+    "price_usd": 2 / 3,
+    "in_print": 3 / 5,
+    "sales_millions": 2 / 3,
+    "last_checkout": 3 / 4,
+    "available": 3 / 5,
+}
 
-def random_date():
-    base = datetime.today()
-    delta = timedelta(days=random.randint(-365*5, 0))
-    return (base + delta).isoformat()
 
 def _clean_domain_part(s: str) -> str:
-    s = (s or "").lower()
-    s = re.sub(r'[^a-z0-9]+', '', s)
-    return s or None
-
-def _random_local_part(publisher_short: str) -> str:
-    choices = []
-    # common inboxes
-    choices += ["info", "contact", "support", "sales", "hello", "team"]
-    # publisher-based local parts
-    if publisher_short:
-        choices += [f"{publisher_short}", f"press.{publisher_short}", f"{publisher_short}.dept", f"{publisher_short}info"]
-    # person-like parts
-    first = random.choice(["john","jane","alex","sam","kr","lee","pat","chris"])
-    last = random.choice(["doe","smith","lee","wright","nguyen","garcia","khan"])
-    choices += [f"{first}.{last}", f"{first}{last}", f"{first[0]}{last}", f"{first}_{last}"]
-    # random words and seeds
-    choices += [random.choice(random_words), f"{random.choice(random_words)}{random.randint(1,99)}"]
-    # ensure dots are allowed but not at ends
-    local = random.choice(choices)
-    local = re.sub(r'[^a-z0-9._-]', '', local.lower())
-    local = local.strip("._-")
-    if not local:
-        local = "info"
-    # sometimes add an extra dot segment like "kr.something"
-    if random.random() < 0.2:
-        extra = re.sub(r'[^a-z0-9]+', '', random.choice(random_words))
-        local = f"{random.choice(['kr','mx','eu','jp','us'])}.{local}" if extra else local
-    return local
-
-def generate_publisher_email(publisher: str) -> str:
-    pub_short = _clean_domain_part(publisher)
-    # fallback domains if publisher empty or too short
-    fallback_domains = ["northstar", "galacticbooks", "oldtree", "sunshine", "blueoak", "redrock"]
-    domain_base = pub_short or random.choice(fallback_domains)
-    # sometimes add a suffix to domain to increase variety
-    if random.random() < 0.25:
-        domain_base = domain_base + random.choice(["", "books", "press", "media", str(random.randint(1,99))])
-    # optionally add an extra domain segment for subdomain-like domains: e.g., press.northstar
-    if random.random() < 0.2:
-        extra = re.sub(r'[^a-z0-9]+', '', random.choice(random_words))
-        domain = f"{domain_base}.{extra}"
-    else:
-        domain = domain_base
-    tld = random.choice(tlds)
-    # optionally include a subdomain before the domain (like mail.publisher.net)
-    if random.random() < 0.35:
-        sub = random.choice(subdomains)
-        domain_full = f"{sub}.{domain}.{tld}"
-    else:
-        domain_full = f"{domain}.{tld}"
-    local = _random_local_part(pub_short)
-    # Ensure no accidental double dots
-    domain_full = domain_full.replace("..", ".")
-    email = f"{local}@{domain_full}"
-    return email
-
-def generate_books():
-    records = []
-
-    for i in range(500):
-        publisher_choice = random.choice(publishers)
-        record = {
-            "book_id": str(uuid.uuid4()),
-            "title": f"Book Title {random.randint(1, 20)}",
-            "author": f"Author {random.randint(1, 30)}",
-            "genre": random.choice(genres),
-            "publication_year": random.choice([random.randint(1750, 2030), "Unknown", None]),
-            "page_count": random.choice([random.randint(50, 1000), -5, "N/A", None]),
-            "average_rating": random.choice([round(random.uniform(0, 6), 2), "N/A", None]),
-            "ratings_count": random.choice([random.randint(0, 5000), "Unknown", None]),
-            "price_usd": random.choice([round(random.uniform(-10, 200), 2), "N/A", None]),
-            "publisher": random.choice(publishers),
-            "language": random.choice(languages),
-            "format": random.choice(formats),
-            "in_print": random.choice([True, False, "true", "false", None]),
-            "sales_millions": random.choice([round(random.uniform(-5, 20), 2), "Unknown", None]),
-            "last_checkout": random.choice([random_date(), "", "N/A", None]),
-            "available": random.choice([True, False, "true", "false", None]),
-            "publisher_email": generate_publisher_email(publisher_choice)
-        }
-        records.append(record)
-
-    with open("books_dirty.json", "w") as f:
-        json.dump(records, f, indent=2)
\ No newline at end of file
+    return "".join(c for c in (s or "").lower() if c.isascii() and c.isalnum())
+
+
+# cleaned once here instead of with re.sub for every record
+publisher_domains = [_clean_domain_part(p) for p in publishers]
+
+
+def generate_books(
+    filename="books_dirty.json",
+    count=500,
+    seed=None,
+    corruption=None,
+    workers=1,
+    ndjson=False,
+    now=None,
+) -> int:
+    # Writes `count` messy book records (bad numbers, odd spellings, missing values)
+    # for exercising the cleaning pipeline. corruption overrides DEFAULT_CORRUPTION
+    # per field, e.g. {"price_usd": 0.1}. Chunks are generated in `workers` processes
+    # and written in order, as a JSON array or NDJSON. Returns the records written.
+    rates = dict(DEFAULT_CORRUPTION)
+    for field, rate in (corruption or {}).items():
+        if field not in CORRUPT_VALUES:
+            raise ValueError(f"Unknown field to corrupt: {field}")
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Corruption rate for {field} must be between 0 and 1")
+        rates[field] = rate
+
+    now = now or datetime.now()
+    streams = np.random.SeedSequence(seed).spawn(-(-count // CHUNK_SIZE))
+    tasks = (
+        (stream, min(CHUNK_SIZE, count - n * CHUNK_SIZE), rates, now, ndjson)
+        for n, stream in enumerate(streams)
+    )
+
+    tmp_path = filename + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if not ndjson:
+            f.write("[")
+        first = True
+        for text in _generate_chunks(tasks, workers):
+            if not ndjson and not first:
+                f.write(",")
+            f.write(text)
+            first = False
+        if not ndjson:
+            f.write("]")
+    os.replace(tmp_path, filename)
+    return count
+
+
+def _generate_chunks(tasks, workers: int):
+    if workers <= 1:
+        yield from (_chunk_json(*task) for task in tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # a couple of chunks per worker in flight, so memory stays bounded
+        while batch := list(islice(tasks, workers * 2)):
+            yield from pool.map(_chunk_json, *zip(*batch))
+
+
+def _chunk_json(stream, size, rates, now, ndjson) -> str:
+    chunk = _generate_chunk(np.random.default_rng(stream), size, rates, now)
+    if ndjson:
+        lines = chunk.to_json(orient="records", lines=True)
+        return lines if lines.endswith("\n") else lines + "\n"
+    return chunk.to_json(orient="records")[1:-1]
+
+
+def _generate_chunk(rng, size, rates, now) -> pd.DataFrame:
+    def pick(values):
+        return np.array(values, dtype=object)[rng.integers(0, len(values), size)]
+
+    publisher_idx = rng.integers(0, len(publishers), size)
+    days_ago = rng.integers(0, 365 * 5 + 1, size).astype("timedelta64[D]")
+    columns = {
+        "book_id": uuid4_strings(rng, size),
+        "title": pick([f"Book Title {i}" for i in range(1, 21)]),
+        "author": pick([f"Author {i}" for i in range(1, 31)]),
+        "genre": pick(genres),
+        "publication_year": rng.integers(1750, 2031, size),
+        "page_count": rng.integers(50, 1001, size),
+        "average_rating": np.round(rng.uniform(0, 6, size), 2),
+        "ratings_count": rng.integers(0, 5001, size),
+        "price_usd": np.round(rng.uniform(-10, 200, size), 2),
+        "publisher": pick(publishers),
+        "language": pick(languages),
+        "format": pick(formats),
+        "in_print": rng.random(size) < 0.5,
+        "sales_millions": np.round(rng.uniform(-5, 20, size), 2),
+        "last_checkout": np.datetime_as_string(
+            np.datetime64(now, "us") - days_ago, unit="us"
+        ),
+        "available": rng.random(size) < 0.5,
+        # the email is based on a separate publisher draw, like before
+        "publisher_email": _publisher_emails(rng, publisher_idx),
+    }
+    for field, bad_values in CORRUPT_VALUES.items():
+        column = columns[field].astype(object)
+        corrupt = rng.random(size) < rates[field]
+        column[corrupt] = pick(bad_values)[corrupt]
+        columns[field] = column
+    return pd.DataFrame(columns)
+
+
+def _publisher_emails(rng, publisher_idx) -> np.ndarray:
+    # builds every email of the chunk column-wise: each optional part is drawn for
+    # all rows at once and glued on with numpy's elementwise string concatenation
+    size = len(publisher_idx)
+
+    def pick(values):
+        return np.array(values, dtype=object)[rng.integers(0, len(values), size)]
+
+    def maybe(p, part, empty=""):
+        return np.where(rng.random(size) < p, part, empty)
+
+    # domain: publisher name (or a fallback), maybe a suffix, maybe an extra segment
+    pub_short = np.array(publisher_domains, dtype=object)[publisher_idx]
+    has_pub = pub_short != ""
+    domain = np.where(has_pub, pub_short, pick(fallback_domains))
+    numbers = np.array([str(i) for i in range(1, 100)], dtype=object)
+    suffixes = [np.full(size, s, dtype=object) for s in ["", "books", "press", "media"]]
+    suffix = _pick_form(rng, suffixes + [numbers[rng.integers(0, 99, size)]])
+    domain = domain + maybe(0.25, suffix)
+    domain = domain + maybe(0.2, "." + pick(random_words))
+    # optionally a subdomain in front (like mail.publisher.net)
+    domain = maybe(0.35, pick(subdomains) + ".") + domain + "." + pick(tlds)
+
+    # local part: a common inbox, a publisher-based name, a person or a random word
+    person = pick(first_names)
+    last = pick(last_names)
+    person_forms = [
+        person + "." + last,
+        person + last,
+        np.array([p[0] for p in person], dtype=object) + last,
+        person + "_" + last,
+    ]
+    publisher_forms = [
+        pub_short,
+        "press." + pub_short,
+        pub_short + ".dept",
+        pub_short + "info",
+    ]
+    word = pick(random_words)
+    word_forms = [word, word + numbers[rng.integers(0, 99, size)]]
+    kind = rng.integers(0, 4, size)
+    local = np.select(
+        [kind == 0, (kind == 1) & has_pub, kind == 2],
+        [
+            pick(inboxes),
+            _pick_form(rng, publisher_forms),
+            _pick_form(rng, person_forms),
+        ],
+        default=_pick_form(rng, word_forms),
+    )
+    # sometimes an extra dot segment like "kr.something"
+    local = maybe(0.2, pick(local_prefixes) + ".") + local
+    return local + "@" + domain
+
+
+def _pick_form(rng, forms: list[np.ndarray]) -> np.ndarray:
+    # row i takes forms[k][i] for a random k
+    choice = rng.integers(0, len(forms), len(forms[0]))
+    return np.choose(choice, forms)
@@ -1,142 +1,159 @@
-import json
-import random
-import uuid
+import os
 from datetime import datetime, timedelta
 import numpy as np
-
-#using v2
-
-def generate_books_json(filename="books.json", count=500, seed=None):
-    rng = np.random.default_rng(seed)
-    random.seed(seed)
-
-    genres = [
-        "Fantasy",
-        "Sci-Fi",
-        "Non-Fiction",
-        "Mystery",
-        "Romance",
-        "Technology",
-        "History",
-    ]
-    # make Fantasy and Sci-Fi more popular
-    genre_weights = np.array([0.28, 0.24, 0.12, 0.10, 0.08, 0.10, 0.08])
-    genre_weights = genre_weights / genre_weights.sum()
-
-    publishers = [
-        "North Star Press",
-        "Emerald House",
-        "Atlas Publishing",
-        "Blue River Books",
-    ]
-
-    formats = ["Hardcover", "Paperback", "Ebook", "Audiobook"]
-
-    # Publication year distribution: fewer before 1950, increasing after 1950
-    years = np.arange(1850, 2026)
-    year_weights = np.where(years <= 1950, 0.2, 1.0 + (years - 1950) / (2025 - 1950))
-    year_weights = year_weights / year_weights.sum()
-
-    # make popularity multipliers from genre_weights (centered on 1.0)
-    # positive values boost ratings_count and sales for popular genres
-    # strengthen the effect so popular genres (Fantasy, Sci‑Fi) get noticeably higher counts
-    genre_pop_mult = 1.0 + (genre_weights - genre_weights.mean()) * 4.0
-    # stronger per-genre rating bias so popular genres tend to be rated higher
-    genre_rating_bias = (genre_weights - genre_weights.mean()) * 1.2
-
-    # Build correlated latent variables:
-    # z0 -> price latent, z1 -> average_rating latent, z2 -> ratings_count latent
-    cov = np.array([[1.0, 0.7, 0.3], [0.7, 1.0, 0.6], [0.3, 0.6, 1.0]])
-    z = rng.multivariate_normal(mean=np.zeros(3), cov=cov, size=count)
-
-    price_raw = z[:, 0]
-    rating_raw = z[:, 1]
-    rc_raw = z[:, 2]
-
-    # Transform rating_raw -> average_rating in [1.0, 5.0] (target ~ mean 3.2, sd ~0.6)
-    rating = (rating_raw - rating_raw.mean()) / (rating_raw.std() + 1e-9)
-    average_rating = np.clip(np.round(rating * 0.6 + 3.2, 2), 1.0, 5.0)
-
-    # Transform price_raw -> price_usd (log-scale so higher latent => substantially higher price)
-    price_norm = (price_raw - price_raw.mean()) / (price_raw.std() + 1e-9)
-    price_usd = np.round(np.clip(np.exp(price_norm * 0.45 + 2.2), 3.99, 299.99), 2)
-
-    # Transform rc_raw -> ratings_count (positive, heavy-tail via exp)
-    rc_norm = (rc_raw - rc_raw.mean()) / (rc_raw.std() + 1e-9)
-    ratings_count = np.round(np.clip(np.exp(rc_norm * 0.9 + 4.5), 0, 200000)).astype(
-        int
+import pandas as pd
+
+# using v2, vectorized: every column of a chunk is drawn with one numpy call
+
+# books are generated (and written) this many at a time; each chunk gets its own
+# random stream spawned from the seed, so the same seed always gives the same file
+CHUNK_SIZE = 100_000
+
+genres = [
+    "Fantasy",
+    "Sci-Fi",
+    "Non-Fiction",
+    "Mystery",
+    "Romance",
+    "Technology",
+    "History",
+]
+# make Fantasy and Sci-Fi more popular
+genre_weights = np.array([0.28, 0.24, 0.12, 0.10, 0.08, 0.10, 0.08])
+genre_weights = genre_weights / genre_weights.sum()
+
+publishers = [
+    "North Star Press",
+    "Emerald House",
+    "Atlas Publishing",
+    "Blue River Books",
+]
+
+formats = ["Hardcover", "Paperback", "Ebook", "Audiobook"]
+
+# Publication year distribution: fewer before 1950, increasing after 1950
+years = np.arange(1850, 2026)
+year_weights = np.where(years <= 1950, 0.2, 1.0 + (years - 1950) / (2025 - 1950))
+year_weights = year_weights / year_weights.sum()
+
+# make popularity multipliers from genre_weights (centered on 1.0)
+# positive values boost ratings_count and sales for popular genres
+# strengthen the effect so popular genres (Fantasy, Sci‑Fi) get noticeably higher counts
+genre_pop_mult = 1.0 + (genre_weights - genre_weights.mean()) * 4.0
+# stronger per-genre rating bias so popular genres tend to be rated higher
+genre_rating_bias = (genre_weights - genre_weights.mean()) * 1.2
+
+# Correlated latent variables:
+# z0 -> price latent, z1 -> average_rating latent, z2 -> ratings_count latent
+cov = np.array([[1.0, 0.7, 0.3], [0.7, 1.0, 0.6], [0.3, 0.6, 1.0]])
+# the latents are already standard normal, so no per-sample standardization is
+# needed (it would make every chunk scale differently). The sales score used to
+# divide by the sample's largest log1p(ratings_count); the fixed stand-in is the
+# 99.9th percentile of that distribution (z = 3.09).
+LOG_RATINGS_REF = 4.5 + 0.9 * 3.09
+
+
+def generate_books_json(
+    filename="books.json", count=500, seed=None, ndjson=False, now=None
+) -> int:
+    # Writes `count` synthetic books as a JSON array (or NDJSON with ndjson=True),
+    # one chunk at a time, so memory stays bounded however many books are made.
+    # Returns the number of books written.
+    now = now or datetime.now()
+    six_months_ago = np.datetime64(now - timedelta(days=182), "us")
+    streams = np.random.SeedSequence(seed).spawn(-(-count // CHUNK_SIZE))
+
+    tmp_path = filename + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if not ndjson:
+            f.write("[")
+        for n, stream in enumerate(streams):
+            start = n * CHUNK_SIZE
+            size = min(CHUNK_SIZE, count - start)
+            chunk = _generate_chunk(np.random.default_rng(stream), start, size)
+            chunk["last_checkout"] = np.datetime_as_string(
+                six_months_ago + chunk["last_checkout"].to_numpy(), unit="us"
+            )
+            if ndjson:
+                lines = chunk.to_json(orient="records", lines=True)
+                # older pandas versions leave out the final newline
+                f.write(lines if lines.endswith("\n") else lines + "\n")
+            else:
+                if n:
+                    f.write(",")
+                # to_json gives "[{...},{...}]", drop the brackets to splice chunks
+                f.write(chunk.to_json(orient="records")[1:-1])
+        if not ndjson:
+            f.write("]")
+    os.replace(tmp_path, filename)
+    return count
+
+
+def _generate_chunk(rng: np.random.Generator, start: int, size: int) -> pd.DataFrame:
+    z = rng.multivariate_normal(mean=np.zeros(3), cov=cov, size=size)
+
+    # rating latent -> average_rating in [1.0, 5.0] (target ~ mean 3.2, sd ~0.6)
+    average_rating = np.clip(np.round(z[:, 1] * 0.6 + 3.2, 2), 1.0, 5.0)
+    # price latent -> price_usd (log-scale so higher latent => substantially higher price)
+    price_usd = np.round(np.clip(np.exp(z[:, 0] * 0.45 + 2.2), 3.99, 299.99), 2)
+    # ratings_count latent -> positive, heavy-tail via exp
+    ratings_count = np.round(np.clip(np.exp(z[:, 2] * 0.9 + 4.5), 0, 200000))
+
+    # one weighted draw per column (the CDF is built once, not once per book)
+    pub_year = rng.choice(years, size=size, p=year_weights)
+    genre_idx = rng.choice(len(genres), size=size, p=genre_weights)
+
+    # apply the genre popularity multiplier to ratings_count and sales
+    adj_ratings_count = np.round(
+        np.clip(ratings_count * genre_pop_mult[genre_idx], 0, 200000)
+    ).astype(np.int64)
+    # small genre-specific bias to average_rating so popularity shows in Bayesian avg
+    rating_adj = np.clip(
+        np.round(average_rating + genre_rating_bias[genre_idx], 2), 1.0, 5.0
     )
-
     # sales_millions tends to be higher with average_rating + ratings_count
-    # combine rating and log1p(ratings_count), then scale and add some noise
-    score = (average_rating / 5.0) * 0.6 + (
-        np.log1p(ratings_count) / np.log1p(ratings_count).max()
+    # keep the same weighting so rating => ~0.6 of sales influence
+    score_adj = (rating_adj / 5.0) * 0.6 + (
+        np.log1p(adj_ratings_count) / LOG_RATINGS_REF
     ) * 0.4
-    sales_loc = score * 10.0  # base scale so typical values are in 0..10 range
     sales_millions = np.round(
-        np.clip(rng.normal(loc=sales_loc, scale=1.5), 0.01, 200.0), 2
+        np.clip(rng.normal(loc=score_adj * 10.0, scale=1.5), 0.01, 200.0), 2
     )
 
-    books = []
-    now = datetime.now()
-    six_months_ago = now - timedelta(days=182)
-
-    for i in range(1, count + 1):
-        # publication year from weighted distribution
-        pub_year = int(rng.choice(years, p=year_weights))
-
-        random_days = int(rng.integers(0, 183))
-        random_seconds = int(rng.integers(0, 80000))
-        last_checkout = six_months_ago + timedelta(
-            days=random_days, seconds=random_seconds
-        )
-
-        idx = i - 1
-
-        # choose genre and apply stronger popularity multiplier to ratings_count and sales
-        genre_choice = str(rng.choice(genres, p=genre_weights))
-        gidx = genres.index(genre_choice)
-
-        adj_ratings_count = int(
-            np.round(np.clip(ratings_count[idx] * genre_pop_mult[gidx], 0, 200000))
-        )
-        # compute sales based on the adjusted rating and adjusted ratings_count
-        # keep the same weighting so rating => ~0.6 of sales influence
-        rating_adj = float(
-            np.clip(round(average_rating[idx] + genre_rating_bias[gidx], 2), 1.0, 5.0)
-        )
-
-        score_adj = (rating_adj / 5.0) * 0.6 + (
-            np.log1p(adj_ratings_count) / np.log1p(ratings_count).max()
-        ) * 0.4
-        adj_sales_millions = float(
-            np.round(
-                np.clip(rng.normal(loc=score_adj * 10.0, scale=1.5), 0.01, 200.0), 2
-            )
-        )
-
-        # apply a small genre-specific bias to average_rating so popularity shows in Bayesian avg
-        # rating_adj already computed above for sales calculation
-        books.append(
-            {
-                "book_id": str(uuid.uuid4()),
-                "title": f"Book Title {i}",
-                "author": f"Author {rng.integers(1, 80)}",
-                "genre": genre_choice,
-                "publication_year": pub_year,
-                "page_count": int(rng.integers(80, 1200)),
-                "average_rating": rating_adj,
-                "ratings_count": int(adj_ratings_count),
-                "price_usd": float(price_usd[idx]),
-                "publisher": random.choice(publishers),
-                "language": "English",
-                "format": random.choice(formats),
-                "in_print": bool(rng.choice([True, True, True, True, False])),
-                "sales_millions": float(adj_sales_millions),
-                "last_checkout": last_checkout.isoformat(),
-                "available": bool(rng.choice([True, False])),
-            }
-        )
-
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(books, f, indent=2)
\ No newline at end of file
+    # offset from six months ago, turned into a timestamp by the caller
+    checkout_offset = rng.integers(0, 183, size=size) * 86400 + rng.integers(
+        0, 80000, size=size
+    )
+
+    return pd.DataFrame(
+        {
+            "book_id": uuid4_strings(rng, size),
+            "title": [f"Book Title {i}" for i in range(start + 1, start + size + 1)],
+            "author": [f"Author {a}" for a in rng.integers(1, 80, size=size)],
+            "genre": np.array(genres)[genre_idx],
+            "publication_year": pub_year,
+            "page_count": rng.integers(80, 1200, size=size),
+            "average_rating": rating_adj,
+            "ratings_count": adj_ratings_count,
+            "price_usd": price_usd,
+            "publisher": np.array(publishers)[rng.integers(0, len(publishers), size)],
+            "language": "English",
+            "format": np.array(formats)[rng.integers(0, len(formats), size)],
+            "in_print": rng.random(size) < 0.8,
+            "sales_millions": sales_millions,
+            "last_checkout": checkout_offset.astype("timedelta64[s]"),
+            "available": rng.random(size) < 0.5,
+        }
+    )
+
+
+def uuid4_strings(rng: np.random.Generator, size: int) -> list[str]:
+    # random version-4 uuids from the seeded generator (uuid.uuid4() can't be seeded)
+    raw = np.frombuffer(rng.bytes(16 * size), dtype=np.uint8).reshape(size, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.tobytes().hex()
+    return [
+        f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+        for i in range(0, 32 * size, 32)
+    ]
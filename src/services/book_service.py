@@ -1,22 +1,79 @@
-from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from typing import Callable, Iterator, TypeVar
+from src.repositories.book_repository_protocol import BookLookup, BookRepositoryProtocol
 from src.domain.book import Book
+from src.services.book_frame import BookFrame
+from src.services.catalog_aggregates import CatalogAggregates
+from src.services.genre_median_index import GenreMedianIndex
+
+T = TypeVar("T")
 
 
 class BookService:
     def __init__(self, repo: BookRepositoryProtocol):
         self.repo = repo
+        self._frame: BookFrame | None = None
+        self._aggregates: CatalogAggregates | None = None
+        self._genre_medians: GenreMedianIndex | None = None
 
     def get_all_books(self) -> list[Book]:
         return self.repo.get_all_books()
 
+    def get_book_frame(self) -> BookFrame:
+        # columnar snapshot for analytics, rebuilt only when the catalog version changes
+        version = self.repo.version
+        if version is None or self._frame is None or self._frame.version != version:
+            self._frame = BookFrame(self.repo.get_all_books(), version)
+        return self._frame
+
+    def get_aggregates(self) -> CatalogAggregates | None:
+        # O(1) price/genre/availability totals; only repositories that publish
+        # their mutations (CachedBookRepository and friends) can keep them current
+        if self._aggregates is None and hasattr(self.repo, "subscribe"):
+            self._aggregates = CatalogAggregates()
+            self.repo.subscribe(self._aggregates)
+        if self._aggregates is not None:
+            self.repo.version  # reloads (and resets the listeners) if the file changed
+        return self._aggregates
+
+    def get_genre_medians(self) -> GenreMedianIndex | None:
+        # incrementally maintained per-genre medians, same rules as get_aggregates
+        if self._genre_medians is None and hasattr(self.repo, "subscribe"):
+            self._genre_medians = GenreMedianIndex()
+            self.repo.subscribe(self._genre_medians)
+        if self._genre_medians is not None:
+            self.repo.version  # reloads (and resets the listeners) if the file changed
+        return self._genre_medians
+
+    def replace_catalog(self, write: Callable[[str], T]) -> T:
+        # write(path) rewrites the whole catalog file (e.g. the cleaner's output);
+        # repositories that guard the file (LockedBookRepository) lock and version it
+        if hasattr(self.repo, "replace_catalog"):
+            return self.repo.replace_catalog(write)
+        return write(self.repo.filepath)
+
+    def iter_books(self, raw: bool = False) -> Iterator[Book] | Iterator[dict]:
+        return self.repo.iter_books(raw)
+
     def add_book(self, book: Book) -> str:
         return self.repo.add_book(book)
 
+    def add_books(self, books: list[Book]) -> list[str]:
+        return self.repo.add_books(books)
+
+    def update_books(self, books: list[Book]) -> list[bool]:
+        return self.repo.update_books(books)
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        return self.repo.get_by_id(book_id)
+
     def find_book_by_name(self, query: str) -> list[Book]:
         if not isinstance(query, str):
             raise TypeError("Expected str, got something else.")
         return self.repo.find_book_by_name(query)
 
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        return self.repo.find_by_title_author(title, author)
+
     def edit_book_by_name(
         self,
         title: str,
@@ -28,3 +85,11 @@ class BookService:
 
     def delete_book_by_name(self, title: str, author: str) -> bool:
         return self.repo.delete_book_by_name(title, author)
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        return self.repo.delete_books_by_ids(book_ids)
+
+    def modify_books(
+        self, lookups: list[BookLookup], mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        return self.repo.modify_books(lookups, mutate)
@@ -2,17 +2,25 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from src.domain.book import Book
+from src.services.book_frame import BookFrame
 
 
 class BookVisualization:
     # Create a bar chart that shows which genres are most common
-    def plot_genre_counts(self, books: list[Book]) -> None:
-        df = pd.DataFrame([{"genre": b.genre} for b in books])
-
-        counts = df["genre"].value_counts()
+    def plot_genre_counts(self, books: list[Book] | BookFrame) -> None:
+        counts = self.genre_counts(books)
         counts.plot(kind="bar", title="Most Common Genres")
         plt.show()
 
+    # Genre -> number of books, most common first (same as value_counts(), missing
+    # genres are left out). Counted on the frame's integer codes with bincount.
+    def genre_counts(self, books: list[Book] | BookFrame) -> pd.Series:
+        frame = books if isinstance(books, BookFrame) else BookFrame(list(books))
+        counts = np.bincount(frame.genre_codes, minlength=len(frame.genres))
+        series = pd.Series(counts, index=pd.Index(frame.genres, name="genre"))
+        series = series[series.index.notna()]
+        return series.sort_values(ascending=False, kind="stable").rename("count")
+
     # Create a bar chart that shows which genres tend to be rated highest
     # - Use a Bayesion Average:
     # weighted_rating = (ratings_count / (ratings_count + m)) * average_rating+ (m / (ratings_count + m)) * global_average + average_rating = books rating
@@ -77,9 +85,13 @@ class BookVisualization:
         df = pd.DataFrame(books)
         
         counts = df["available"].fillna(False).value_counts() #use counts cause plt.pie needs numeric slice sizes
+        self.checkin_vs_available_counts(counts.get(True, 0), counts.get(False, 0)) #(False, 0) = default to 0 instead of errpr
+
+    # same chart from precomputed tallies (e.g. CatalogAggregates.availability()), no scan needed
+    def checkin_vs_available_counts(self, available: int, checked_out: int) -> None:
         labels = ["Checked In", "Checked Out"]
         
-        plt.pie([counts.get(True, 0), counts.get(False, 0)], labels=labels, autopct="%1.1f%%")#(False, 0) = default to 0 instead of errpr | autopct="%1.1f%%" = display percentages on one decimal place
+        plt.pie([available, checked_out], labels=labels, autopct="%1.1f%%")#autopct="%1.1f%%" = display percentages on one decimal place
         plt.axis("equal") #makes the pie chart a perfect cirle (no oval)
         
         plt.show()
\ No newline at end of file
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from typing import Any, Iterable
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_frame import BookFrame
+
+
+class CachedBookAnalyticsService:
+    # Memoizes BookAnalyticsService reports keyed on (method, arguments, dataset version).
+    # The version is the one stamped on the BookFrame by BookService.get_book_frame(),
+    # i.e. the repository's mutation counter / file fingerprint, so a mutation makes
+    # every older entry unreachable and they age out of the LRU.
+    # Plain lists of books carry no version and are always computed fresh.
+    # NOTE: cached lists/dicts are returned as-is, don't mutate them.
+    def __init__(
+        self, analytics: BookAnalyticsService | None = None, maxsize: int = 128
+    ):
+        self.analytics = analytics if analytics is not None else BookAnalyticsService()
+        self.maxsize = maxsize
+        self._results: OrderedDict[tuple, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cache_stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._results),
+        }
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def _call(self, method: str, books, *args, **kwargs):
+        compute = getattr(self.analytics, method)
+        version = books.version if isinstance(books, BookFrame) else None
+        if version is None:
+            return compute(books, *args, **kwargs)
+
+        key = (method, version, args, tuple(sorted(kwargs.items())))
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)  # most recently used
+            return self._results[key]
+
+        self.misses += 1
+        result = compute(books, *args, **kwargs)
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)  # least recently used
+            self.evictions += 1
+        return result
+
+    def average_price(self, books: list[Book] | BookFrame) -> float:
+        return self._call("average_price", books)
+
+    def top_rated(
+        self, books: list[Book] | BookFrame, min_ratings: int = 1000, limit: int = 10
+    ):
+        return self._call("top_rated", books, min_ratings, limit)
+
+    def top_rated_stream(
+        self, books: Iterable[Book], min_ratings: int = 1000, limit: int = 10
+    ) -> list[Book]:
+        # streams have no version, nothing to cache
+        return self.analytics.top_rated_stream(books, min_ratings, limit)
+
+    def value_scores(
+        self,
+        books: list[Book] | BookFrame,
+        limit: int | None = None,
+        ranked: bool = False,
+    ) -> dict[str, float]:
+        return self._call("value_scores", books, limit, ranked)
+
+    def value_scores_stream(
+        self, books: Iterable[Book], limit: int = 10
+    ) -> dict[str, float]:
+        return self.analytics.value_scores_stream(books, limit)
+
+    def median_price_by_genre(self, books: list[Book] | BookFrame) -> dict[str, float]:
+        return self._call("median_price_by_genre", books)
+
+    def price_std_dev(self, books: list[Book] | BookFrame) -> float:
+        return self._call("price_std_dev", books)
+
+    def top_rated_with_pandas(
+        self, books: list | BookFrame, min_ratings: int = 1000, limit: int = 10
+    ) -> list:
+        return self._call("top_rated_with_pandas", books, min_ratings, limit)
+
+    def value_scores_with_pandas(
+        self, books: list | BookFrame, limit: int = 10
+    ) -> dict[str, float]:
+        return self._call("value_scores_with_pandas", books, limit)
+
+    def most_popular_by_year(
+        self, books: list[Book] | BookFrame, year
+    ) -> dict[int, Book]:
+        return self._call("most_popular_by_year", books, year)
+
+    def best_books_all_years(self, books: list[Book] | BookFrame) -> dict[int, Book]:
+        return self._call("best_books_all_years", books)
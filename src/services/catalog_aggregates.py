@@ -0,0 +1,113 @@
+import math
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+
+
+class CatalogAggregates:
+    # Running totals kept current by the repository (subscribe it to a
+    # CachedBookRepository), so these reports are O(1) instead of a full scan:
+    # - count / sum / sum of squares of price -> average_price, price_std_dev
+    # - books per genre -> plot_genre_counts
+    # - available vs checked out -> checkin_vs_available
+    # A missing price makes the price stats NaN, same as the NumPy versions.
+    def __init__(self):
+        self.rebuild([])
+
+    def rebuild(self, books: list[Book]) -> None:
+        # full recompute, also what the repository calls after a reload
+        self.count = 0
+        self.missing_prices = 0
+        self.price_sum = 0.0
+        self.price_sumsq = 0.0
+        self.genre_counts: dict[str | None, int] = {}
+        self.available = 0
+        self.checked_out = 0
+        # what each book contributed, so an update can take the old values back out
+        # even when the Book object was mutated in place
+        self._contributions: dict[str, tuple[float | None, str | None, bool]] = {}
+        for book in books:
+            self._add(book)
+
+    # CatalogListener
+    def on_reset(self, books: list[Book]) -> None:
+        self.rebuild(books)
+
+    def on_put(self, book: Book) -> None:
+        self._subtract(book.book_id)
+        self._add(book)
+
+    def on_remove(self, book: Book) -> None:
+        self._subtract(book.book_id)
+
+    def _add(self, book: Book) -> None:
+        price = book.price_usd
+        available = book.available is True  # None counts as checked out, like the chart
+        self._contributions[book.book_id] = (price, book.genre, available)
+        self.count += 1
+        if price is None:
+            self.missing_prices += 1
+        else:
+            self.price_sum += price
+            self.price_sumsq += price * price
+        self.genre_counts[book.genre] = self.genre_counts.get(book.genre, 0) + 1
+        if available:
+            self.available += 1
+        else:
+            self.checked_out += 1
+
+    def _subtract(self, book_id: str) -> None:
+        contribution = self._contributions.pop(book_id, None)
+        if contribution is None:
+            return
+        price, genre, available = contribution
+        self.count -= 1
+        if price is None:
+            self.missing_prices -= 1
+        else:
+            self.price_sum -= price
+            self.price_sumsq -= price * price
+        self.genre_counts[genre] -= 1
+        if self.genre_counts[genre] == 0:
+            del self.genre_counts[genre]
+        if available:
+            self.available -= 1
+        else:
+            self.checked_out -= 1
+
+    def average_price(self) -> float:
+        if self.count == 0 or self.missing_prices:
+            return math.nan
+        return self.price_sum / self.count
+
+    def price_std_dev(self) -> float:
+        # population std dev (ddof=0), same as np.std
+        if self.count == 0 or self.missing_prices:
+            return math.nan
+        mean = self.price_sum / self.count
+        variance = self.price_sumsq / self.count - mean * mean
+        return math.sqrt(max(variance, 0.0))  # rounding can push ~0 slightly negative
+
+    def availability(self) -> dict[str, int]:
+        return {"available": self.available, "checked_out": self.checked_out}
+
+    def check_consistency(self, books: list[Book], rel_tol: float = 1e-6) -> bool:
+        # compare the running totals against the NumPy implementations on a full scan
+        analytics = BookAnalyticsService()
+        expected_genres: dict[str | None, int] = {}
+        for book in books:
+            expected_genres[book.genre] = expected_genres.get(book.genre, 0) + 1
+        expected_available = sum(1 for b in books if b.available is True)
+
+        return (
+            _close(self.average_price(), analytics.average_price(books), rel_tol)
+            and _close(self.price_std_dev(), analytics.price_std_dev(books), rel_tol)
+            and self.genre_counts == expected_genres
+            and self.available == expected_available
+            and self.checked_out == len(books) - expected_available
+        )
+
+
+def _close(a: float, b: float, rel_tol: float) -> bool:
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=rel_tol, abs_tol=1e-9)
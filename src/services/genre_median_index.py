@@ -0,0 +1,54 @@
+from bisect import bisect_left, insort
+from src.domain.book import Book
+
+
+class GenreMedianIndex:
+    # Per-genre sorted price lists kept current by the repository (subscribe it to a
+    # CachedBookRepository). Inserts/removals are a binary search plus a memmove,
+    # and median_price_by_genre() just reads the middle of each list: O(genres).
+    # Books without a price are left out, same as BookAnalyticsService.
+    def __init__(self):
+        self.rebuild([])
+
+    def rebuild(self, books: list[Book]) -> None:
+        self._prices: dict[str | None, list[float]] = {}
+        # (genre, price) each book was filed under, for in-place mutated updates
+        self._entries: dict[str, tuple[str | None, float]] = {}
+        for book in books:
+            self._add(book)
+
+    # CatalogListener
+    def on_reset(self, books: list[Book]) -> None:
+        self.rebuild(books)
+
+    def on_put(self, book: Book) -> None:
+        self._discard(book.book_id)
+        self._add(book)
+
+    def on_remove(self, book: Book) -> None:
+        self._discard(book.book_id)
+
+    def _add(self, book: Book) -> None:
+        if book.price_usd is None:
+            return
+        price = float(book.price_usd)
+        self._entries[book.book_id] = (book.genre, price)
+        insort(self._prices.setdefault(book.genre, []), price)
+
+    def _discard(self, book_id: str) -> None:
+        entry = self._entries.pop(book_id, None)
+        if entry is None:
+            return
+        genre, price = entry
+        prices = self._prices[genre]
+        del prices[bisect_left(prices, price)]
+        if not prices:
+            del self._prices[genre]
+
+    def median_price_by_genre(self) -> dict[str | None, float]:
+        result = {}
+        for genre, prices in self._prices.items():
+            n = len(prices)
+            # odd: the middle value, even: mean of the two middle values (like np.median)
+            result[genre] = (prices[(n - 1) // 2] + prices[n // 2]) / 2
+        return result
@@ -0,0 +1,105 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from os.path import commonprefix
+from typing import Sequence
+
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+")
+_TITLE, _AUTHOR = 0, 1  # positions in a record's key
+
+
+def normalize_key(text) -> str:
+    # "  The Hobbit: There & Back Again " -> "the hobbit there back again"
+    # (casefolded, accents and punctuation removed, whitespace collapsed)
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def find_near_duplicates(
+    records: Sequence[tuple[str, str]],
+    title_threshold: float = 0.95,
+    author_threshold: float = 0.85,
+    window: int = 20,
+) -> list[list[int]]:
+    # Groups (title, author) pairs that are probably the same book.
+    # Returns clusters of record positions (each sorted, only clusters with 2+ records,
+    # ordered by their first record).
+    #
+    # Only one side may be fuzzy: the same title with a similar author
+    # ("J.R.R. Tolkien" / "J. R. R. Tolkein"), or a similar title by the same author
+    # (spacing aside). A one-letter difference scores the same whether it's a typo
+    # or a different book ("The Hobit" and "Book Title 3 abcdeg" are both ~0.947),
+    # hence the strict default for titles: short titles have to match exactly.
+    #
+    # Comparing every pair is O(n^2), so records are first split into blocks where
+    # a match is possible at all: the same title (authors are compared) or the same
+    # author (titles are compared). Both keys include every number in the title and
+    # author, so "Dune 2" never meets "Dune 3".
+    # Inside a block, records are sorted and each one is only compared with the next
+    # `window` records, which keeps the work close to linear even for huge blocks.
+    keys = []
+    for title, author in records:
+        author = normalize_key(author)
+        keys.append((normalize_key(title), author, author.replace(" ", "")))
+    blocks = defaultdict(list)
+    for i, (title, author, compact_author) in enumerate(keys):
+        if not title or not author:
+            continue  # rows without title/author are dropped by cleaning anyway
+        numbers = tuple(_NUMBERS.findall(f"{title} {author}"))
+        blocks[(_AUTHOR, title, numbers)].append(i)  # same title, compare authors
+        blocks[(_TITLE, compact_author, numbers)].append(i)  # and the other way
+
+    parent = list(range(len(keys)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]  # path halving
+            i = parent[i]
+        return i
+
+    # a pair with the same title and author meets twice, which is cheaper than
+    # remembering every compared pair (n * window of them)
+    for (field, *_), members in blocks.items():
+        if len(members) < 2:
+            continue
+        values = {i: keys[i][field] for i in members}
+        threshold = author_threshold if field == _AUTHOR else title_threshold
+        members.sort(key=values.__getitem__)
+        for pos, i in enumerate(members):
+            for j in members[pos + 1 : pos + 1 + window]:
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j:
+                    continue
+                if _at_least(values[i], values[j], threshold):
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = defaultdict(list)
+    for i in range(len(keys)):
+        clusters[find(i)].append(i)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def _at_least(a: str, b: str, threshold: float) -> bool:
+    if a == b:
+        return True
+    # cheap upper bounds on the number of matching characters first, most pairs
+    # in a block fail here without building a SequenceMatcher: the shorter
+    # string, then the common prefix and suffix plus the characters in the rest
+    # of a that the rest of b has at all
+    needed = threshold * (len(a) + len(b)) / 2
+    if min(len(a), len(b)) < needed:
+        return False
+    start = len(commonprefix([a, b]))
+    end = len(commonprefix([a[start:][::-1], b[start:][::-1]]))
+    rest_of_b = set(b[start : len(b) - end])
+    found = sum(c in rest_of_b for c in a[start : len(a) - end])
+    if start + end + found < needed:
+        return False
+    return SequenceMatcher(None, a, b, autojunk=False).ratio() >= threshold
@@ -0,0 +1,50 @@
+from src.domain.book import Book
+
+
+def full_record() -> dict:
+    return Book(
+        title="Dune",
+        author="Frank Herbert",
+        genre="Science Fiction",
+        publication_year=1965,
+        page_count=412,
+        average_rating=4.3,
+        ratings_count=1000,
+        price_usd=9.99,
+        publisher="Chilton",
+        language="English",
+        format="Paperback",
+        in_print=True,
+        sales_millions=20.0,
+        last_checkout="2026-01-01T00:00:00",
+        available=False,
+        book_id="dune-1",
+    ).to_dict()
+
+
+def test_from_dict_fast_path_puts_every_field_in_place():
+    record = full_record()
+
+    book = Book.from_dict(record)
+
+    assert book.to_dict() == record
+    assert book.to_row() == tuple(record.values())
+
+
+def test_from_dict_ignores_unknown_keys_on_both_paths():
+    record = dict(full_record(), publisher_email="info@chilton.com")
+    without_id = {k: v for k, v in record.items() if k != "book_id"}
+
+    fast = Book.from_dict(record)
+    slow = Book.from_dict(without_id)
+
+    assert fast.to_dict() == full_record()
+    assert not hasattr(fast, "publisher_email")
+    assert slow.title == "Dune" and slow.available is False
+    assert slow.book_id != "dune-1"  # a fresh id from the default factory
+
+
+def test_from_dict_fills_defaults_for_missing_fields():
+    book = Book.from_dict({"book_id": "x", "title": "Emma", "author": "Jane Austen"})
+
+    assert book.genre is None and book.available is True and book.book_id == "x"
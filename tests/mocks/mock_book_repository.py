@@ -1,3 +1,4 @@
+from typing import Callable, Iterator
 from src.domain.book import Book
 
 
@@ -6,17 +7,51 @@ class MockBookRepo:
         if books is None:
             books = [Book(title="test", author="author")]
         self._books = list(books)
+        self.version = None  # no change tracking, never cache on top of the mock
 
     def get_all_books(self) -> list[Book]:
         return list(self._books)
 
+    def iter_books(self, raw: bool = False) -> Iterator[Book] | Iterator[dict]:
+        if raw:
+            return (b.to_dict() for b in list(self._books))
+        return iter(list(self._books))
+
     def add_book(self, book: Book) -> str:
         self._books.append(book)
         return book.book_id
 
+    def add_books(self, books: list[Book]) -> list[str]:
+        self._books.extend(books)
+        return [b.book_id for b in books]
+
+    def update_books(self, books: list[Book]) -> list[bool]:
+        results = []
+        for book in books:
+            for index, existing in enumerate(self._books):
+                if existing.book_id == book.book_id:
+                    self._books[index] = book
+                    results.append(True)
+                    break
+            else:
+                results.append(False)
+        return results
+
+    def get_by_id(self, book_id: str) -> Book | None:
+        for book in self._books:
+            if book.book_id == book_id:
+                return book
+        return None
+
     def find_book_by_name(self, query: str) -> list[Book]:
         return [b for b in self._books if b.title == query]
 
+    def find_by_title_author(self, title: str, author: str) -> Book | None:
+        for book in self._books:
+            if book.title == title and book.author == author:
+                return book
+        return None
+
     def edit_book_by_name(
         self,
         title: str,
@@ -38,4 +73,24 @@ class MockBookRepo:
             if book.title == title and book.author == author:
                 del self._books[index]
                 return True
-        return False
\ No newline at end of file
+        return False
+
+    def delete_books_by_ids(self, book_ids: list[str]) -> list[bool]:
+        results = []
+        for book_id in book_ids:
+            before = len(self._books)
+            self._books = [b for b in self._books if b.book_id != book_id]
+            results.append(len(self._books) < before)
+        return results
+
+    def modify_books(
+        self, lookups: list, mutate: Callable[[Book], bool]
+    ) -> list[bool | None]:
+        results = []
+        for key in lookups:
+            if isinstance(key, str):
+                book = self.get_by_id(key)
+            else:
+                book = self.find_by_title_author(*key)
+            results.append(None if book is None else bool(mutate(book)))
+        return results
@@ -0,0 +1,91 @@
+import json
+from src.domain.book import Book
+from src.repositories.book_repository import BookRepository
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.repositories.journaled_book_repository import JournaledBookRepository
+from src.repositories.sqlite_book_repository import SqliteBookRepository
+
+
+def make_repo(tmp_path, books: list[Book]) -> BookRepository:
+    path = tmp_path / "books.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f, indent=2)
+    return BookRepository(str(path))
+
+
+def count_writes(repo: BookRepository) -> list[int]:
+    writes = []
+    original = repo._write_books
+
+    def counting_write(books):
+        writes.append(len(books))
+        original(books)
+
+    repo._write_books = counting_write
+    return writes
+
+
+def test_bulk_mutations_write_once_per_batch(tmp_path):
+    repo = make_repo(tmp_path, [])
+    writes = count_writes(repo)
+    new_books = [Book(title=f"Book {i}", author="Author") for i in range(100)]
+
+    repo.add_books(new_books)
+    for book in new_books:
+        book.available = False
+    updated = repo.update_books(new_books[:10])
+    deleted = repo.delete_books_by_ids([b.book_id for b in new_books[:50]] + ["nope"])
+
+    assert writes == [100, 100, 50]
+    assert updated == [True] * 10
+    assert deleted == [True] * 50 + [False]
+    assert len(repo.get_all_books()) == 50
+
+
+def test_delete_books_by_ids_same_id_twice(tmp_path):
+    dune = Book(title="Dune", author="Frank Herbert")
+    repo = make_repo(tmp_path, [dune])
+
+    assert repo.delete_books_by_ids([dune.book_id, dune.book_id]) == [True, False]
+    assert repo.get_all_books() == []
+
+
+def test_modify_books_finds_mutates_and_writes_once(tmp_path):
+    books = [Book(title=f"Book {i}", author="Author") for i in range(5)]
+    repos = [make_repo(tmp_path, books)]
+    writes = count_writes(repos[0])
+    repos.append(CachedBookRepository(repos[0].filepath))
+    repos.append(JournaledBookRepository(repos[0].filepath))
+    repos.append(SqliteBookRepository(str(tmp_path / "books.db")))
+    repos[-1].add_books(books)
+
+    def check_out(book: Book) -> bool:
+        if not book.available:
+            return False
+        book.available = False
+        return True
+
+    for repo in repos:
+        results = repo.modify_books(
+            [books[0].book_id, ("Book 3", "Author"), ("Book 3", "Author"), "nope"],
+            check_out,
+        )
+
+        assert results == [True, True, False, None]
+        reloaded = type(repo)(repo.filepath)
+        assert [b.available for b in reloaded.get_all_books()] == [
+            False,
+            True,
+            True,
+            False,
+            True,
+        ]
+        # undo for the next repository sharing books.json
+        repo.modify_books([books[0].book_id, books[3].book_id], check_in)
+
+    assert len(writes) == 2  # BookRepository: one write per modify_books call
+
+
+def check_in(book: Book) -> bool:
+    book.available = True
+    return True
@@ -0,0 +1,118 @@
+import json
+import pytest
+from src.domain.book import Book
+from src.repositories.cached_book_repository import CachedBookRepository
+
+
+def write_catalog(path, books: list[Book]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f, indent=2)
+
+
+def test_get_all_books_parses_once(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="Dune", author="Frank Herbert")])
+    repo = CachedBookRepository(str(path))
+
+    repo.get_all_books()
+    books = repo.get_all_books()
+
+    assert len(books) == 1
+    assert repo.cache_stats() == {"hits": 1, "reloads": 1}
+
+
+def test_version_checks_are_not_cache_hits(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="Dune", author="Frank Herbert")])
+    repo = CachedBookRepository(str(path))
+
+    first = repo.version
+    assert repo.version == first
+    assert repo.cache_stats() == {"hits": 0, "reloads": 1}
+
+    write_catalog(path, [Book(title="Emma", author="Jane Austen")])
+    assert repo.version != first  # a changed file is still picked up
+    repo.get_all_books()
+    assert repo.cache_stats() == {"hits": 1, "reloads": 2}
+
+
+def test_reloads_when_file_changes_on_disk(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [Book(title="Dune", author="Frank Herbert")])
+    repo = CachedBookRepository(str(path))
+    repo.get_all_books()
+
+    write_catalog(
+        path,
+        [
+            Book(title="Dune", author="Frank Herbert"),
+            Book(title="Emma", author="Jane Austen"),
+        ],
+    )
+    books = repo.get_all_books()
+
+    assert [b.title for b in books] == ["Dune", "Emma"]
+    assert repo.reloads == 2
+
+
+def test_own_writes_do_not_trigger_reload(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [])
+    repo = CachedBookRepository(str(path))
+
+    repo.add_book(Book(title="Dune", author="Frank Herbert"))
+    repo.delete_book_by_name("Dune", "Frank Herbert")
+    books = repo.get_all_books()
+
+    assert books == []
+    assert repo.reloads == 1
+
+
+def test_index_lookups_follow_edits(tmp_path):
+    path = tmp_path / "books.json"
+    dune = Book(title="Dune", author="Frank Herbert")
+    write_catalog(path, [dune, Book(title="Emma", author="Jane Austen")])
+    repo = CachedBookRepository(str(path))
+
+    repo.edit_book_by_name("Dune", "Frank Herbert", new_title="Dune Messiah")
+
+    assert repo.find_by_title_author("Dune", "Frank Herbert") is None
+    assert repo.find_by_title_author("Dune Messiah", "Frank Herbert").book_id == (
+        dune.book_id
+    )
+    assert repo.get_by_id(dune.book_id).title == "Dune Messiah"
+    assert [b.title for b in repo.get_all_books()] == ["Dune Messiah", "Emma"]
+
+
+def test_update_book_reindexes_in_place_mutation(tmp_path):
+    path = tmp_path / "books.json"
+    dune = Book(title="Dune", author="Frank Herbert")
+    write_catalog(path, [dune])
+    repo = CachedBookRepository(str(path))
+
+    book = repo.get_by_id(dune.book_id)
+    book.author = "F. Herbert"
+    updated = repo.update_book(book)
+
+    assert updated is True
+    assert repo.find_book_by_name("Dune")[0].author == "F. Herbert"
+    assert repo.find_by_title_author("Dune", "Frank Herbert") is None
+    assert repo.update_book(Book(title="Missing", author="Nobody")) is False
+
+
+def test_failed_modify_books_leaves_no_unsaved_changes_in_cache(tmp_path):
+    path = tmp_path / "books.json"
+    books = [Book(title=f"Book {i}", author="A", price_usd=2.0) for i in range(2)]
+    write_catalog(path, books)
+    repo = CachedBookRepository(str(path))
+
+    def reprice(book: Book) -> bool:
+        if book.title == "Book 1":
+            raise ValueError("bad price")
+        book.price_usd = 99.0
+        return True
+
+    with pytest.raises(ValueError):
+        repo.modify_books([b.book_id for b in books], reprice)
+
+    assert [b.price_usd for b in repo.get_all_books()] == [2.0, 2.0]
@@ -0,0 +1,208 @@
+import gc
+import json
+import os
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+import pytest
+from src.domain.circulation import Circulation
+from src.repositories.circulation_repository import CirculationRepository
+from src.repositories.indexed_circulation_repository import (
+    IndexedCirculationRepository,
+)
+
+START = datetime(2026, 1, 1)
+
+
+def event(i: int) -> Circulation:
+    return Circulation(
+        book_id=f"book-{i % 7}",
+        title=f"Title {i % 7}",
+        author="Author",
+        action="checkout" if i % 2 == 0 else "checkin",
+        timestamp=START + timedelta(hours=i),
+    )
+
+
+def test_indexed_queries_match_full_scans(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = IndexedCirculationRepository(path, sparse_every=4)
+    for i in range(50):
+        assert repo.log_circulation(event(i))
+    scan = CirculationRepository(path)
+
+    assert repo.get_logs_for_book("book-3") == scan.get_logs_for_book("book-3")
+    assert len(repo.get_logs_for_book("book-3")) == 7
+    assert repo.get_logs_for_book("missing") == []
+    for start, end in [(5, 17), (0, 4), (45, 60), (-3, 0)]:
+        args = (START + timedelta(hours=start), START + timedelta(hours=end))
+        assert repo.get_logs_between(*args) == scan.get_logs_between(*args)
+    assert len(repo.get_logs_between(START, START + timedelta(hours=12))) == 12
+
+
+def test_index_survives_restart_and_catches_up(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = IndexedCirculationRepository(path)
+    for i in range(10):
+        repo.log_circulation(event(i))
+    repo.save_index()
+
+    # someone else appends with the plain repository
+    other = CirculationRepository(path)
+    for i in range(10, 20):
+        other.log_circulation(event(i))
+
+    reopened = IndexedCirculationRepository(path)
+    assert len(reopened.get_logs_for_book("book-0")) == 3
+    assert reopened.get_logs_for_book("book-0") == other.get_logs_for_book("book-0")
+
+
+def test_reads_and_writes_from_two_threads_index_each_line_once(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = IndexedCirculationRepository(path)
+    repo.log_circulation(event(0))
+    CirculationRepository(path).log_circulation(event(7))  # appended by someone else
+    indexing = threading.Event()
+    add = repo._add
+
+    def slow_add(*args):
+        if threading.current_thread() is reader and not indexing.is_set():
+            indexing.set()
+            time.sleep(0.2)  # a write (think: the flush timer) lands right now
+        add(*args)
+
+    repo._add = slow_add
+    reader = threading.Thread(target=repo.get_logs_for_book, args=("book-0",))
+    reader.start()
+    indexing.wait()
+    repo.log_circulation(event(14))
+    reader.join()
+
+    assert len(repo.get_logs_for_book("book-0")) == 3
+
+
+def test_index_is_only_saved_on_request_or_close(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = IndexedCirculationRepository(path)
+    for i in range(2000):
+        repo.log_circulation(event(i))
+    assert len(repo.get_logs_for_book("book-0")) == 286
+
+    assert not os.path.exists(path + ".idx")
+    repo.close()
+    with open(path + ".idx", encoding="utf-8") as f:
+        assert json.load(f)["count"] == 2000
+
+
+def test_replaced_log_is_reindexed(tmp_path):
+    path = tmp_path / "circulation_logs.json"
+    repo = IndexedCirculationRepository(str(path))
+    for i in range(10):
+        repo.log_circulation(event(i))
+    repo.save_index()
+
+    path.write_text(json.dumps(event(3).to_dict()) + "\n")
+
+    assert IndexedCirculationRepository(str(path)).get_logs_for_book("book-3") == [
+        event(3)
+    ]
+    assert repo.get_logs_for_book("book-3") == [event(3)]
+
+
+def test_out_of_order_timestamps_fall_back_to_scan(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = IndexedCirculationRepository(path, sparse_every=2)
+    for i in [5, 6, 7, 1, 2, 8]:
+        repo.log_circulation(event(i))
+
+    logs = repo.get_logs_between(START, START + timedelta(hours=3))
+
+    assert [log.timestamp.hour for log in logs] == [1, 2]
+
+
+def test_buffered_writes_are_grouped(tmp_path):
+    path = tmp_path / "circulation_logs.json"
+    repo = CirculationRepository(str(path), buffer_size=4, durability="fsync")
+    for i in range(10):
+        repo.log_circulation(event(i))
+
+    assert repo.batches == 2
+    assert len(path.read_text().splitlines()) == 8
+    # reads (and close) write out whatever is still buffered
+    assert len(repo.get_all_logs()) == 10
+    repo.log_circulation(event(10))
+    repo.close()
+    assert len(path.read_text().splitlines()) == 11
+
+
+def test_buffer_is_flushed_after_interval(tmp_path):
+    path = tmp_path / "circulation_logs.json"
+    repo = IndexedCirculationRepository(str(path), buffer_size=100, flush_interval=0.05)
+    repo.log_circulation(event(0))
+    assert not path.exists() or path.read_text() == ""
+    time.sleep(0.3)
+
+    assert len(path.read_text().splitlines()) == 1
+    repo.log_circulation(event(7))
+    assert len(repo.get_logs_for_book("book-0")) == 2
+    repo.close()
+
+
+def test_no_durability_leaves_writes_buffered_until_read(tmp_path):
+    path = tmp_path / "circulation_logs.json"
+    repo = CirculationRepository(str(path), durability="none")
+    repo.log_circulation(event(0))
+
+    assert path.read_text() == ""  # still in the file object's buffer
+    assert len(repo.get_all_logs()) == 1
+    repo.close()
+
+
+class HalfWriter:
+    # gets half of the batch into the real file, then fails
+    def __init__(self, f):
+        self.f = f
+
+    def seek(self, *args):
+        return self.f.seek(*args)
+
+    def write(self, data: bytes):
+        self.f.write(data[: len(data) // 2])
+        self.f.flush()
+        raise OSError("disk full")
+
+
+def test_failed_batch_is_rolled_back_and_written_once(tmp_path):
+    path = tmp_path / "circulation_logs.json"
+    repo = CirculationRepository(str(path), buffer_size=2)
+    handle = repo._handle
+    repo._handle = lambda: HalfWriter(handle())
+
+    repo.log_circulation(event(0))
+    assert not repo.log_circulation(event(1))
+    assert path.read_text() == ""
+    with pytest.raises(OSError):
+        repo.close()  # the two events are still not written
+
+    del repo._handle
+    repo.close()
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_repositories_are_not_kept_alive_for_exit(tmp_path):
+    path = tmp_path / "circulation_logs.json"
+    repo = CirculationRepository(str(path), buffer_size=10)
+    repo.log_circulation(event(0))
+    ref = weakref.ref(repo)
+
+    del repo
+    gc.collect()
+
+    assert ref() is None
+    assert len(path.read_text().splitlines()) == 1  # written when it went away
+
+
+def test_unknown_durability_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CirculationRepository(str(tmp_path / "logs.json"), durability="always")
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+import pytest
+from src.domain.book import Book
+from src.repositories import journaled_book_repository
+from src.repositories.journaled_book_repository import JournaledBookRepository
+
+
+def write_catalog(path, books: list[Book]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f, indent=2)
+
+
+def test_mutations_append_to_journal_without_rewriting_snapshot(tmp_path):
+    path = tmp_path / "books.json"
+    dune = Book(title="Dune", author="Frank Herbert")
+    write_catalog(path, [dune])
+    snapshot = path.read_text()
+    repo = JournaledBookRepository(str(path))
+
+    repo.add_book(Book(title="Emma", author="Jane Austen"))
+    dune.available = False
+    repo.update_book(dune)
+    repo.delete_book_by_name("Emma", "Jane Austen")
+
+    assert path.read_text() == snapshot
+    assert len((tmp_path / "books.json.journal").read_text().splitlines()) == 3
+
+    fresh = JournaledBookRepository(str(path))
+    books = fresh.get_all_books()
+    assert [b.title for b in books] == ["Dune"]
+    assert books[0].available is False
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [])
+    repo = JournaledBookRepository(str(path), compact_records=2)
+
+    repo.add_book(Book(title="Dune", author="Frank Herbert"))
+    repo.add_book(Book(title="Emma", author="Jane Austen"))
+
+    assert repo.compactions == 1
+    assert not os.path.exists(str(path) + ".journal")
+    with open(path, encoding="utf-8") as f:
+        assert [b["title"] for b in json.load(f)] == ["Dune", "Emma"]
+    assert [b.title for b in repo.get_all_books()] == ["Dune", "Emma"]
+
+
+def test_background_compaction_keeps_later_writes(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [])
+    repo = JournaledBookRepository(str(path), compact_records=1, background=True)
+
+    for i in range(20):
+        repo.add_book(Book(title=f"Book {i}", author="Author"))
+    repo.wait_for_compaction()
+
+    fresh = JournaledBookRepository(str(path))
+    assert len(fresh.get_all_books()) == 20
+
+
+def test_reload_during_compaction_sees_every_record(tmp_path, monkeypatch):
+    path = tmp_path / "books.json"
+    write_catalog(path, [])
+    repo = JournaledBookRepository(str(path), background=True)
+    repo.add_books([Book(title=f"Book {i}", author="Author") for i in range(3)])
+    go = threading.Event()
+    write_snapshot = repo._write_snapshot
+
+    def delayed_write(*args):
+        go.wait()
+        write_snapshot(*args)
+
+    repo._write_snapshot = delayed_write
+    repo.compact(wait=False)
+    replay = journaled_book_repository._replay
+
+    def paused_replay(journal_path, books):
+        if journal_path == repo.compacting_path:
+            go.set()  # the snapshot swap would land right here
+            time.sleep(0.2)
+        return replay(journal_path, books)
+
+    monkeypatch.setattr(journaled_book_repository, "_replay", paused_replay)
+    repo.invalidate()
+
+    assert len(repo.get_all_books()) == 3
+    repo.wait_for_compaction()
+    assert len(JournaledBookRepository(str(path)).get_all_books()) == 3
+
+
+def test_failed_compaction_is_raised_and_loses_nothing(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [])
+    repo = JournaledBookRepository(str(path), compact_records=2)
+    os.mkdir(str(path) + ".tmp")  # the snapshot can't be written
+
+    repo.add_book(Book(title="Dune", author="Frank Herbert"))
+    with pytest.raises(OSError):
+        repo.add_book(Book(title="Emma", author="Jane Austen"))
+
+    assert repo.compactions == 0
+    fresh = JournaledBookRepository(str(path))
+    assert [b.title for b in fresh.get_all_books()] == ["Dune", "Emma"]
+
+
+def test_compaction_never_writes_unsaved_changes(tmp_path):
+    path = tmp_path / "books.json"
+    write_catalog(path, [])
+    repo = JournaledBookRepository(str(path), background=True)
+    dune_id = repo.add_book(Book(title="Dune", author="Frank Herbert"))
+    go = threading.Event()
+    write_snapshot = repo._write_snapshot
+
+    def delayed_write(*args):
+        go.wait()
+        write_snapshot(*args)
+
+    repo._write_snapshot = delayed_write
+    repo.compact(wait=False)
+    os.mkdir(repo.journal_path)  # the change below can't be journaled
+
+    def check_out(book):
+        book.available = False
+        return True
+
+    with pytest.raises(OSError):
+        repo.modify_books([dune_id], check_out)
+    go.set()
+    repo.wait_for_compaction()
+    os.rmdir(repo.journal_path)
+    assert JournaledBookRepository(str(path)).get_by_id(dune_id).available is True
+
+    # changed in place by a caller but never saved
+    repo.get_by_id(dune_id).available = False
+    repo.compact()
+    assert JournaledBookRepository(str(path)).get_by_id(dune_id).available is True
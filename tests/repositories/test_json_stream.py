@@ -0,0 +1,41 @@
+import json
+from src.domain.book import Book
+from src.repositories.book_repository import BookRepository
+from src.repositories.json_stream import iter_json_records
+
+RECORDS = [
+    {"title": "Dune", "author": "Frank Herbert", "tags": ["a", "b"]},
+    {"title": "Emma [1815]", "author": "Jane Austen, 1775"},
+    {"title": "Ulysses", "author": "James Joyce"},
+]
+
+
+def test_reads_pretty_printed_array_in_small_chunks(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps(RECORDS, indent=2))
+
+    assert list(iter_json_records(str(path), chunk_size=7)) == RECORDS
+
+
+def test_reads_newline_delimited_json(tmp_path):
+    path = tmp_path / "books.ndjson"
+    path.write_text("\n".join(json.dumps(r) for r in RECORDS) + "\n")
+
+    assert list(iter_json_records(str(path), chunk_size=16)) == RECORDS
+
+
+def test_empty_array_yields_nothing(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text("[]")
+
+    assert list(iter_json_records(str(path))) == []
+
+
+def test_repository_iter_books_matches_get_all_books(tmp_path):
+    path = tmp_path / "books.json"
+    books = [Book(title=f"Book {i}", author="Author") for i in range(50)]
+    path.write_text(json.dumps([b.to_dict() for b in books], indent=2))
+    repo = BookRepository(str(path))
+
+    assert list(repo.iter_books()) == repo.get_all_books()
+    assert next(repo.iter_books(raw=True)) == books[0].to_dict()
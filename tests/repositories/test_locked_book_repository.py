@@ -0,0 +1,154 @@
+import json
+import multiprocessing
+import random
+import threading
+import pytest
+from src.domain.book import Book
+from src.repositories.locked_book_repository import (
+    LockedBookRepository,
+    StaleCatalogError,
+)
+from src.repositories.locked_circulation_repository import (
+    LockedCirculationRepository,
+)
+from src.services.book_circulation_service import OK, BookCirculationService
+from src.services.book_cleaning_service import BookCleaningService
+from src.services.book_service import BookService
+
+
+def make_repo(tmp_path, books: list[Book]) -> LockedBookRepository:
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([b.to_dict() for b in books]))
+    return LockedBookRepository(str(path))
+
+
+def checkout_worker(books_path, log_path, book_ids, seed) -> int:
+    # checks out every book one at a time in its own order, returns how many it got
+    ids = list(book_ids)
+    random.Random(seed).shuffle(ids)
+    circ_repo = LockedCirculationRepository(log_path)
+    svc = BookCirculationService(LockedBookRepository(books_path), circ_repo)
+    got = sum(svc.checkout_books([book_id])[0] == OK for book_id in ids)
+    circ_repo.close()
+    return got
+
+
+def test_concurrent_checkouts_give_each_book_out_once(tmp_path):
+    books = [Book(title=f"Book {i}", author="Author") for i in range(200)]
+    repo = make_repo(tmp_path, books)
+    log_path = str(tmp_path / "circulation_logs.json")
+    ids = [b.book_id for b in books]
+
+    with multiprocessing.Pool(8) as pool:
+        got = pool.starmap(
+            checkout_worker, [(repo.filepath, log_path, ids, n) for n in range(8)]
+        )
+
+    assert sum(got) == 200
+    assert not any(b.available for b in repo.get_all_books())
+    assert repo.version[0] == 200  # one write per successful checkout
+    with open(log_path, encoding="utf-8") as f:
+        logs = [json.loads(line) for line in f]
+    assert len(logs) == 200
+    assert {log["book_id"] for log in logs} == set(ids)
+
+
+def test_stale_write_is_retried_on_the_fresh_catalog(tmp_path):
+    a = make_repo(tmp_path, [Book(title="First", author="Author")])
+    b = LockedBookRepository(a.filepath)
+    load = a._load_books
+    calls = []
+
+    def load_then_interleave():
+        books = load()
+        if not calls:
+            b.add_book(Book(title="Second", author="Author"))  # lands after a read
+        calls.append(1)
+        return books
+
+    a._load_books = load_then_interleave
+    a.add_book(Book(title="Third", author="Author"))
+
+    assert a.conflicts == 1
+    assert sorted(book.title for book in b.get_all_books()) == [
+        "First",
+        "Second",
+        "Third",
+    ]
+    assert a.version[0] == 2
+
+
+def test_update_with_a_stale_book_raises_instead_of_undoing(tmp_path):
+    a = make_repo(tmp_path, [Book(title="Dune", author="Frank Herbert")])
+    b = LockedBookRepository(a.filepath)
+    stale = a.get_all_books()[0]
+
+    def check_out(book: Book) -> bool:
+        book.available = False
+        return True
+
+    b.modify_books([stale.book_id], check_out)  # another process checks it out
+
+    stale.price_usd = 5.0
+    with pytest.raises(StaleCatalogError):
+        a.update_book(stale)
+
+    fresh = a.get_by_id(stale.book_id)
+    assert fresh.available is False
+    fresh.price_usd = 5.0
+    assert a.update_book(fresh)
+    assert b.get_by_id(stale.book_id).available is False
+
+
+def test_threads_sharing_a_repository_each_take_the_lock(tmp_path):
+    books = [Book(title=f"Book {i}", author="Author") for i in range(200)]
+    repo = make_repo(tmp_path, books)
+
+    def check_out(book: Book) -> bool:
+        book.available = False
+        return True
+
+    def worker(n: int):
+        for book in books[n::4]:
+            repo.modify_books([book.book_id], check_out)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not any(b.available for b in repo.get_all_books())
+    assert repo.version[0] == 200
+
+
+def test_external_rewrite_changes_the_version_and_is_a_conflict(tmp_path):
+    repo = make_repo(tmp_path, [Book(title="Dune", author="A", price_usd=10.0)])
+    svc = BookService(repo)
+    assert svc.get_book_frame().price.tolist() == [10.0]
+    stale = repo.get_all_books()[0]
+
+    # rewritten without the lock, e.g. by an older tool
+    replacement = [Book(title="Emma", author="B", price_usd=50.0).to_dict()]
+    (tmp_path / "books.json").write_text(json.dumps(replacement, indent=4))
+
+    stale.price_usd = 20.0
+    with pytest.raises(StaleCatalogError):
+        repo.update_book(stale)  # would overwrite the rewrite with old data
+    assert svc.get_book_frame().price.tolist() == [50.0]
+
+
+def test_cleaning_through_replace_catalog_locks_and_bumps_the_version(tmp_path):
+    repo = make_repo(tmp_path, [Book(title="Dune", author="A")])
+    svc = BookService(repo)
+    dirty = tmp_path / "books_dirty.json"
+    dirty.write_text(json.dumps([Book(title="Emma", author="B").to_dict()]))
+    before = repo.version
+
+    report = svc.replace_catalog(
+        lambda path: BookCleaningService().clean_file_incremental(str(dirty), path)
+    )
+
+    assert report["written"] == 1
+    assert repo.version[0] == before[0] + 1
+    assert [b.title for b in repo.get_all_books()] == ["Emma"]
@@ -0,0 +1,211 @@
+import json
+import os
+from datetime import datetime, timedelta
+from src.domain.circulation import Circulation
+from src.repositories import segmented_circulation_repository
+from src.repositories.segmented_circulation_repository import (
+    SegmentedCirculationRepository,
+)
+
+START = datetime(2026, 1, 1)
+
+
+def event(i: int, timestamp: datetime | None = None) -> Circulation:
+    return Circulation(
+        book_id=f"book-{i % 3}",
+        title=f"Title {i % 3}",
+        author="Author",
+        action="checkout",
+        timestamp=timestamp or START + timedelta(minutes=i),
+    )
+
+
+def test_rotates_into_compressed_segments_and_reads_across_them(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(path, max_bytes=500, compression="gzip")
+    for i in range(30):
+        repo.log_circulation(event(i))
+
+    segments = repo.segments()
+    assert len(segments) == repo.rotations > 2
+    assert all(p.endswith(".gz") for _, p in segments)
+    assert [log.timestamp for log in repo.iter_logs()] == [
+        event(i).timestamp for i in range(30)
+    ]
+    assert len(repo.get_logs_for_book("book-1")) == 10
+    window = repo.get_logs_between(event(5).timestamp, event(12).timestamp)
+    assert [log.timestamp.minute for log in window] == list(range(5, 12))
+
+    # a reopened log continues the numbering and still sees everything
+    reopened = SegmentedCirculationRepository(path, max_bytes=500, compression="gzip")
+    reopened.log_circulation(event(30))
+    reopened.rotate()
+    assert reopened.segments()[-1][0] == segments[-1][0] + 1
+    assert len(reopened.get_all_logs()) == 31
+
+
+def test_rotates_by_age(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(path, max_age=3600, compression="gzip")
+
+    repo.log_circulation(event(0, datetime.now() - timedelta(hours=2)))
+    assert len(repo.segments()) == 1
+    repo.log_circulation(event(1, datetime.now()))
+    repo.close()
+
+    # the active segment's age is read back from its first event
+    reopened = SegmentedCirculationRepository(path, max_age=3600, compression="gzip")
+    reopened.log_circulation(event(2, datetime.now()))
+    assert len(reopened.segments()) == 1
+    assert len(reopened.get_all_logs()) == 3
+
+
+def test_retention_drops_or_merges_old_segments(tmp_path):
+    dropped = SegmentedCirculationRepository(
+        str(tmp_path / "drop.json"), compression="gzip", keep_segments=2
+    )
+    merged = SegmentedCirculationRepository(
+        str(tmp_path / "merge.json"),
+        compression="gzip",
+        keep_segments=2,
+        retention="merge",
+    )
+    for i in range(6):
+        for repo in (dropped, merged):
+            repo.log_circulation(event(i))
+            repo.rotate()
+
+    assert [n for n, _ in dropped.segments()] == [5, 6]
+    assert [log.timestamp.minute for log in dropped.iter_logs()] == [4, 5]
+    assert [n for n, _ in merged.segments()] == [1, 5, 6]
+    assert [log.timestamp.minute for log in merged.iter_logs()] == list(range(6))
+
+
+def test_rotation_during_a_read_loses_nothing(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(path, max_bytes=500, compression="gzip")
+    for i in range(11):
+        repo.log_circulation(event(i))
+    assert os.path.getsize(path) > 0
+
+    logs = repo.iter_logs()
+    repo.rotate()  # e.g. the flush timer sealing the active segment mid-read
+
+    assert len(list(logs)) == 11
+
+
+def test_range_queries_only_open_overlapping_segments(tmp_path, monkeypatch):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(path, max_bytes=500, compression="gzip")
+    for i in range(30):
+        repo.log_circulation(event(i))
+    opened = []
+    read_lines = segmented_circulation_repository._read_lines
+
+    def recording_read_lines(segment_path):
+        opened.append(segment_path)
+        return read_lines(segment_path)
+
+    monkeypatch.setattr(
+        segmented_circulation_repository, "_read_lines", recording_read_lines
+    )
+
+    for reader in (
+        repo,
+        SegmentedCirculationRepository(path, max_bytes=500, compression="gzip"),
+    ):
+        opened.clear()
+        window = reader.get_logs_between(event(5).timestamp, event(7).timestamp)
+        assert [log.timestamp.minute for log in window] == [5, 6]
+        assert len(opened) == 2  # the segment holding minutes 5-6, plus the active file
+    assert os.path.exists(path + ".segments")
+
+
+def test_events_logged_out_of_order_are_read_in_order(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(path, max_bytes=500, compression="gzip")
+    order = list(range(30))
+    order.remove(3)
+    order.insert(22, 3)  # logged late, in the middle of a later segment
+    for i in order:
+        repo.log_circulation(event(i))
+    repo.log_circulation(event(2))  # and one in the active file
+
+    for reader in (
+        repo,
+        SegmentedCirculationRepository(path, max_bytes=500, compression="gzip"),
+    ):
+        window = reader.get_logs_between(event(1).timestamp, event(5).timestamp)
+        assert [log.timestamp.minute for log in window] == [1, 2, 2, 3, 4]
+        minutes = [log.timestamp.minute for log in reader.iter_logs()]
+        assert minutes == sorted(order + [2])
+
+
+def test_merge_appends_to_the_archive_and_rewrites_it_only_when_out_of_order(
+    tmp_path,
+):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(
+        path, compression="gzip", keep_segments=1, retention="merge"
+    )
+    for i in range(3):
+        repo.log_circulation(event(i))
+        repo.rotate()
+    archive = repo.segments()[0][1]
+    with open(archive, "rb") as f:
+        before = f.read()
+
+    for i in range(3, 6):
+        repo.log_circulation(event(i))
+        repo.rotate()
+    with open(archive, "rb") as f:
+        appended = f.read()
+    assert appended.startswith(before)  # appended to, not rewritten
+
+    repo.log_circulation(event(1))  # older than what the archive already has
+    repo.rotate()
+    repo.log_circulation(event(6))
+    repo.rotate()
+    with open(archive, "rb") as f:
+        assert not f.read().startswith(appended)
+    assert [log.timestamp.minute for log in repo.iter_logs()] == [
+        0,
+        1,
+        1,
+        2,
+        3,
+        4,
+        5,
+        6,
+    ]
+
+
+def test_a_crash_while_appending_to_the_archive_is_undone(tmp_path):
+    path = str(tmp_path / "circulation_logs.json")
+    repo = SegmentedCirculationRepository(
+        path, compression="gzip", keep_segments=1, retention="merge"
+    )
+    for i in range(3):
+        repo.log_circulation(event(i))
+        repo.rotate()
+    (_, archive), (_, newest) = repo.segments()
+    size = os.path.getsize(archive)
+    with open(archive, "ab") as f:
+        f.write(b"half a gzip member")
+    with open(path + ".merging", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "archive": os.path.basename(archive),
+                "size": size,
+                "sources": [os.path.basename(newest)],
+            },
+            f,
+        )
+
+    reopened = SegmentedCirculationRepository(
+        path, compression="gzip", keep_segments=1, retention="merge"
+    )
+
+    assert os.path.getsize(archive) == size
+    assert not os.path.exists(path + ".merging")
+    assert [log.timestamp.minute for log in reopened.iter_logs()] == [0, 1, 2]
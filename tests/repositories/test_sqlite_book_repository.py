@@ -0,0 +1,57 @@
+import json
+from src.domain.book import Book
+from src.repositories.sqlite_book_repository import SqliteBookRepository
+from src.services.book_service import BookService
+
+
+def test_migrate_from_json_round_trips_books(tmp_path):
+    json_path = tmp_path / "books.json"
+    books = [
+        Book(title="Dune", author="Frank Herbert", price_usd=9.99, in_print=True),
+        Book(title="Emma", author="Jane Austen", available=False),
+    ]
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in books], f)
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+
+    migrated = repo.migrate_from_json(str(json_path))
+
+    assert migrated == 2
+    assert repo.get_all_books() == books
+    assert repo.migrate_from_json(str(json_path)) == 0  # one-shot
+    repo.close()
+
+
+def test_book_service_crud_on_sqlite(tmp_path):
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+    svc = BookService(repo)
+    dune = Book(title="Dune", author="Frank Herbert")
+
+    svc.add_book(dune)
+    svc.add_book(Book(title="Emma", author="Jane Austen"))
+    edited = svc.edit_book_by_name("Dune", "Frank Herbert", new_title="Dune Messiah")
+    deleted = svc.delete_book_by_name("Emma", "Jane Austen")
+
+    assert edited is True
+    assert deleted is True
+    assert svc.find_book_by_name("Dune") == []
+    assert svc.get_by_id(dune.book_id).title == "Dune Messiah"
+    assert [b.title for b in svc.get_all_books()] == ["Dune Messiah"]
+    repo.close()
+
+
+def test_update_book_touches_single_row(tmp_path):
+    repo = SqliteBookRepository(str(tmp_path / "books.db"))
+    dune = Book(title="Dune", author="Frank Herbert")
+    repo.add_book(dune)
+
+    dune.available = False
+    dune.last_checkout = "2026-01-01T00:00:00"
+    updated = repo.update_book(dune)
+
+    found = repo.find_by_title_author("Dune", "Frank Herbert")
+    assert updated is True
+    assert found.available is False
+    assert found.last_checkout == "2026-01-01T00:00:00"
+    assert repo.update_book(Book(title="Missing", author="Nobody")) is False
+    repo.close()
@@ -0,0 +1,158 @@
+import json
+import math
+import numpy as np
+from src.domain.book import Book
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.services.book_analytics_service import (
+    BookAnalyticsService,
+    _top_k_indices,
+    _top_k_stream,
+)
+from src.services.book_frame import BookFrame
+from src.services.book_service import BookService
+
+
+def sample_books() -> list[Book]:
+    return [
+        Book(
+            title="A",
+            author="X",
+            genre="Fantasy",
+            price_usd=10.0,
+            average_rating=4.5,
+            ratings_count=2000,
+        ),
+        Book(
+            title="B",
+            author="X",
+            genre="Sci-Fi",
+            price_usd=20.0,
+            average_rating=3.0,
+            ratings_count=50,
+        ),
+        Book(
+            title="C",
+            author="Y",
+            genre="Fantasy",
+            price_usd=30.0,
+            average_rating=4.9,
+            ratings_count=1500,
+        ),
+        Book(
+            title="D",
+            author="Z",
+            genre=None,
+            price_usd=None,
+            average_rating=None,
+            ratings_count=None,
+        ),
+    ]
+
+
+def test_reports_match_on_list_and_frame():
+    books = sample_books()
+    frame = BookFrame(books)
+    svc = BookAnalyticsService()
+
+    assert svc.top_rated(frame) == svc.top_rated(books)
+    assert [b.title for b in svc.top_rated(frame)] == ["C", "A"]
+    assert svc.median_price_by_genre(frame) == {"Fantasy": 20.0, "Sci-Fi": 20.0}
+    assert svc.value_scores(books[:3]) == svc.value_scores(BookFrame(books[:3]))
+    assert svc.top_rated_with_pandas(frame) == svc.top_rated(frame)
+
+
+def test_get_book_frame_is_rebuilt_only_when_catalog_changes(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([b.to_dict() for b in sample_books()]))
+    svc = BookService(CachedBookRepository(str(path)))
+
+    frame = svc.get_book_frame()
+    assert svc.get_book_frame() is frame
+
+    svc.add_book(Book(title="E", author="Z", price_usd=5.0))
+    rebuilt = svc.get_book_frame()
+    assert rebuilt is not frame
+    assert len(rebuilt) == 5
+
+
+def test_top_k_array_stream_and_pandas_agree():
+    books = [
+        Book(
+            title=f"Book {i}",
+            author="X",
+            price_usd=5.0 + i % 4,
+            average_rating=float(i % 5),
+            ratings_count=1000 + i,
+        )
+        for i in range(40)
+    ]
+    svc = BookAnalyticsService()
+
+    top = svc.top_rated(books, limit=7)
+    assert top == svc.top_rated_stream(iter(books), limit=7)
+    assert top == svc.top_rated_with_pandas(books, limit=7)
+    assert [b.title for b in top[:2]] == ["Book 4", "Book 9"]  # ties keep order
+
+    scores = svc.value_scores(books, limit=5)
+    assert list(scores.items()) == list(
+        svc.value_scores_stream(iter(books), limit=5).items()
+    )
+    assert scores == svc.value_scores_with_pandas(books, limit=5)
+    assert list(svc.value_scores(books, ranked=True))[:5] == list(scores)
+
+
+def test_best_books_by_checkout_year():
+    books = [
+        Book(
+            title="A", author="X", ratings_count=10, last_checkout="2024-03-01T10:00:00"
+        ),
+        Book(
+            title="B",
+            author="X",
+            ratings_count=99,
+            last_checkout="2024-12-31T23:59:59.5",
+        ),
+        Book(
+            title="C", author="X", ratings_count=5, last_checkout="2025-01-01T00:00:00"
+        ),
+        Book(title="D", author="X", ratings_count=500, last_checkout=None),
+        Book(title="E", author="X", ratings_count=700, last_checkout="N/A"),
+    ]
+    frame = BookFrame(books)
+    svc = BookAnalyticsService()
+
+    assert svc.most_popular_by_year(frame, "2024") == {2024: books[1]}
+    assert svc.most_popular_by_year(frame, 2023) is None
+    assert svc.best_books_all_years(frame) == {2024: books[1], 2025: books[2]}
+
+
+def test_frame_encodes_category_variants_once():
+    books = [
+        Book(title="A", author="X", language="eng", format="Audio Book"),
+        Book(title="B", author="X", language="English", format="audiobook"),
+        Book(title="C", author="Y", language="Klingon", format=None),
+    ]
+
+    frame = BookFrame(books)
+
+    assert frame.languages == ["English", "Klingon"]
+    assert frame.language_codes.tolist() == [0, 0, 1]
+    assert frame.formats == ["Audiobook", None]
+    assert frame.format_codes.tolist() == [0, 0, 1]
+
+
+def test_top_k_helpers_agree_on_nan_ties_and_limits():
+    scores = [2.0, math.nan, 5.0, 2.0, -math.inf, math.nan, 5.0, math.inf, 1.0]
+    items = list(range(len(scores)))
+
+    for k in [0, 1, 3, 7, 9, 12]:
+        expected = _top_k_indices(np.array(scores), k).tolist()
+        assert _top_k_stream(zip(scores, items), k) == expected
+
+    svc = BookAnalyticsService()
+    books = [
+        Book(title="Rated", author="X", average_rating=4.0, ratings_count=2000),
+        Book(title="Unrated", author="X", average_rating=None, ratings_count=2000),
+    ]
+    assert svc.top_rated_stream(iter(books), limit=0) == []
+    assert svc.top_rated_stream(iter(books)) == svc.top_rated(books)
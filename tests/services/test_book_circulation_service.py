@@ -0,0 +1,68 @@
+import json
+from src.domain.book import Book
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.repositories.circulation_repository import CirculationRepository
+from src.services.book_circulation_service import (
+    ALREADY_CHECKED_IN,
+    ALREADY_CHECKED_OUT,
+    NOT_FOUND,
+    OK,
+    BookCirculationService,
+)
+from tests.mocks.mock_book_repository import MockBookRepo
+
+
+def make_service(tmp_path, books: list[Book]):
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([b.to_dict() for b in books]))
+    repo = CachedBookRepository(str(path))
+    circ_repo = CirculationRepository(
+        str(tmp_path / "circulation_logs.json"), buffer_size=100
+    )
+    return BookCirculationService(repo, circ_repo), repo, circ_repo
+
+
+def test_bulk_checkout_and_checkin_report_each_request(tmp_path):
+    books = [Book(title=f"Book {i}", author="Author") for i in range(4)]
+    books[2].available = False
+    svc, repo, circ_repo = make_service(tmp_path, books)
+
+    outcomes = svc.checkout_books(
+        [
+            ("Book 0", "Author"),
+            books[1].book_id,
+            ("Book 2", "Author"),
+            ("Book 0", "Author"),
+            ("Missing", "Author"),
+        ]
+    )
+
+    assert outcomes == [OK, OK, ALREADY_CHECKED_OUT, ALREADY_CHECKED_OUT, NOT_FOUND]
+    assert repo.mutations == 1  # one repository write
+    circ_repo.flush()
+    assert circ_repo.batches == 1  # one log batch
+    logs = circ_repo.get_all_logs()
+    assert [log.book_id for log in logs] == [books[0].book_id, books[1].book_id]
+    checked_out = repo.get_by_id(books[0].book_id)
+    assert checked_out.last_checkout == logs[0].timestamp.isoformat()
+
+    outcomes = svc.checkin_books([books[0].book_id, books[3].book_id])
+
+    assert outcomes == [OK, ALREADY_CHECKED_IN]
+    assert repo.get_by_id(books[0].book_id).available is True
+    assert [log.action for log in circ_repo.get_all_logs()] == [
+        "checkout",
+        "checkout",
+        "checkin",
+    ]
+
+
+def test_single_checkout_on_mock_repository(tmp_path):
+    repo = MockBookRepo()
+    circ_repo = CirculationRepository(str(tmp_path / "circulation_logs.json"))
+    svc = BookCirculationService(repo, circ_repo)
+
+    assert svc.checkout_book("test", "author") is True
+    assert svc.checkout_book("test", "author") is False
+    assert svc.checkin_book("test", "author") is True
+    assert len(circ_repo.get_all_logs()) == 2
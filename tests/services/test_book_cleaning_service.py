@@ -0,0 +1,307 @@
+import json
+from pathlib import Path
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from src.domain.book import Book
+from src.services.book_cleaning_service import BookCleaningService
+
+DIRTY_PATH = Path(__file__).parents[2] / "books_dirty.json"
+
+
+def dirty_books() -> list[dict]:
+    with open(DIRTY_PATH, "r", encoding="utf-8") as f:
+        books = json.load(f)
+    # a chunk with no valid dates and no publishers at all
+    return books + [dict(b, last_checkout="N/A", publisher=None) for b in books[:40]]
+
+
+def test_clean_parallel_matches_serial():
+    books = dirty_books()
+    svc = BookCleaningService()
+
+    expected = svc.clean(books)
+    result = svc.clean_parallel(books, workers=2, chunk_size=40)
+
+    assert_frame_equal(expected, result)
+
+
+def test_clean_normalizes_and_dedupes():
+    books = [
+        {
+            "title": "Dune",
+            "author": "Frank Herbert",
+            "genre": " fantasy ",
+            "publication_year": 1700,
+            "page_count": -5,
+            "average_rating": 6,
+            "ratings_count": "Unknown",
+            "price_usd": -1,
+            "publisher": "",
+            "language": "english",
+            "format": "Ebook",
+            "sales_millions": None,
+            "last_checkout": "N/A",
+        },
+        {
+            "title": "Dune",
+            "author": "Frank Herbert",
+            "genre": "Sci-Fi",
+            "publication_year": 2000,
+            "page_count": 10,
+            "average_rating": 3,
+            "ratings_count": 1,
+            "price_usd": 1,
+            "publisher": "X",
+            "language": "English",
+            "format": "Ebook",
+            "sales_millions": 1,
+            "last_checkout": "2025-01-01T00:00:00",
+        },
+    ]
+
+    df = BookCleaningService().clean(books)
+    row = df.iloc[0]
+
+    assert len(df) == 1
+    assert row["genre"] == "Fantasy"
+    assert row["publication_year"] == 1800
+    assert row["page_count"] == 0
+    assert row["average_rating"] == 5
+    assert row["price_usd"] == 0
+
+
+def test_clean_file_streams_same_rows_as_clean(tmp_path):
+    books = dirty_books()
+    src = tmp_path / "books_dirty.ndjson"
+    src.write_text("\n".join(json.dumps(b) for b in books))
+    dst = tmp_path / "books.json"
+    svc = BookCleaningService()
+
+    count = svc.clean_file(str(src), str(dst), batch_size=33)
+
+    expected = svc.clean(books)
+    expected["last_checkout"] = expected["last_checkout"].map(
+        lambda ts: None if ts is pd.NaT else ts.isoformat()
+    )
+    expected = expected.astype(object).where(expected.notna(), None)
+    with open(dst, encoding="utf-8") as f:
+        assert json.load(f) == expected.to_dict("records")
+    assert count == len(expected)
+
+
+def test_incremental_clean_only_recomputes_changed_records(tmp_path):
+    books = dirty_books()[:60]
+    src = tmp_path / "books_dirty.json"
+    dst = tmp_path / "books.json"
+    svc = BookCleaningService()
+
+    src.write_text(json.dumps(books))
+    first = svc.clean_file_incremental(str(src), str(dst))
+    books[5] = dict(books[5], genre="  mystery ")
+    books.append(dict(books[0], title="Brand New"))
+    src.write_text(json.dumps(books))
+    second = svc.clean_file_incremental(str(src), str(dst))
+
+    assert first["recomputed"] == 60
+    assert second["recomputed"] == 2
+    assert second["reused"] == 59
+    full = tmp_path / "full.json"
+    assert second["written"] == svc.clean_file(str(src), str(full))
+    assert dst.read_text() == full.read_text()
+
+
+def test_incremental_manifest_keeps_only_hashes_and_offsets(tmp_path):
+    books = dirty_books()[:20]
+    src = tmp_path / "books_dirty.json"
+    src.write_text(json.dumps(books))
+    dst = tmp_path / "books.json"
+    svc = BookCleaningService()
+
+    svc.clean_file_incremental(str(src), str(dst))
+    second = svc.clean_file_incremental(str(src), str(dst))
+
+    manifest = json.loads((tmp_path / "books.json.manifest.json").read_text())
+    assert all(isinstance(v, int) for v in manifest["offsets"].values())
+    # the cleaned rows live in one rows file, the previous run's one is removed
+    assert [p.name for p in tmp_path.glob("*.rows")] == [manifest["rows_file"]]
+    assert second["reused"] == 20
+
+    (tmp_path / manifest["rows_file"]).unlink()
+    assert svc.clean_file_incremental(str(src), str(dst))["recomputed"] == 20
+
+
+def test_incremental_clean_handles_repeated_records(tmp_path):
+    books = dirty_books()[:3] * 2
+    src = tmp_path / "books_dirty.json"
+    src.write_text(json.dumps(books))
+
+    report = BookCleaningService().clean_file_incremental(
+        str(src), str(tmp_path / "books.json"), batch_size=4
+    )
+
+    assert report["recomputed"] == 3
+    assert report["reused"] == 3
+
+
+def test_clean_canonicalizes_categories():
+    base = Book(title="", author="Frank Herbert", publisher="Ace").to_dict()
+    books = [
+        dict(base, title="Dune", language="english", format="Audio Book"),
+        dict(base, title="Emma", language="ENG", format="audiobook"),
+        dict(base, title="Ulysses", language=" English", format="ebook"),
+    ]
+
+    df = BookCleaningService().clean(books)
+
+    assert list(df["language"]) == ["English"] * 3
+    assert list(df["format"]) == ["Audiobook", "Audiobook", "Ebook"]
+    for col in ["genre", "language", "format", "publisher"]:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype)
+
+
+def test_merge_near_duplicates_reports_clusters():
+    base = Book(title="", author="").to_dict()
+    rows = [
+        ("The Hobbit", "J.R.R. Tolkien"),
+        ("Dune 2", "Frank Herbert"),
+        ("the  hobbit!", "J. R. R. Tolkien"),
+        ("Dune 3", "Frank Herbert"),
+        ("The Hobbit", "J. R. R. Tolkein"),
+        ("The Hobbit", "Someone Else"),
+        ("Cafe Society", "Zoe Heller"),
+        ("Café Society", "Zoë Heller"),
+    ]
+    df = pd.DataFrame(
+        [dict(base, book_id=str(i), title=t, author=a) for i, (t, a) in enumerate(rows)]
+    )
+
+    result, report = BookCleaningService().merge_near_duplicates(df)
+
+    assert list(result["book_id"]) == ["0", "1", "3", "5", "6"]
+    assert [c["kept"]["book_id"] for c in report] == ["0", "6"]
+    assert [b["book_id"] for b in report[0]["merged"]] == ["2", "4"]
+    assert [b["title"] for b in report[1]["merged"]] == ["Café Society"]
+
+
+def test_typo_in_a_title_needs_the_same_author():
+    df = pd.DataFrame(
+        {
+            "title": [
+                "The Lord of the Rings",
+                "The Lord of the Rigns",
+                "The Lord of the Ringz",
+            ],
+            "author": ["J.R.R. Tolkien", "JRR Tolkien", "JRR Tolkein"],
+        }
+    )
+
+    result, report = BookCleaningService().merge_near_duplicates(df)
+
+    assert list(result["title"]) == ["The Lord of the Rings", "The Lord of the Ringz"]
+    assert len(report) == 1
+
+
+def test_different_titles_one_letter_apart_are_not_merged():
+    df = pd.DataFrame(
+        {
+            "title": ["Book Title 3 abcdef", "Book Title 3 abcdeg"],
+            "author": ["Author 7", "Author 7"],
+        }
+    )
+
+    result, report = BookCleaningService().merge_near_duplicates(df)
+
+    assert len(result) == 2 and report == []
+
+
+def test_near_duplicate_thresholds_are_configurable():
+    df = pd.DataFrame(
+        {"title": ["The Hobbit", "The Hobit"], "author": ["Tolkien", "Tolkien"]}
+    )
+    svc = BookCleaningService()
+
+    strict, strict_report = svc.merge_near_duplicates(df, title_threshold=0.99)
+    loose, loose_report = svc.merge_near_duplicates(df, title_threshold=0.9)
+
+    assert len(strict) == 2 and strict_report == []
+    assert len(loose) == 1 and len(loose_report) == 1
+
+
+def test_cleaning_pipeline_merges_near_duplicates(tmp_path):
+    base = Book(title="", author="").to_dict()
+    books = [
+        dict(base, book_id="0", title="The Hobbit", author="J.R.R. Tolkien"),
+        dict(base, book_id="1", title="Dune", author="Frank Herbert"),
+        dict(base, book_id="2", title="the hobbit!", author="J. R. R. Tolkien"),
+    ]
+    src = tmp_path / "books_dirty.json"
+    src.write_text(json.dumps(books))
+    svc = BookCleaningService()
+
+    assert list(svc.clean(books)["book_id"]) == ["0", "1"]
+    assert len(svc.clean(books, near_duplicates=False)) == 3
+    # opt-in on the file paths
+    assert svc.clean_file(str(src), str(tmp_path / "books.json")) == 3
+    assert (
+        svc.clean_file(str(src), str(tmp_path / "books.json"), near_duplicates=True)
+        == 2
+    )
+    report = svc.clean_file_incremental(
+        str(src), str(tmp_path / "incremental.json"), near_duplicates=True
+    )
+    assert (report["written"], report["merged"]) == (2, 1)
+    with open(tmp_path / "incremental.json", encoding="utf-8") as f:
+        assert [b["book_id"] for b in json.load(f)] == ["0", "1"]
+
+
+def test_report_near_duplicates_in_the_catalog():
+    books = [
+        Book(title="The Hobbit", author="J.R.R. Tolkien"),
+        Book(title="The Hobit", author="JRR Tolkien"),
+        Book(title="Dune", author="Frank Herbert"),
+    ]
+
+    report = BookCleaningService().report_near_duplicates(books, title_threshold=0.9)
+
+    assert report == [
+        {
+            "kept": {
+                "book_id": books[0].book_id,
+                "title": "The Hobbit",
+                "author": "J.R.R. Tolkien",
+            },
+            "merged": [
+                {
+                    "book_id": books[1].book_id,
+                    "title": "The Hobit",
+                    "author": "JRR Tolkien",
+                }
+            ],
+        }
+    ]
+
+
+def test_output_does_not_depend_on_which_batch_has_missing_values(tmp_path):
+    base = Book(title="", author="A", publication_year=1999, page_count=300).to_dict()
+    base["ratings_count"] = 12
+    books = [dict(base, title=f"Book {i}") for i in range(6)]
+    books[4]["page_count"] = "N/A"  # only the last batch of two has a NaN
+    src = tmp_path / "books_dirty.json"
+    src.write_text(json.dumps(books))
+    svc = BookCleaningService()
+
+    outputs = []
+    for batch_size in [2, 10]:
+        dst = tmp_path / f"books_{batch_size}.json"
+        svc.clean_file(str(src), str(dst), batch_size=batch_size)
+        outputs.append(dst.read_text())
+    incremental = tmp_path / "incremental.json"
+    svc.clean_file_incremental(str(src), str(incremental), batch_size=2)
+    books[5]["genre"] = "fantasy"  # recomputed next to reused rows
+    src.write_text(json.dumps(books))
+    svc.clean_file_incremental(str(src), str(incremental), batch_size=10)
+    svc.clean_file(str(src), str(tmp_path / "full.json"))
+
+    assert outputs[0] == outputs[1]
+    assert incremental.read_text() == (tmp_path / "full.json").read_text()
+    assert [b["page_count"] for b in json.loads(outputs[0])] == [300] * 4 + [None, 300]
@@ -0,0 +1,56 @@
+import json
+from datetime import datetime
+import pytest
+from src.repositories.json_stream import iter_json_records
+from src.services import book_generator_bad_data_service
+from src.services.book_cleaning_service import BookCleaningService
+from src.services.book_generator_bad_data_service import (
+    CORRUPT_VALUES,
+    generate_books,
+)
+
+NOW = datetime(2026, 1, 1)
+
+
+def read(path) -> list[dict]:
+    return list(iter_json_records(str(path)))
+
+
+def test_output_depends_only_on_seed(tmp_path, monkeypatch):
+    monkeypatch.setattr(book_generator_bad_data_service, "CHUNK_SIZE", 9)
+    serial = tmp_path / "serial.json"
+    parallel = tmp_path / "parallel.ndjson"
+
+    assert generate_books(str(serial), count=40, seed=7, now=NOW) == 40
+    generate_books(str(parallel), count=40, seed=7, now=NOW, workers=2, ndjson=True)
+
+    assert read(serial) == read(parallel)
+    assert len(read(serial)) == 40
+    generate_books(str(serial), count=40, seed=8, now=NOW)
+    assert read(serial) != read(parallel)
+
+
+def test_corruption_rates(tmp_path):
+    path = tmp_path / "books_dirty.json"
+    never = {field: 0.0 for field in CORRUPT_VALUES}
+    generate_books(str(path), count=200, seed=1, corruption=never, now=NOW)
+    assert all(isinstance(b["price_usd"], float) for b in read(path))
+    assert all(isinstance(b["in_print"], bool) for b in read(path))
+
+    generate_books(str(path), count=200, seed=1, corruption={"price_usd": 1.0})
+    books = read(path)
+    assert all(b["price_usd"] in CORRUPT_VALUES["price_usd"] for b in books)
+    assert "@" in books[0]["publisher_email"]
+
+    with pytest.raises(ValueError):
+        generate_books(str(path), count=1, corruption={"title": 0.5})
+
+
+def test_generated_dirty_books_clean(tmp_path):
+    src = tmp_path / "books_dirty.json"
+    generate_books(str(src), count=300, seed=3, now=NOW)
+
+    written = BookCleaningService().clean_file(str(src), str(tmp_path / "books.json"))
+
+    # titles and authors repeat on purpose, so cleaning drops duplicates
+    assert 0 < written < 300
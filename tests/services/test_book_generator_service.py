@@ -0,0 +1,42 @@
+import json
+import uuid
+from datetime import datetime
+from src.domain.book import Book
+from src.repositories.json_stream import iter_json_records
+from src.services import book_generator_service
+from src.services.book_generator_service import generate_books_json
+
+NOW = datetime(2026, 1, 1)
+
+
+def test_same_seed_same_books_in_any_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(book_generator_service, "CHUNK_SIZE", 7)  # several chunks
+    array_path = str(tmp_path / "books.json")
+    ndjson_path = str(tmp_path / "books.ndjson")
+
+    assert generate_books_json(array_path, count=30, seed=42, now=NOW) == 30
+    generate_books_json(ndjson_path, count=30, seed=42, now=NOW, ndjson=True)
+    with open(array_path, encoding="utf-8") as f:
+        books = json.load(f)
+
+    assert list(iter_json_records(ndjson_path)) == books
+    generate_books_json(array_path, count=30, seed=42, now=NOW)
+    with open(array_path, encoding="utf-8") as f:
+        assert json.load(f) == books
+    generate_books_json(array_path, count=30, seed=43, now=NOW)
+    with open(array_path, encoding="utf-8") as f:
+        assert json.load(f) != books
+
+
+def test_generated_books_are_valid(tmp_path):
+    path = str(tmp_path / "books.json")
+    generate_books_json(path, count=200, seed=1, now=NOW)
+    with open(path, encoding="utf-8") as f:
+        books = [Book.from_dict(b) for b in json.load(f)]
+
+    assert [b.title for b in books[:2]] == ["Book Title 1", "Book Title 2"]
+    assert len({b.book_id for b in books}) == 200
+    assert all(uuid.UUID(b.book_id).version == 4 for b in books)
+    assert all(1.0 <= b.average_rating <= 5.0 for b in books)
+    assert all(1850 <= b.publication_year <= 2025 for b in books)
+    assert all(b.last_checkout < NOW.isoformat() for b in books)
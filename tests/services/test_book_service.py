@@ -114,4 +114,30 @@ def test_delete_book_by_name_not_found():
     books = svc.get_all_books()
 
     assert deleted is False
-    assert len(books) == 1
\ No newline at end of file
+    assert len(books) == 1
+
+
+def test_add_books_bulk_positive():
+    repo = MockBookRepo([])
+    svc = book_service.BookService(repo)
+    new_books = [Book(title=f"Book {i}", author="Author") for i in range(3)]
+
+    book_ids = svc.add_books(new_books)
+
+    assert book_ids == [b.book_id for b in new_books]
+    assert len(svc.get_all_books()) == 3
+
+
+def test_update_and_delete_books_bulk_report_per_item():
+    dune = Book(title="Dune", author="Frank Herbert")
+    repo = MockBookRepo([dune])
+    svc = book_service.BookService(repo)
+    missing = Book(title="Missing", author="Nobody")
+
+    dune.available = False
+    updated = svc.update_books([dune, missing])
+    deleted = svc.delete_books_by_ids([dune.book_id, missing.book_id])
+
+    assert updated == [True, False]
+    assert deleted == [True, False]
+    assert svc.get_all_books() == []
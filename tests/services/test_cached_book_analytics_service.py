@@ -0,0 +1,48 @@
+from src.domain.book import Book
+from src.services.book_frame import BookFrame
+from src.services.cached_book_analytics_service import CachedBookAnalyticsService
+
+
+def make_frame(version) -> BookFrame:
+    books = [
+        Book(title="A", author="X", genre="Fantasy", price_usd=10.0),
+        Book(title="B", author="Y", genre="Fantasy", price_usd=30.0),
+    ]
+    return BookFrame(books, version)
+
+
+def test_repeated_report_on_same_version_is_a_hit():
+    svc = CachedBookAnalyticsService()
+    frame = make_frame(version=1)
+
+    first = svc.average_price(frame)
+    second = svc.average_price(make_frame(version=1))
+
+    assert first == second == 20.0
+    assert svc.cache_stats()["hits"] == 1
+    assert svc.cache_stats()["misses"] == 1
+
+
+def test_new_version_or_arguments_miss():
+    svc = CachedBookAnalyticsService()
+
+    svc.top_rated(make_frame(version=1), min_ratings=0)
+    svc.top_rated(make_frame(version=2), min_ratings=0)
+    svc.top_rated(make_frame(version=2), min_ratings=0, limit=1)
+
+    assert svc.hits == 0
+    assert svc.misses == 3
+
+
+def test_lru_eviction_and_unversioned_bypass():
+    svc = CachedBookAnalyticsService(maxsize=2)
+    frame = make_frame(version=1)
+
+    svc.average_price(frame)
+    svc.price_std_dev(frame)
+    svc.average_price(frame)  # hit, now most recently used
+    svc.median_price_by_genre(frame)  # evicts price_std_dev
+    svc.price_std_dev(frame)
+    svc.average_price(make_frame(version=None))
+
+    assert svc.cache_stats() == {"hits": 1, "misses": 4, "evictions": 2, "size": 2}
@@ -0,0 +1,55 @@
+import json
+from src.domain.book import Book
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.services.book_service import BookService
+from tests.mocks.mock_book_repository import MockBookRepo
+
+
+def make_service(tmp_path, books: list[Book]) -> BookService:
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([b.to_dict() for b in books]))
+    return BookService(CachedBookRepository(str(path)))
+
+
+def test_aggregates_follow_every_mutation(tmp_path):
+    dune = Book(title="Dune", author="Frank Herbert", genre="Sci-Fi", price_usd=10.0)
+    svc = make_service(tmp_path, [dune])
+    aggregates = svc.get_aggregates()
+
+    svc.add_books(
+        [
+            Book(title="Emma", author="Jane Austen", genre="Romance", price_usd=20.0),
+            Book(
+                title="Ulysses", author="James Joyce", genre="Romance", price_usd=30.0
+            ),
+        ]
+    )
+    dune.available = False
+    dune.price_usd = 40.0  # mutated in place, old price must still come out
+    svc.repo.update_book(dune)
+    svc.delete_book_by_name("Emma", "Jane Austen")
+
+    assert aggregates.average_price() == 35.0
+    assert aggregates.genre_counts == {"Sci-Fi": 1, "Romance": 1}
+    assert aggregates.availability() == {"available": 1, "checked_out": 1}
+    assert aggregates.check_consistency(svc.get_all_books())
+
+
+def test_aggregates_rebuild_on_external_change(tmp_path):
+    svc = make_service(tmp_path, [Book(title="A", author="X", price_usd=1.0)])
+    svc.get_aggregates()
+
+    replacement = [Book(title="B", author="Y", price_usd=3.0) for _ in range(2)]
+    (tmp_path / "books.json").write_text(json.dumps([b.to_dict() for b in replacement]))
+    aggregates = svc.get_aggregates()  # nothing else has read the new file yet
+
+    assert aggregates.count == 2
+    assert aggregates.average_price() == 3.0
+    assert aggregates.price_std_dev() == 0.0
+    assert aggregates.check_consistency(svc.get_all_books())
+
+
+def test_no_aggregates_without_change_notifications():
+    svc = BookService(MockBookRepo())
+
+    assert svc.get_aggregates() is None
@@ -0,0 +1,56 @@
+import json
+from src.domain.book import Book
+from src.repositories.cached_book_repository import CachedBookRepository
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_service import BookService
+
+
+def test_genre_medians_follow_mutations_and_match_numpy(tmp_path):
+    books = [
+        Book(title=f"Book {i}", author="A", genre=g, price_usd=p)
+        for i, (g, p) in enumerate(
+            [("Fantasy", 5.0), ("Sci-Fi", 8.0), ("Fantasy", 1.0), ("Fantasy", 9.0)]
+        )
+    ]
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([b.to_dict() for b in books]))
+    svc = BookService(CachedBookRepository(str(path)))
+    medians = svc.get_genre_medians()
+
+    assert medians.median_price_by_genre() == {"Fantasy": 5.0, "Sci-Fi": 8.0}
+
+    svc.add_book(Book(title="New", author="B", genre="Sci-Fi", price_usd=2.0))
+    moved = svc.get_by_id(books[0].book_id)
+    moved.genre = "Mystery"  # mutated in place, must leave the Fantasy list
+    svc.update_books([moved])
+    svc.delete_book_by_name("Book 3", "A")
+
+    expected = BookAnalyticsService().median_price_by_genre(svc.get_all_books())
+    assert medians.median_price_by_genre() == expected
+    assert expected == {"Sci-Fi": 5.0, "Fantasy": 1.0, "Mystery": 5.0}
+
+
+def test_genre_medians_rebuild_on_external_change(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text(
+        json.dumps([Book(title="A", author="X", genre="G", price_usd=1.0).to_dict()])
+    )
+    svc = BookService(CachedBookRepository(str(path)))
+    svc.get_genre_medians()
+
+    replacement = [
+        Book(title=f"B{i}", author="Y", genre="G", price_usd=9.0) for i in range(2)
+    ]
+    path.write_text(json.dumps([b.to_dict() for b in replacement]))
+
+    assert svc.get_genre_medians().median_price_by_genre() == {"G": 9.0}
+
+
+def test_vectorized_median_skips_missing_prices():
+    books = [
+        Book(title="A", author="X", genre="Fantasy", price_usd=None),
+        Book(title="B", author="X", genre="Fantasy", price_usd=4.0),
+        Book(title="C", author="X", genre=None, price_usd=None),
+    ]
+
+    assert BookAnalyticsService().median_price_by_genre(books) == {"Fantasy": 4.0}